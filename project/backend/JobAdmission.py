@@ -0,0 +1,90 @@
+from collections import deque
+import asyncio
+import math
+
+
+class Overloaded(Exception):
+    """A database operation was shed instead of queued; retry after retry_after seconds"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(f"Too many concurrent database operations ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Caps the database operations one worker runs at once.
+
+    Up to max_in_flight operations run; up to max_queue more wait, in
+    arrival order, for at most queue_timeout seconds. Anything beyond that is
+    rejected immediately with Overloaded, so a burst is turned away in
+    microseconds instead of piling up on the connection pool until every
+    request times out together. Used from the event loop only.
+    """
+
+    def __init__(self, max_in_flight=32, max_queue=256, queue_timeout=1.0):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        # Roughly how long a full queue takes to drain
+        self.retry_after = max(1, math.ceil(queue_timeout))
+        self.in_flight = 0
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded("queue full", self.retry_after)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            self.timed_out += 1
+            raise Overloaded("queue timeout", self.retry_after)
+        except BaseException:
+            self._abandon(waiter)
+            raise
+        # release() already counted the slot as in flight for this waiter
+        self.admitted += 1
+
+    def _abandon(self, waiter):
+        if waiter.done() and not waiter.cancelled():
+            # Handed a slot just as the wait ended; pass it on
+            self.release()
+        else:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+
+    def release(self):
+        # Hand the slot straight to the oldest waiter, so newcomers cannot overtake the queue
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": len(self._waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
@@ -1,14 +1,146 @@
-from fastapi import FastAPI, HTTPException, status
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, date
-from JobList import JobList
+from JobAdmission import AdmissionController, Overloaded
+from JobCompression import Compression, CompressionMiddleware
+from JobConfig import JobConfig
+from JobEvents import JobEvents, ChangeStreamWatcher
+from JobIO import FORMATS, PARSERS, csv_chunks, iter_lines
+from JobList import AsyncJobList, parse_since
+from JobStore import ALLOWED_STATUSES, DuplicateJobError, IdempotencyKeyReused, decode_cursor, open_store, parse_fields, parse_sort
+from JobMetrics import Metrics, CommandMonitor, RequestTimingMiddleware
 from bson.objectid import ObjectId
 from contextlib import asynccontextmanager
+from functools import partial
 from fastapi.middleware.cors import CORSMiddleware
-import os
+import asyncio
+import json
+import time
 
-app = FastAPI(title="Job Application Tracker API", version="1.0.0")
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+metrics = Metrics()
+# Configured from JobConfig in the lifespan; middleware must exist before startup
+compression = Compression()
+
+# Set by the lifespan once the database is reachable
+db = None
+events = None
+startup = {"ready": False, "cold_start_seconds": None}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect, create indexes and warm up before serving; close on shutdown.
+
+    Errors propagate so a misconfigured server fails to start instead of
+    answering every request with 503.
+    """
+    global db, events
+    started = time.perf_counter()
+    config = JobConfig.from_env()
+    compression.configure(
+        [encoding.strip() for encoding in config.compression.split(",") if encoding.strip()],
+        minimum_size=config.compression_min_size,
+        gzip_level=config.gzip_level,
+        brotli_quality=config.brotli_quality,
+    )
+    monitor = CommandMonitor(metrics, config.slow_query_ms)
+    # Index creation blocks, so keep it off the event loop
+    job_list = await asyncio.to_thread(open_store, config, [monitor])
+    admission = None
+    if config.db_max_in_flight > 0:
+        admission = AdmissionController(
+            max_in_flight=config.db_max_in_flight,
+            max_queue=config.db_max_queue,
+            queue_timeout=config.db_queue_timeout_ms / 1000,
+        )
+    db = AsyncJobList(job_list, max_workers=config.executor_workers, admission=admission)
+    if config.warm_up:
+        await db.warm_up()
+    events = JobEvents(
+        asyncio.get_running_loop(),
+        max_subscribers=config.events_max_subscribers,
+        max_queue=config.events_max_queue,
+    )
+    archiver = None
+    if config.archive_interval_minutes > 0:
+        archiver = asyncio.create_task(_archive_periodically(db, config.archive_interval_minutes * 60))
+    watcher = None
+    if await asyncio.to_thread(_use_change_stream, job_list, config.events_source):
+        watcher = ChangeStreamWatcher(job_list, _publish_event)
+        watcher.start()
+    else:
+        job_list.add_listener(_publish_event)
+    startup["cold_start_seconds"] = time.perf_counter() - started
+    startup["ready"] = True
+    print(f"✓ Database ready in {startup['cold_start_seconds'] * 1000:.0f} ms")
+    try:
+        yield
+    finally:
+        startup["ready"] = False
+        if archiver is not None:
+            archiver.cancel()
+        if watcher is not None:
+            watcher.stop()
+        db.close_connection()
+        db = None
+        events = None
+
+async def _archive_periodically(db, interval):
+    """Move closed and old jobs to the archive every interval seconds"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            moved = await db.archive_jobs()
+            if moved:
+                print(f"Archived {moved} jobs")
+        except NotImplementedError:
+            print("The storage backend has no archive; archival stopped")
+            return
+        except Exception as e:
+            print(f"Error archiving jobs: {e}")
+
+def _use_change_stream(job_list, source):
+    if source == "change_stream":
+        return True
+    if source == "auto":
+        try:
+            return job_list.is_replica_set()
+        except Exception:
+            return False
+    return False
+
+def _publish_event(event_type, job):
+    """Write listener feeding /jobs/events; encodes on the writing thread"""
+    if events is None:
+        return
+    data = {"id": str(job["_id"])} if event_type in ("deleted", "archived") else _job_response(job)
+    events.publish_threadsafe(job["owner_id"], event_type, _dumps(data))
+
+app = FastAPI(title="Job Application Tracker API", version="1.0.0", lifespan=lifespan)
+
+# Added first so it runs inside the timing middleware, which then includes compression
+app.add_middleware(CompressionMiddleware, compression=compression)
+app.add_middleware(RequestTimingMiddleware, metrics=metrics)
+
+@app.exception_handler(NotImplementedError)
+async def not_implemented(request: Request, exc: NotImplementedError):
+    """Endpoints whose feature the configured storage backend does not have"""
+    return JSONResponse(status_code=501, content={"detail": "Not supported by the configured storage backend"})
+
+@app.exception_handler(Overloaded)
+async def overloaded(request: Request, exc: Overloaded):
+    """Shed by admission control: fail fast so the client backs off instead of timing out"""
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
 
 # enable CORS
 app.add_middleware(
@@ -17,6 +149,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "ETag", "Location", "Retry-After"],
 )
 
 #pydantic models
@@ -47,87 +180,584 @@ class JobResponse(BaseModel):
     salary: Optional[float] = None
     job_url: Optional[str] = None
     remarks: Optional[str] = None
+    updated_at: Optional[datetime] = None
 
-# initialize JobList
-try:
-    db = JobList()
-    print("✓ Database connection successful!")
-except Exception as e:
-    db = None
-    print(f"✗ ERROR initializing database: {e}")
-    print(f"  Make sure you have a .env file with MONGODB_ATLAS_CLUSTER_URI")
-    import traceback
-    traceback.print_exc()
+class JobChanges(BaseModel):
+    jobs: List[JobResponse]
+    deleted: List[str]
+    archived: List[str]
+    next: str
+    has_more: bool
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    if db is None:
-        raise Exception("Failed to connect to MongoDB")
-    yield
-    if db:
-        db.close_connection()
+class JobSearchResult(JobResponse):
+    score: float
+
+class JobBulkUpdate(JobUpdate):
+    id: str
+
+class JobBulkDelete(BaseModel):
+    ids: List[str]
+
+class BulkItemResult(BaseModel):
+    index: int
+    id: Optional[str] = None
+    ok: bool
+    error: Optional[str] = None
+
+class BulkResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+# Largest batch accepted by the /jobs/bulk endpoints
+MAX_BULK_ITEMS = 10000
+
+UPDATE_FIELDS = ["company", "position", "status", "date_applied", "salary", "job_url", "remarks"]
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def _dumps(content):
+    """Encode to JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(content, default=_json_default)
+    return json.dumps(content, default=_json_default, separators=(",", ":")).encode()
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered by _dumps.
+
+    Returning it from an endpoint also skips FastAPI's response_model
+    validation, which is only worth paying for untrusted data.
+    """
+
+    def render(self, content):
+        return _dumps(content)
+
+def _job_response(job, fields=None):
+    """Build the API representation of a job document.
 
+    Documents come from the job store, which already validated them on write and
+    turned _id into a string, so this maps fields without a pydantic model.
+    With fields, only the id and those fields are returned.
+    """
+    salary = job.get("salary")
+    response = {
+        "id": job["_id"],
+        "company": job.get("company"),
+        "position": job.get("position"),
+        "status": job.get("status"),
+        "date_applied": job.get("date_applied"),
+        "salary": float(salary) if salary is not None else None,
+        "job_url": job.get("job_url"),
+        "remarks": job.get("remarks"),
+        "updated_at": job.get("updated_at"),
+    }
+    if fields:
+        return {name: response[name] for name in ("id",) + fields}
+    return response
+
+def _bulk_response(results):
+    """Summarise per-item bulk results"""
+    succeeded = sum(1 for result in results if result["ok"])
+    return BulkResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results)
+
+def _check_bulk_size(items):
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch too large, maximum is {MAX_BULK_ITEMS} items")
+
+def job_filters(
+    job_status: Optional[str] = Query(None, alias="status", description="Comma-separated statuses"),
+    company: Optional[str] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    sort: Optional[str] = Query(None, description="date_applied, company or position; prefix with - for descending"),
+    include_archived: bool = Query(False, description="Also return closed and old jobs moved to the archive"),
+):
+    """Validate the listing query parameters shared by the job list endpoints"""
+    if job_status:
+        invalid = [s for s in job_status.split(",") if s.strip().lower() not in ALLOWED_STATUSES]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid status: {', '.join(invalid)}")
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    try:
+        parse_sort(sort)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {
+        "status": job_status,
+        "company": company,
+        "date_from": date_from,
+        "date_to": date_to,
+        "sort": sort,
+        "include_archived": include_archived,
+    }
+
+def job_fields(
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. company,status; id is always included"),
+):
+    """Validate the fields parameter; the store reads only these fields from the database"""
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def tenant_db(x_tenant_id: Optional[str] = Header(None, description="Tenant whose jobs the request reads and writes")):
+    """The database scoped to the calling tenant.
+
+    The tenant comes from the X-Tenant-ID header, which an authenticating
+    proxy in front of the API must set; it is refused unless
+    JOB_TRUST_TENANT_HEADER says such a proxy is there. Without it requests
+    act for the default tenant, or are rejected when JOB_REQUIRE_TENANT is set.
+    """
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Check server logs.")
+    config = db.job_list.config
+    if x_tenant_id is not None and not config.trust_tenant_header:
+        # Anyone could name another tenant; refuse rather than silently ignore it
+        raise HTTPException(status_code=400, detail="X-Tenant-ID is not accepted; set JOB_TRUST_TENANT_HEADER behind an authenticating proxy")
+    if x_tenant_id is None:
+        if config.require_tenant:
+            raise HTTPException(status_code=400, detail="X-Tenant-ID header is required")
+        return db
+    try:
+        return db.for_tenant(x_tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Job Application Tracker API"}
 
+@app.get("/health")
+async def health():
+    """Liveness: the process is up and serving requests"""
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: startup finished and MongoDB answers a ping"""
+    if db is None or not startup["ready"]:
+        return JSONResponse({"status": "starting"}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    try:
+        await db.ping()
+    except Exception as e:
+        return JSONResponse({"status": "unavailable", "detail": str(e)}, status_code=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return {"status": "ready", "cold_start_seconds": startup["cold_start_seconds"]}
+
+@app.get("/cache/stats", response_model=dict)
+async def cache_stats():
+    """Hit/miss counters of the job listing cache"""
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Check server logs.")
+    return db.job_list.cache.stats()
+
+def _cache_metrics():
+    if db is None:
+        return []
+    stats = db.job_list.cache.stats()
+    return [
+        ("job_cache_hits_total", "counter", "Job cache hits", stats["hits"]),
+        ("job_cache_misses_total", "counter", "Job cache misses", stats["misses"]),
+        ("job_cache_evictions_total", "counter", "Job cache evictions", stats["evictions"]),
+        ("job_cache_invalidations_total", "counter", "Job cache invalidations", stats["invalidations"]),
+        ("job_cache_entries", "gauge", "Entries in the job cache", stats["entries"]),
+        ("job_cache_size", "gauge", "Jobs held in the job cache", stats["size"]),
+    ]
+
+def _startup_metrics():
+    if startup["cold_start_seconds"] is None:
+        return []
+    return [("app_cold_start_seconds", "gauge", "Time from lifespan startup to ready", startup["cold_start_seconds"])]
+
+def _event_metrics():
+    if events is None:
+        return []
+    stats = events.stats()
+    return [
+        ("job_events_subscribers", "gauge", "Open /jobs/events connections", stats["subscribers"]),
+        ("job_events_published_total", "counter", "Job events published", stats["published"]),
+        ("job_events_resets_total", "counter", "Subscribers reset after falling behind", stats["resets"]),
+    ]
+
+def _admission_metrics():
+    if db is None or db.admission is None:
+        return []
+    stats = db.admission.stats()
+    return [
+        ("job_db_in_flight", "gauge", "Database operations running", stats["in_flight"]),
+        ("job_db_queue_depth", "gauge", "Database operations waiting for a slot", stats["queue_depth"]),
+        ("job_db_admitted_total", "counter", "Database operations admitted", stats["admitted"]),
+        ("job_db_queued_total", "counter", "Database operations that had to wait", stats["queued"]),
+        ("job_db_rejected_total", "counter", "Database operations rejected because the queue was full", stats["rejected"]),
+        ("job_db_queue_timeouts_total", "counter", "Database operations rejected after waiting too long", stats["timed_out"]),
+    ]
+
+metrics.add_collector(_cache_metrics)
+metrics.add_collector(_admission_metrics)
+metrics.add_collector(_event_metrics)
+metrics.add_collector(_startup_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, MongoDB and cache metrics in the Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+def _duplicate_job(e: DuplicateJobError):
+    """409 pointing at the job the request duplicates"""
+    headers = {"Location": f"/jobs/{e.job_id}"} if e.job_id else None
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e), headers=headers)
+
 @app.post("/jobs/", response_model=JobResponse, status_code=status.HTTP_201_CREATED)
-async def create_job(job: JobCreate):
-    """Create new job list"""
+async def create_job(
+    job: JobCreate,
+    idempotency_key: Optional[str] = Header(
+        None, min_length=1, max_length=255,
+        description="Client-chosen unique key; a retry with the same key returns the job the first request created",
+    ),
+    db: AsyncJobList = Depends(tenant_db),
+):
+    """Create new job list.
+
+    A job with the same company, position and job URL as an active job is
+    rejected with 409 and a Location header pointing at the existing one.
+    """
     try:
-        job_id = db.create_job(
+        created_job = await db.create_job(
             company=job.company,
             position=job.position,
             status=job.status,
             date_applied=job.date_applied,
             salary=job.salary,
             job_url=job.job_url,
-            remarks=job.remarks
+            remarks=job.remarks,
+            idempotency_key=idempotency_key,
         )
-        if job_id is None:
+        if created_job is None:
             raise HTTPException(status_code=400, detail="Failed to create job - validation error or database issue")
-        
-        # Get the created job to return it
-        created_job = db.jobs_collection.find_one({"_id": ObjectId(job_id)})
-        return JobResponse(
-            id=job_id,
-            company=created_job["company"],
-            position=created_job["position"],
-            status=created_job["status"],
-            date_applied=created_job["date_applied"],
-            salary=created_job.get("salary"),
-            job_url=created_job.get("job_url"),
-            remarks=created_job.get("remarks")
-        )
+        return FastJSONResponse(_job_response(created_job), status_code=status.HTTP_201_CREATED)
+    except DuplicateJobError as e:
+        raise _duplicate_job(e)
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except (HTTPException, Overloaded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error creating job: {e}")
     
+def _etag_matches(if_none_match, etag):
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
 @app.get("/jobs/", response_model=List[JobResponse])
-async def get_all_jobs():
-    """Get all job lists"""
-    if db is None:
-        raise HTTPException(status_code=503, detail="Database not connected. Check server logs.")
+async def get_all_jobs(
+    request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after: Optional[str] = None,
+    filters: dict = Depends(job_filters),
+    fields: Optional[tuple] = Depends(job_fields),
+    db: AsyncJobList = Depends(tenant_db),
+):
+    """Get all job lists, or one page of them when limit/after is given.
+
+    Filtering, sorting and the fields projection run in Mongo. The cursor
+    for the next page is returned in the X-Next-Cursor header. The ETag is the data version, so
+    a client sending it back in If-None-Match gets 304 until a job changes.
+    """
     
     try:
-        jobs = db.get_all_jobs()
-        return [
-            JobResponse(
-                id=job["_id"],
-                company=job["company"],
-                position=job["position"],
-                status=job["status"],
-                date_applied=job["date_applied"],
-                salary=job.get("salary"),
-                job_url=job.get("job_url"),
-                remarks=job.get("remarks")
-            ) for job in jobs
-        ]
+        # Read before the jobs: a write in between only makes the tag older.
+        # The store checks its cache against the same read.
+        version = await db.data_version()
+        etag = f'W/"{version}"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        headers = {"ETag": etag}
+        if limit is None and after is None:
+            jobs = await db.get_all_jobs(fields=fields, data_version=version, **filters)
+        else:
+            if after is not None:
+                try:
+                    decode_cursor(after)
+                except ValueError:
+                    raise HTTPException(status_code=400, detail="Invalid cursor")
+            page = await db.get_jobs_page(limit=limit or 100, after=after, fields=fields, data_version=version, **filters)
+            if page is None:
+                raise HTTPException(status_code=500, detail="Error retrieving jobs")
+            jobs, next_cursor = page
+            if next_cursor:
+                headers["X-Next-Cursor"] = next_cursor
+        return FastJSONResponse([_job_response(job, fields) for job in jobs], headers=headers)
+    except (HTTPException, Overloaded):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving jobs: {e}")
     
+@app.get("/jobs/changes", response_model=JobChanges)
+async def get_changes(
+    since: str = Query(..., description="ISO datetime, or the next token of the previous response"),
+    limit: int = Query(1000, ge=1, le=10000),
+    db: AsyncJobList = Depends(tenant_db),
+):
+    """Jobs created, updated, deleted or archived since a point in time.
+
+    Archived jobs moved out of the active list (see include_archived). Changes near the end of the window are repeated on the next call, so
+    apply them by ID. 410 means since is older than the deletion history
+    and the client has to reload the full list.
+    """
+    try:
+        parse_since(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    changes = await db.get_changes(since, limit)
+    if changes is False:
+        raise HTTPException(status_code=410, detail="since is too old, reload all jobs")
+    if changes is None:
+        raise HTTPException(status_code=500, detail="Error retrieving changes")
+    changes["jobs"] = [_job_response(job) for job in changes["jobs"]]
+    return FastJSONResponse(changes)
+
+@app.get("/jobs/events")
+async def job_events(db: AsyncJobList = Depends(tenant_db)):
+    """Server-Sent Events stream of created, updated, deleted and archived jobs.
+
+    Each event's data is the job (or {"id"} for deletions and archivals). A "reset" event
+    means the client fell too far behind and events were dropped; it should
+    catch up with /jobs/changes.
+    """
+    if events is None:
+        raise HTTPException(status_code=503, detail="Database not connected. Check server logs.")
+    if events.full:
+        raise HTTPException(status_code=503, detail="Too many subscribers", headers={"Retry-After": "30"})
+    return StreamingResponse(
+        events.stream(db.job_list.tenant_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/jobs/stats", response_model=dict)
+async def get_stats(db: AsyncJobList = Depends(tenant_db)):
+    """Counts by status, applications per week/month, salary range and the status funnel"""
+    try:
+        stats = await db.get_stats()
+        if stats is None:
+            raise HTTPException(status_code=500, detail="Error computing stats")
+        return stats
+    except (HTTPException, Overloaded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error computing stats: {e}")
+
+@app.get("/jobs/stats/counts", response_model=dict)
+async def get_status_counts(db: AsyncJobList = Depends(tenant_db)):
+    """Total and per-status counts, read from the counters document"""
+    try:
+        return await db.get_status_counts()
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error counting jobs: {e}")
+
+@app.get("/jobs/search", response_model=List[JobSearchResult])
+async def search_jobs(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    include_archived: bool = Query(False, description="Also search closed and old jobs moved to the archive"),
+    db: AsyncJobList = Depends(tenant_db),
+):
+    """Ranked prefix search over company, position and remarks.
+
+    The offset of the next page is returned in the X-Next-Offset header.
+    """
+    try:
+        page = await db.search_jobs(q, limit=limit, offset=offset, include_archived=include_archived)
+        if page is None:
+            raise HTTPException(status_code=500, detail="Error searching jobs")
+        jobs, next_offset = page
+        headers = {"X-Next-Offset": str(next_offset)} if next_offset is not None else {}
+        return FastJSONResponse([{**_job_response(job), "score": job["score"]} for job in jobs], headers=headers)
+    except (HTTPException, Overloaded):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching jobs: {e}")
+
+def _ndjson_chunks(jobs, fields=None, chunk_size=64 * 1024):
+    """Encode jobs as NDJSON, yielding about chunk_size bytes at a time rather than a send per job"""
+    lines, size = [], 0
+    for job in jobs:
+        line = _dumps(_job_response(job, fields)) + b"\n"
+        lines.append(line)
+        size += len(line)
+        if size >= chunk_size:
+            yield b"".join(lines)
+            lines, size = [], 0
+    if lines:
+        yield b"".join(lines)
+
+async def _job_batches(db, **filters):
+    """Batches of matching jobs, each read from the database as its own admitted call.
+
+    The first is read before the response starts, so an overloaded database
+    is answered with a 503 rather than a cut-off body.
+    """
+    batches = db.iter_job_batches(**filters)
+    try:
+        first = [await batches.__anext__()]
+    except StopAsyncIteration:
+        first = []
+
+    async def read():
+        for jobs in first:
+            yield jobs
+        async for jobs in batches:
+            yield jobs
+    return read()
+
+async def _encode_batches(batches, encode, header=b""):
+    if header:
+        yield header
+    async for jobs in batches:
+        for chunk in encode(jobs):
+            if chunk:
+                yield chunk
+
+@app.get("/jobs/stream")
+async def stream_jobs(
+    filters: dict = Depends(job_filters),
+    fields: Optional[tuple] = Depends(job_fields),
+    db: AsyncJobList = Depends(tenant_db),
+):
+    """Stream matching jobs as NDJSON while the database cursor is being read"""
+    batches = await _job_batches(db, fields=fields, **filters)
+    return StreamingResponse(_encode_batches(batches, partial(_ndjson_chunks, fields=fields)), media_type="application/x-ndjson")
+
+@app.get("/jobs/export")
+async def export_jobs(
+    file_format: str = Query("csv", alias="format", description="csv or ndjson"),
+    filters: dict = Depends(job_filters),
+    db: AsyncJobList = Depends(tenant_db),
+):
+    """Download matching jobs as a CSV or NDJSON file, streamed from the database cursor"""
+    if file_format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Invalid format: {file_format}. Allowed: {', '.join(FORMATS)}")
+    batches = await _job_batches(db, **filters)
+    if file_format == "csv":
+        body = _encode_batches(batches, partial(csv_chunks, header=False), next(csv_chunks([])))
+    else:
+        body = _encode_batches(batches, _ndjson_chunks)
+    return StreamingResponse(
+        body,
+        media_type=FORMATS[file_format],
+        headers={"Content-Disposition": f'attachment; filename="jobs.{file_format}"'},
+    )
+
+def _upload_format(file_format, content_type):
+    if file_format:
+        return file_format
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+@app.post("/jobs/import")
+async def import_jobs(
+    request: Request,
+    file_format: Optional[str] = Query(None, alias="format", description="csv or ndjson; defaults to the Content-Type"),
+    batch_size: int = Query(1000, ge=1, le=MAX_BULK_ITEMS),
+    db: AsyncJobList = Depends(tenant_db),
+):
+    """Import jobs from a CSV or NDJSON request body.
+
+    The body is parsed while it is being received and inserted in batches,
+    so the upload size is not limited by memory. Rows are validated like
+    POST /jobs/; failures are reported with their line number in the file
+    and do not stop the import.
+    """
+    file_format = _upload_format(file_format, request.headers.get("content-type"))
+    if file_format not in FORMATS:
+        raise HTTPException(status_code=400, detail="Send format=csv or format=ndjson, or a text/csv or application/x-ndjson body")
+
+    loop = asyncio.get_running_loop()
+    chunks = request.stream()
+    # The body is read on the import thread outside any admission slot; only
+    # the insert batches are admitted
+
+    async def next_chunk():
+        try:
+            return await chunks.__anext__()
+        except StopAsyncIteration:
+            return None
+
+    def read_chunks():
+        # Runs on the import thread, pulling the body from the event loop
+        while True:
+            chunk = asyncio.run_coroutine_threadsafe(next_chunk(), loop).result()
+            if chunk is None:
+                return
+            if chunk:
+                yield chunk
+
+    try:
+        return await db.import_jobs(PARSERS[file_format](iter_lines(read_chunks())), batch_size)
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error importing jobs: {e}")
+
+@app.post("/jobs/bulk", response_model=BulkResponse)
+async def create_jobs(jobs: List[JobCreate], db: AsyncJobList = Depends(tenant_db)):
+    """Create a batch of jobs with a single insert"""
+    _check_bulk_size(jobs)
+    try:
+        results = await db.create_jobs([
+            {field: getattr(job, field) for field in UPDATE_FIELDS} for job in jobs
+        ])
+        return _bulk_response(results)
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error creating jobs: {e}")
+
+@app.put("/jobs/bulk", response_model=BulkResponse)
+async def update_jobs(jobs: List[JobBulkUpdate], db: AsyncJobList = Depends(tenant_db)):
+    """Update a batch of jobs with a single bulk write"""
+    _check_bulk_size(jobs)
+    try:
+        results = await db.update_jobs([
+            {"id": job.id, **{field: getattr(job, field) for field in UPDATE_FIELDS}} for job in jobs
+        ])
+        return _bulk_response(results)
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error updating jobs: {e}")
+
+@app.delete("/jobs/bulk", response_model=BulkResponse)
+async def delete_jobs(batch: JobBulkDelete, db: AsyncJobList = Depends(tenant_db)):
+    """Delete a batch of jobs with a single delete"""
+    _check_bulk_size(batch.ids)
+    try:
+        results = await db.delete_jobs(batch.ids)
+        return _bulk_response(results)
+    except Overloaded:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error deleting jobs: {e}")
+
 @app.put("/jobs/{job_id}", response_model=JobResponse)
-async def update_job(job_id: str, job: JobUpdate):
+async def update_job(job_id: str, job: JobUpdate, db: AsyncJobList = Depends(tenant_db)):
     """Update job by ID"""
     try:
         if not ObjectId.is_valid(job_id):
@@ -135,15 +765,7 @@ async def update_job(job_id: str, job: JobUpdate):
                 status_code=400, 
                 detail="Invalid job ID format")
         
-        # Check if job exists
-        existing_job = db.jobs_collection.find_one({"_id": ObjectId(job_id)})
-        if not existing_job:
-            raise HTTPException(
-                status_code=404, 
-                detail="Job not found"
-            )
-        
-        updated_job = db.update_job(
+        updated_job = await db.update_job(
             job_id=job_id,
             company=job.company,
             position=job.position,
@@ -153,26 +775,23 @@ async def update_job(job_id: str, job: JobUpdate):
             job_url=job.job_url,
             remarks=job.remarks
         )
-        if updated_job is None:
-            raise HTTPException(status_code=500, detail="Failed to update job")
-        else:
-            return JobResponse(
-                id=job_id,
-                company=updated_job["company"],
-                position=updated_job["position"],
-                status=updated_job["status"],
-                date_applied=updated_job["date_applied"],
-                salary=updated_job.get("salary"),
-                job_url=updated_job.get("job_url"),
-                remarks=updated_job.get("remarks")
+        if updated_job is False:
+            raise HTTPException(
+                status_code=404, 
+                detail="Job not found"
             )
-    except HTTPException:
+        if updated_job is None:
+            raise HTTPException(status_code=400, detail="Failed to update job - validation error or database issue")
+        return FastJSONResponse(_job_response(updated_job))
+    except DuplicateJobError as e:
+        raise _duplicate_job(e)
+    except (HTTPException, Overloaded):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error updating job: {e}")
     
 @app.delete("/jobs/{job_id}", response_model=dict)
-async def delete_job(job_id: str):
+async def delete_job(job_id: str, db: AsyncJobList = Depends(tenant_db)):
     """Delete job by ID"""
     try:
         if not ObjectId.is_valid(job_id):
@@ -180,24 +799,34 @@ async def delete_job(job_id: str):
                 status_code=400, 
                 detail="Invalid job ID format")
         
-        # Check if user exists
-        job = db.jobs_collection.find_one({"_id": ObjectId(job_id)})
-        if not job:
+        success = await db.delete_job(job_id)
+        if success:
+            return {"message": "Job deleted successfully"}
+        elif success is False:
             raise HTTPException(
                 status_code=404, 
                 detail="Job not found")
-        
-        success = db.delete_job(job_id)
-        if success:
-            return {"message": "Job deleted successfully"}
         else:
             raise HTTPException(status_code=500, detail="Failed to delete job")
-    except HTTPException:
+    except (HTTPException, Overloaded):
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error deleting job: {e}")
     
 
 if __name__ == "__main__":
+    import argparse
+    import os
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+
+    parser = argparse.ArgumentParser(description="Run the Job Application Tracker API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "1")),
+                        help="Worker processes; each opens its own MongoClient in the lifespan")
+    args = parser.parse_args()
+    if args.workers > 1:
+        # Workers import the app by name, so nothing created here crosses the fork
+        uvicorn.run("JobApi:app", host=args.host, port=args.port, workers=args.workers)
+    else:
+        uvicorn.run(app, host=args.host, port=args.port)
\ No newline at end of file
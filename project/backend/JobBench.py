@@ -0,0 +1,782 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pymongo import MongoClient, monitoring
+from collections import Counter
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+# Benchmark harness for JobList and the JobApi endpoints.
+#
+#   python JobBench.py --jobs 1000,100000 --output bench.json
+#   python JobBench.py --jobs 100000 --baseline bench.json
+#   python JobBench.py --diff old.json new.json
+#   python JobBench.py --jobs 100000 --plans-only
+#
+# Without --uri a throwaway mongod is started from PATH. Results are written
+# as JSON so two runs (e.g. two commits) can be diffed for regressions.
+
+BENCH_DB_NAME = "job_list_bench"
+
+COMPANIES = [
+    "Acme", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises",
+    "Wonka", "Cyberdyne", "Soylent", "Tyrell", "Aperture", "Black Mesa", "Vandelay", "Pied Piper",
+]
+POSITIONS = [
+    "Backend Engineer", "Frontend Engineer", "Full Stack Developer", "Data Engineer", "DevOps Engineer",
+    "Site Reliability Engineer", "Product Manager", "QA Engineer", "Mobile Developer", "Data Scientist",
+]
+STATUS_WEIGHTS = {"applied": 60, "interviewing": 20, "offered": 5, "rejected": 15}
+REMARKS = [
+    None, "Referral from a friend", "Recruiter reached out on LinkedIn", "Remote friendly",
+    "Take-home assignment pending", "Applied in March", "Hybrid, 3 days on site", "Follow up next week",
+]
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands sent by every client in the process"""
+
+    def __init__(self):
+        self.commands = Counter()
+
+    def reset(self):
+        self.commands = Counter()
+
+    def started(self, event):
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+command_counter = CommandCounter()
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def local_mongod():
+    """Start a throwaway mongod on a temporary data directory"""
+    mongod = shutil.which("mongod")
+    if not mongod:
+        raise SystemExit("mongod not found on PATH; install MongoDB or pass --uri")
+    dbpath = tempfile.mkdtemp(prefix="jobbench-")
+    port = _free_port()
+    proc = subprocess.Popen(
+        [mongod, "--dbpath", dbpath, "--port", str(port), "--bind_ip", "127.0.0.1", "--quiet"],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    uri = f"mongodb://127.0.0.1:{port}"
+    try:
+        client = MongoClient(uri, serverSelectionTimeoutMS=500)
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                client.admin.command("ping")
+                break
+            except Exception:
+                if proc.poll() is not None or time.monotonic() > deadline:
+                    raise SystemExit("mongod failed to start")
+                time.sleep(0.2)
+        client.close()
+        yield uri
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+        shutil.rmtree(dbpath, ignore_errors=True)
+
+
+def synthetic_jobs(count, seed=42):
+    """Yield reproducible create_job arguments; job_url is unique per (seed, i)"""
+    rng = random.Random(seed)
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        company = rng.choice(COMPANIES)
+        yield {
+            "company": company,
+            "position": rng.choice(POSITIONS),
+            "status": rng.choices(statuses, weights)[0],
+            "date_applied": start + timedelta(days=rng.randrange(730)),
+            "salary": rng.choice([None, rng.randrange(3000, 20000, 500)]),
+            "job_url": f"https://jobs.example.com/{company.lower().replace(' ', '-')}/{seed}-{i}",
+            "remarks": rng.choice(REMARKS),
+        }
+
+
+def seed_jobs(job_list, count, batch_size=5000):
+    """Insert count synthetic jobs through create_jobs; returns the insert rate"""
+    start = time.perf_counter()
+    batch = []
+    for job in synthetic_jobs(count):
+        batch.append(job)
+        if len(batch) == batch_size:
+            job_list.create_jobs(batch)
+            batch = []
+    if batch:
+        job_list.create_jobs(batch)
+    elapsed = time.perf_counter() - start
+    return {"jobs": count, "seconds": round(elapsed, 3), "jobs_per_second": round(count / elapsed, 1)}
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Throughput and latency percentiles (milliseconds) for one benchmark"""
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    def percentile(q):
+        return round(latencies[min(count - 1, int(q * count))] * 1000, 3)
+
+    return {
+        "count": count,
+        "errors": errors,
+        "throughput": round(count / elapsed, 1) if elapsed else 0.0,
+        "mean_ms": round(sum(latencies) / count * 1000, 3),
+        "p50_ms": percentile(0.50),
+        "p90_ms": percentile(0.90),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def bench_call(fn, iterations, warmup=2):
+    """Time a synchronous callable.
+
+    fn receives a call number that is unique across warm-up and timed calls,
+    so it needs iterations + warmup distinct inputs.
+    """
+    for i in range(warmup):
+        fn(i)
+    latencies = []
+    start = time.perf_counter()
+    for i in range(warmup, warmup + iterations):
+        call_start = time.perf_counter()
+        fn(i)
+        latencies.append(time.perf_counter() - call_start)
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def bench_job_list(job_list, count, iterations):
+    """Benchmark every JobList method directly, without the API"""
+    sample_ids = [job["_id"] for job in job_list.get_jobs_page(limit=1000)[0]]
+    full_scan_iterations = max(3, min(iterations, 100000 // count))
+    results = {}
+
+    def run(name, fn, n=iterations):
+        print(f"  JobList.{name}")
+        results[name] = bench_call(fn, n)
+
+    run("get_all_jobs", lambda i: job_list.get_all_jobs(), full_scan_iterations)
+    run("get_all_jobs[status]", lambda i: job_list.get_all_jobs(status="offered"), full_scan_iterations)
+    run("get_jobs_page", lambda i: job_list.get_jobs_page(limit=50))
+    run("get_jobs_page[status,company]", lambda i: job_list.get_jobs_page(limit=50, status="applied", company="Acme"))
+    run("get_jobs_page[sort=company]", lambda i: job_list.get_jobs_page(limit=50, sort="company"))
+    run("get_jobs_page[include_archived]", lambda i: job_list.get_jobs_page(limit=50, include_archived=True))
+    run("get_job", lambda i: job_list.get_job(sample_ids[i % len(sample_ids)]))
+    run("search_jobs", lambda i: job_list.search_jobs("back eng"))
+    run("total_application", lambda i: job_list.total_application())
+    run("get_status_counts", lambda i: job_list.get_status_counts())
+    run("get_stats", lambda i: job_list.get_stats(), full_scan_iterations)
+
+    new_jobs = list(synthetic_jobs(iterations + 2, seed=7))
+    created = []
+    run("create_job", lambda i: created.append(job_list.create_job(**new_jobs[i])["_id"]))
+    run("update_job", lambda i: job_list.update_job(created[i % len(created)], status="interviewing"))
+    run("delete_job", lambda i: job_list.delete_job(created.pop()), len(created) - 2)
+
+    bulk_iterations = max(3, iterations // 20)
+    batches = [list(synthetic_jobs(100, seed=1000 + i)) for i in range(bulk_iterations + 2)]
+    bulk_ids = []
+
+    def create_batch(i):
+        bulk_ids.append([result["id"] for result in job_list.create_jobs(batches[i])])
+
+    run("create_jobs[100]", create_batch, bulk_iterations)
+    run("update_jobs[100]", lambda i: job_list.update_jobs(
+        [{"id": job_id, "status": "rejected"} for job_id in bulk_ids[i % len(bulk_ids)]]
+    ), bulk_iterations)
+    run("delete_jobs[100]", lambda i: job_list.delete_jobs(bulk_ids.pop()), len(bulk_ids) - 2)
+    return results
+
+
+def bench_tenants(job_list, tenant_counts, jobs_per_tenant, iterations):
+    """Per-tenant latency as the number of tenants sharing the collection grows.
+
+    Tenants are added incrementally, each with jobs_per_tenant jobs, and the
+    reads are always made for the first tenant. With owner_id-leading indexes
+    they should stay flat however many tenants there are.
+    """
+    results = {}
+    seeded = 0
+    for tenant_count in sorted(tenant_counts):
+        for t in range(seeded, tenant_count):
+            tenant = job_list.for_tenant(f"bench-{t}")
+            batch = list(synthetic_jobs(jobs_per_tenant, seed=100 + t))
+            for start in range(0, len(batch), 5000):
+                tenant.create_jobs(batch[start:start + 5000])
+        seeded = max(seeded, tenant_count)
+        print(f"== {tenant_count} tenants x {jobs_per_tenant} jobs")
+        tenant = job_list.for_tenant("bench-0")
+        sample_ids = [job["_id"] for job in tenant.get_jobs_page(limit=1000)[0]]
+        result = {}
+        for name, fn in (
+            ("get_jobs_page", lambda i: tenant.get_jobs_page(limit=50)),
+            ("get_jobs_page[status]", lambda i: tenant.get_jobs_page(limit=50, status="applied")),
+            ("get_job", lambda i: tenant.get_job(sample_ids[i % len(sample_ids)])),
+            ("search_jobs", lambda i: tenant.search_jobs("back eng")),
+            ("get_status_counts", lambda i: tenant.get_status_counts()),
+        ):
+            print(f"  JobList.{name}")
+            result[name] = bench_call(fn, iterations)
+        results[str(tenant_count)] = result
+    return results
+
+
+def api_requests(sample_ids):
+    """Request factories per endpoint: name -> (fn(i) -> (method, url, kwargs), full_scan)"""
+    new_job_seeds = itertools.count(2000)
+
+    def new_job():
+        job = next(synthetic_jobs(1, seed=next(new_job_seeds)))
+        job["date_applied"] = job["date_applied"].isoformat()
+        return job
+
+    def create(i):
+        return "POST", "/jobs/", {"json": new_job()}
+
+    return {
+        "GET /jobs/": (lambda i: ("GET", "/jobs/", {}), True),
+        "GET /jobs/?limit=50": (lambda i: ("GET", "/jobs/", {"params": {"limit": 50}}), False),
+        "GET /jobs/?status&company&limit=50": (
+            lambda i: ("GET", "/jobs/", {"params": {"status": "applied", "company": "Acme", "limit": 50}}), False
+        ),
+        "GET /jobs/search": (lambda i: ("GET", "/jobs/search", {"params": {"q": "back eng"}}), False),
+        "GET /jobs/stats": (lambda i: ("GET", "/jobs/stats", {}), True),
+        "GET /jobs/stats/counts": (lambda i: ("GET", "/jobs/stats/counts", {}), False),
+        "GET /jobs/stream": (lambda i: ("GET", "/jobs/stream", {}), True),
+        "POST /jobs/": (create, False),
+        "PUT /jobs/{id}": (
+            lambda i: ("PUT", f"/jobs/{sample_ids[i % len(sample_ids)]}", {"json": {"status": "interviewing"}}), False
+        ),
+        "POST /jobs/bulk": (lambda i: ("POST", "/jobs/bulk", {"json": [new_job() for _ in range(100)]}), False),
+    }
+
+
+async def run_load(client, make_request, total, concurrency):
+    """Send total requests from concurrency workers and summarize latencies"""
+    latencies = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in remaining:
+            method, url, kwargs = make_request(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def bench_api(app, job_list, count, iterations, concurrency_levels):
+    """Benchmark the endpoints in process through httpx's ASGI transport"""
+    try:
+        import httpx
+    except ImportError:
+        raise SystemExit("The API benchmarks need httpx: pip install httpx")
+
+    # Throwaway jobs for the write endpoints, so reads see a stable dataset
+    sample_ids = [result["id"] for result in job_list.create_jobs(list(synthetic_jobs(200, seed=9)))]
+    full_scan_iterations = max(3, min(iterations, 100000 // count))
+    results, commands = {}, {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, (make_request, full_scan) in api_requests(sample_ids).items():
+            print(f"  {name}")
+            command_counter.reset()
+            method, url, kwargs = make_request(0)
+            await client.request(method, url, **kwargs)
+            commands[name] = dict(command_counter.commands)
+
+            results[name] = {}
+            total = full_scan_iterations if full_scan else iterations
+            # Full scans at high concurrency only measure the disk; keep them serial
+            for concurrency in ([1] if full_scan else concurrency_levels):
+                results[name][f"c{concurrency}"] = await run_load(
+                    client, make_request, max(total, concurrency), concurrency
+                )
+    return results, commands
+
+
+async def bench_wire(app, count, iterations):
+    """Bytes on the wire and latency of the list endpoints, per fields= and Accept-Encoding"""
+    import httpx
+    from JobCompression import brotli
+
+    full_scan_iterations = max(3, min(iterations, 100000 // count))
+    endpoints = {"page": ({"limit": 100}, iterations), "all": ({}, full_scan_iterations)}
+    fieldsets = {"all_fields": None, "sparse": "company,position,status,date_applied"}
+    # httpx can only decode br with the brotli package installed
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    results = {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for endpoint, (params, total) in endpoints.items():
+            for fieldset, fields in fieldsets.items():
+                query = {**params, "fields": fields} if fields else params
+                for encoding in encodings:
+                    name = f"GET /jobs/ {endpoint} {fieldset} {encoding}"
+                    print(f"  {name}")
+                    headers = {"Accept-Encoding": encoding}
+                    latencies, wire_bytes = [], 0
+                    start = time.perf_counter()
+                    for _ in range(total):
+                        call_start = time.perf_counter()
+                        response = await client.get("/jobs/", params=query, headers=headers)
+                        latencies.append(time.perf_counter() - call_start)
+                        wire_bytes = response.num_bytes_downloaded
+                    result = summarize(latencies, time.perf_counter() - start)
+                    result["bytes"] = wire_bytes
+                    result["decoded_bytes"] = len(response.content)
+                    results[name] = result
+    return results
+
+
+@contextmanager
+def api_server(workers):
+    """Run JobApi.py with the given number of worker processes on a free port"""
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "JobApi.py", "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        import httpx
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if proc.poll() is not None or time.monotonic() > deadline:
+                raise SystemExit(f"API with {workers} workers failed to start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+
+async def bench_workers(worker_counts, iterations, concurrency):
+    """Throughput of a few endpoints over real HTTP as the worker count grows.
+
+    The load comes from this single process, so on small machines the client
+    can become the bottleneck before the server does; compare the scaling
+    factor between worker counts rather than the absolute numbers.
+    """
+    import httpx
+
+    requests = {
+        "GET /jobs/?limit=50": lambda i: ("GET", "/jobs/", {"params": {"limit": 50}}),
+        "GET /jobs/stats/counts": lambda i: ("GET", "/jobs/stats/counts", {}),
+        "GET /jobs/search": lambda i: ("GET", "/jobs/search", {"params": {"q": "back eng"}}),
+    }
+    results = {}
+    for workers in worker_counts:
+        print(f"  {workers} workers")
+        with api_server(workers) as base_url:
+            limits = httpx.Limits(max_connections=concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+                results[f"w{workers}"] = {}
+                for name, make_request in requests.items():
+                    # Let every worker open its connections before timing
+                    await run_load(client, make_request, concurrency * 2, concurrency)
+                    results[f"w{workers}"][name] = await run_load(
+                        client, make_request, max(iterations, concurrency), concurrency
+                    )
+    return results
+
+
+COLD_START_SCRIPT = """
+import asyncio, json, time
+started = time.perf_counter()
+import JobApi
+imported = time.perf_counter()
+
+async def start():
+    async with JobApi.lifespan(JobApi.app):
+        return time.perf_counter()
+
+ready = asyncio.run(start())
+print(json.dumps({"import": imported - started, "startup": ready - imported, "total": ready - started}))
+"""
+
+
+def bench_cold_start(runs):
+    """Import JobApi and run its lifespan startup in fresh interpreters"""
+    timings = {"import": [], "startup": [], "total": []}
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", COLD_START_SCRIPT], cwd=os.path.dirname(os.path.abspath(__file__)), text=True
+        )
+        for name, seconds in json.loads(output.strip().splitlines()[-1]).items():
+            timings[name].append(seconds)
+    return {name: summarize(values, sum(values)) for name, values in timings.items()}
+
+
+def bench_serialization(sizes):
+    """Old (pydantic model + response_model validation) vs new (plain dict + fast encoder) response path"""
+    import JobApi
+    from bson.objectid import ObjectId
+    from fastapi.encoders import jsonable_encoder
+
+    revalidate = getattr(JobApi.JobResponse, "model_validate", None) or JobApi.JobResponse.validate
+
+    def old_path(docs):
+        models = [
+            JobApi.JobResponse(
+                id=job["_id"],
+                company=job["company"],
+                position=job["position"],
+                status=job["status"],
+                date_applied=job["date_applied"],
+                salary=job.get("salary"),
+                job_url=job.get("job_url"),
+                remarks=job.get("remarks"),
+            ) for job in docs
+        ]
+        validated = [revalidate(model) for model in models]
+        return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode()
+
+    def new_path(docs):
+        return JobApi._dumps([JobApi._job_response(job) for job in docs])
+
+    results = {}
+    for size in sizes:
+        docs = [dict(job, _id=str(ObjectId())) for job in synthetic_jobs(size, seed=size)]
+        results[str(size)] = {}
+        for name, path in (("old", old_path), ("new", new_path)):
+            best = min(_timed(path, docs) for _ in range(3))
+            results[str(size)][name] = {"seconds": round(best, 4), "docs_per_second": round(size / best, 1)}
+        results[str(size)]["speedup"] = round(results[str(size)]["old"]["seconds"] / results[str(size)]["new"]["seconds"], 2)
+        print(f"  serialization {size}: {results[str(size)]['speedup']}x")
+    return results
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+
+def _plan_stages(plan):
+    """Flatten the stage names of a winning query plan"""
+    plan = plan.get("queryPlan", plan)
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+# get_jobs_page arguments whose queries must be served by an index
+PLAN_LISTINGS = {
+    "default sort": {},
+    "status + date sort": {"status": "applied"},
+    "statuses + date sort": {"status": "applied,interviewing"},
+    "company + date sort": {"company": "Acme"},
+    "date range": {"date_from": "2024-06-01", "date_to": "2024-06-30"},
+    "sort by company": {"sort": "company"},
+    "sort by position": {"sort": "-position"},
+}
+
+
+def explain_plans(job_list):
+    """Explain the queries JobList itself builds for listings, next pages and search.
+
+    Each result has index_scan, which is False when a plan reads the
+    collection instead of an index; failed_plans() collects those.
+    """
+    from JobStore import _tokenize
+
+    queries = {}
+    for name, arguments in PLAN_LISTINGS.items():
+        queries[name] = job_list._page_query(**arguments)
+        # The next page adds the keyset condition on the cursor
+        _, after = job_list.get_jobs_page(limit=1, **arguments) or ([], None)
+        if after:
+            queries[f"{name}, next page"] = job_list._page_query(after=after, **arguments)
+    queries["search prefix"] = (job_list._search_query(_tokenize("back eng")), None, None)
+
+    results = {}
+    for name, (query, field, direction) in queries.items():
+        if field is None:
+            cursor = job_list.jobs_collection.find(query).limit(50)
+        else:
+            cursor = job_list._find_sorted(query, field, direction, limit=50)
+        explain = cursor.explain()
+        stages = _plan_stages(explain["queryPlanner"]["winningPlan"])
+        results[name] = {
+            "stages": stages,
+            "index_scan": "IXSCAN" in stages and "COLLSCAN" not in stages,
+            "docs_examined": explain.get("executionStats", {}).get("totalDocsExamined"),
+        }
+        print(f"  plan {name}: {' <- '.join(stages)}")
+    return results
+
+
+def failed_plans(output):
+    """Names of the explained queries that were not served by an index"""
+    return [
+        f"{size}: {name}"
+        for size, result in output["results"].items()
+        if isinstance(result, dict)
+        for name, plan in result.get("plans", {}).items()
+        if not plan["index_scan"]
+    ]
+
+
+def failed_requests(output):
+    """Names of the load benchmarks where any request failed, with the failure count"""
+    failed = []
+
+    def walk(result, path):
+        if isinstance(result, dict):
+            if result.get("errors"):
+                failed.append((path, result["errors"]))
+            for key, value in result.items():
+                walk(value, f"{path} {key}".strip())
+
+    walk(output["results"], "")
+    return failed
+
+
+def compare(baseline, current, threshold):
+    """Print p50/p99 changes between two result files; returns the regressions"""
+    regressions = []
+
+    def walk(old, new, path):
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            return
+        for key, value in new.items():
+            if key in ("p50_ms", "p99_ms") and key in old and old[key]:
+                change = (value - old[key]) / old[key]
+                marker = "  REGRESSION" if change > threshold else ""
+                print(f"{'/'.join(path)} {key}: {old[key]:.3f} -> {value:.3f} ({change:+.1%}){marker}")
+                if marker:
+                    regressions.append(("/".join(path), key, change))
+            elif key in old:
+                walk(old[key], value, path + [key])
+
+    walk(baseline.get("results", {}), current.get("results", {}), [])
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def run_suite(uri, sizes, iterations, concurrency_levels, serialization_sizes, keep_cache, cold_start_runs, worker_counts,
+              tenant_counts=(), jobs_per_tenant=1000, plans_only=False):
+    # JobList reads its settings from the environment; subprocesses inherit them
+    os.environ["MONGODB_ATLAS_CLUSTER_URI"] = uri
+    os.environ["MONGODB_DB_NAME"] = BENCH_DB_NAME
+    if not keep_cache:
+        os.environ["JOB_CACHE_TTL"] = "0"
+    monitoring.register(command_counter)
+
+    from JobList import JobList, AsyncJobList
+    import JobApi
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "concurrency": concurrency_levels,
+            "cache": keep_cache,
+        },
+        "results": {},
+    }
+    for count in sizes:
+        print(f"== {count} jobs")
+        job_list = JobList()
+        job_list.client.drop_database(BENCH_DB_NAME)
+        job_list.close_connection()
+        job_list = JobList()
+        output["meta"]["mongo_version"] = job_list.client.server_info()["version"]
+
+        result = {"seed": seed_jobs(job_list, count)}
+        print(f"  seeded {count} jobs in {result['seed']['seconds']}s")
+        result["plans"] = explain_plans(job_list)
+        if plans_only:
+            job_list.close_connection()
+            output["results"][str(count)] = result
+            continue
+        result["joblist"] = bench_job_list(job_list, count, iterations)
+
+        JobApi.db = AsyncJobList(job_list)
+        result["api"], result["commands"] = asyncio.run(
+            bench_api(JobApi.app, job_list, count, iterations, concurrency_levels)
+        )
+        result["wire"] = asyncio.run(bench_wire(JobApi.app, count, iterations))
+        JobApi.db.close_connection()
+        JobApi.db = None
+        output["results"][str(count)] = result
+
+    if plans_only:
+        return output
+    if tenant_counts:
+        # The tenants are added next to the last dataset, which stays in the default tenant
+        job_list = JobList()
+        output["results"]["tenants"] = bench_tenants(job_list, tenant_counts, jobs_per_tenant, iterations)
+        job_list.close_connection()
+    if worker_counts:
+        # Against the last dataset; the servers inherit the environment set above
+        job_list = JobList()
+        output["results"]["workers"] = asyncio.run(
+            bench_workers(worker_counts, iterations, max(concurrency_levels))
+        )
+        job_list.close_connection()
+    if cold_start_runs:
+        # Against the last dataset, so index creation sees existing data
+        output["results"]["cold_start"] = bench_cold_start(cold_start_runs)
+        print(f"  cold start p50 {output['results']['cold_start']['total']['p50_ms']} ms")
+    output["results"]["serialization"] = bench_serialization(serialization_sizes)
+    return output
+
+
+def run_store_suite(storage, sizes, iterations, concurrency_levels):
+    """The JobList and API benchmarks against the embedded SQLite store; needs no mongod"""
+    from JobConfig import JobConfig
+    from JobList import AsyncJobList
+    from JobStore import open_store
+    import JobApi
+
+    output = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": iterations,
+            "concurrency": concurrency_levels,
+            "storage": storage,
+        },
+        "results": {},
+    }
+    for count in sizes:
+        print(f"== {count} jobs ({storage})")
+        with tempfile.TemporaryDirectory() as tmp:
+            job_list = open_store(JobConfig(storage=storage, sqlite_path=os.path.join(tmp, "bench.db")))
+            result = {"seed": seed_jobs(job_list, count)}
+            print(f"  seeded {count} jobs in {result['seed']['seconds']}s")
+            result["joblist"] = bench_job_list(job_list, count, iterations)
+            JobApi.db = AsyncJobList(job_list)
+            result["api"], _ = asyncio.run(bench_api(JobApi.app, job_list, count, iterations, concurrency_levels))
+            result["wire"] = asyncio.run(bench_wire(JobApi.app, count, iterations))
+            JobApi.db.close_connection()
+            JobApi.db = None
+        output["results"][str(count)] = result
+    return output
+
+
+def _int_list(value):
+    return [int(item) for item in value.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark JobList and the JobApi endpoints")
+    parser.add_argument("--uri", help="Existing MongoDB to use; the job_list_bench database is dropped")
+    parser.add_argument("--storage", choices=["mongo", "sqlite", "memory"], default="mongo",
+                        help="Store to benchmark; sqlite and memory only run the JobList and API benchmarks")
+    parser.add_argument("--jobs", type=_int_list, default=[1000, 100000], help="Dataset sizes, e.g. 1000,100000,1000000")
+    parser.add_argument("--iterations", type=int, default=200, help="Calls per benchmark")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 16, 64], help="Concurrent API clients")
+    parser.add_argument("--serialization", type=_int_list, default=[1000, 10000, 100000], help="Document counts for the serialization benchmark")
+    parser.add_argument("--cold-start", type=int, default=5, help="Fresh-process startups to time; 0 skips them")
+    parser.add_argument("--workers", type=_int_list, default=[], help="Worker counts for the multi-worker scaling benchmark, e.g. 1,2,4")
+    parser.add_argument("--tenants", type=_int_list, default=[], help="Tenant counts for the per-tenant latency benchmark, e.g. 1,10,100")
+    parser.add_argument("--jobs-per-tenant", type=int, default=1000, help="Jobs seeded for each tenant")
+    parser.add_argument("--plans-only", action="store_true", help="Only seed and check that the queries use indexes")
+    parser.add_argument("--cache", action="store_true", help="Keep the read cache enabled")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare the results with an earlier JSON file")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Relative slowdown reported as a regression")
+    parser.add_argument("--diff", nargs=2, metavar=("OLD", "NEW"), help="Only compare two result files")
+    args = parser.parse_args()
+
+    if args.diff:
+        with open(args.diff[0]) as old, open(args.diff[1]) as new:
+            regressions = compare(json.load(old), json.load(new), args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    if args.storage != "mongo":
+        output = run_store_suite(args.storage, args.jobs, args.iterations, args.concurrency)
+    elif args.uri:
+        output = run_suite(args.uri, args.jobs, args.iterations, args.concurrency, args.serialization, args.cache, args.cold_start, args.workers,
+                           args.tenants, args.jobs_per_tenant, args.plans_only)
+    else:
+        with local_mongod() as uri:
+            output = run_suite(uri, args.jobs, args.iterations, args.concurrency, args.serialization, args.cache, args.cold_start, args.workers,
+                               args.tenants, args.jobs_per_tenant, args.plans_only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(output, indent=2))
+
+    failed = failed_plans(output)
+    for name in failed:
+        print(f"NOT INDEXED {name}")
+    # Timings of requests that failed are meaningless, so errors fail the run
+    errors = failed_requests(output)
+    for name, count in errors:
+        print(f"FAILED REQUESTS {name}: {count}")
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(json.load(f), output, args.threshold)
+    sys.exit(1 if regressions or failed or errors else 0)
+
+
+if __name__ == "__main__":
+    main()
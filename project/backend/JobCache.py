@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import threading
+import time
+
+
+class JobCache:
+    """Bounded LRU cache with a TTL for job listings and counts.
+
+    Entries are limited both by count and by total size (the number of jobs
+    held), so one huge listing cannot push the process out of memory. Writes
+    call clear(), which also bumps the generation; a read that started before
+    the write passes its old generation to put() and is not stored.
+    """
+
+    def __init__(self, max_entries=256, max_size=50000, ttl=30.0):
+        self.max_entries = max_entries
+        self.max_size = max_size
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, generation, size=1):
+        """Store a value read while the cache was at the given generation"""
+        if not self.enabled or size > self.max_size:
+            return
+        with self._lock:
+            if generation != self.generation:
+                # A write happened while this value was being read
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.monotonic() + self.ttl)
+            self._size += size
+            while len(self._entries) > self.max_entries or self._size > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self, scope=None):
+        """Drop every entry after a write, or only the keys starting with scope"""
+        with self._lock:
+            if scope is None:
+                self._entries.clear()
+                self._size = 0
+            else:
+                for key in [key for key in self._entries if key[0] == scope]:
+                    self._remove(key)
+            self.generation += 1
+            self.invalidations += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._size -= size
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "entries": len(self._entries),
+                "size": self._size,
+            }
@@ -0,0 +1,160 @@
+from starlette.datastructures import MutableHeaders
+import asyncio
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENCODINGS = ("br", "gzip")
+
+# Already compressed, or must reach the client as soon as it is written
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "application/zip", "application/gzip")
+
+# Bodies at least this large are compressed on a thread instead of the event loop
+OFFLOAD_SIZE = 256 * 1024
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        # wbits=31 writes a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class Compression:
+    """Response compression settings shared with CompressionMiddleware.
+
+    Created with defaults when the app is built and configured from
+    JobConfig in the lifespan, since middleware cannot be added later.
+    """
+
+    def __init__(self):
+        self.configure()
+
+    def configure(self, encodings=ENCODINGS, minimum_size=1024, gzip_level=6, brotli_quality=4):
+        invalid = [encoding for encoding in encodings if encoding not in ENCODINGS]
+        if invalid:
+            raise ValueError(f"Invalid compression: {', '.join(invalid)}. Allowed: {', '.join(ENCODINGS)}")
+        # brotli is optional; without it only gzip is offered
+        self.encodings = [encoding for encoding in encodings if encoding != "br" or brotli is not None]
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def negotiate(self, accept_encoding):
+        """The first configured encoding the Accept-Encoding header allows, or None"""
+        accepted = set()
+        for item in accept_encoding.split(","):
+            name, _, params = item.partition(";")
+            q = params.strip().replace(" ", "")
+            if q.startswith("q=") and not float(q[2:] or 0):
+                continue
+            accepted.add(name.strip().lower())
+        for encoding in self.encodings:
+            if encoding in accepted or "*" in accepted:
+                return encoding
+        return None
+
+    def compressor(self, encoding):
+        if encoding == "br":
+            return BrotliCompressor(self.brotli_quality)
+        return GzipCompressor(self.gzip_level)
+
+
+def _compress_all(compressor, body):
+    return compressor.compress(body) + compressor.finish()
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing responses with the client's preferred encoding.
+
+    Bodies smaller than minimum_size are sent as they are. Streaming
+    responses are compressed chunk by chunk, so an export is never held in
+    memory, and Server-Sent Events are left alone so they are not delayed.
+    """
+
+    def __init__(self, app, compression):
+        self.app = app
+        self.compression = compression
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.compression.encodings:
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        try:
+            encoding = self.compression.negotiate(accept_encoding)
+        except ValueError:
+            encoding = None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                # Held back until the first body shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                headers = MutableHeaders(raw=start["headers"])
+                skip = (
+                    "content-encoding" in headers
+                    or headers.get("content-type", "").startswith(SKIP_CONTENT_TYPES)
+                    or (not more_body and len(body) < self.compression.minimum_size)
+                )
+                if not skip:
+                    compressor = self.compression.compressor(encoding)
+                    headers["Content-Encoding"] = encoding
+                    headers.add_vary_header("Accept-Encoding")
+                    if not more_body:
+                        if len(body) >= OFFLOAD_SIZE:
+                            body = await asyncio.to_thread(_compress_all, compressor, body)
+                        else:
+                            body = _compress_all(compressor, body)
+                        headers["Content-Length"] = str(len(body))
+                        await send(start)
+                        await send({"type": "http.response.body", "body": body})
+                        return
+                    del headers["Content-Length"]
+                await send(start)
+                start = None
+            if compressor is None:
+                await send(message)
+                return
+            data = compressor.compress(body)
+            if not more_body:
+                await send({"type": "http.response.body", "body": data + compressor.finish()})
+            elif data:
+                await send({"type": "http.response.body", "body": data, "more_body": True})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,177 @@
+from dataclasses import dataclass
+from typing import Optional
+from dotenv import load_dotenv
+import os
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.getenv(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value in (None, ""):
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+@dataclass
+class JobConfig:
+    """Storage, connection, pool and cache settings for the job stores and the API.
+
+    Read from the environment (and .env) only when from_env() is called, so
+    importing JobList or JobApi never touches the network or the filesystem.
+    """
+
+    # Where jobs are stored: "mongo", "sqlite" (the file at sqlite_path) or
+    # "memory" (an SQLite database that lives as long as the process)
+    storage: str = "mongo"
+    sqlite_path: str = "jobs.db"
+
+    mongo_uri: Optional[str] = None
+    db_name: str = "job_list"
+
+    # Connection pool and timeouts, passed straight to MongoClient
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    max_idle_time_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 5000
+    connect_timeout_ms: int = 5000
+    socket_timeout_ms: Optional[int] = None
+
+    # Startup work; disable index creation when indexes are managed elsewhere
+    create_indexes: bool = True
+    warm_up: bool = True
+
+    # Read cache for listings and counts; cache_ttl=0 disables it
+    cache_ttl: float = 30.0
+    cache_max_entries: int = 256
+    cache_max_size: int = 50000
+    # How often (ms) a cached read checks the shared data version for writes by
+    # other workers: 0 checks on every read, a negative value never checks
+    cache_sync_ms: float = 0.0
+
+    # Tenant of requests without a tenant ID, and of jobs stored before tenants
+    default_tenant: str = "default"
+    # Accept the X-Tenant-ID header. It is not authenticated, so only turn this
+    # on behind a proxy that authenticates callers and sets (or strips) it
+    trust_tenant_header: bool = False
+    # Reject API requests without an X-Tenant-ID header instead of using the default
+    require_tenant: bool = False
+
+    # Tombstones of deleted jobs are kept this long; /jobs/changes needs a full
+    # reload for older points in time
+    tombstone_days: int = 30
+    # /jobs/changes re-sends this many seconds of changes, covering writes that
+    # committed late or were stamped by a worker with a slightly slow clock
+    changes_overlap_seconds: float = 5.0
+
+    # Reject jobs whose normalized company, position and job_url match another
+    # active job of the tenant, enforced by a unique index
+    detect_duplicates: bool = True
+    # How long (hours) an Idempotency-Key is remembered, so retries within it
+    # return the job created by the first request
+    idempotency_ttl_hours: float = 24.0
+
+    # Closed jobs and jobs applied for more than archive_after_days ago move to
+    # the jobs_archive collection once they have not been updated for archive_idle_days
+    archive_after_days: int = 365
+    archive_idle_days: int = 30
+    archive_batch_size: int = 1000
+    # How often (minutes) the API runs the archival; 0 leaves it to an external job
+    archive_interval_minutes: float = 0.0
+
+    # Source of /jobs/events: "change_stream" (needs a replica set, sees every
+    # writer), "local" (writes made by this worker only) or "auto"
+    events_source: str = "auto"
+    events_max_subscribers: int = 10000
+    events_max_queue: int = 1000
+
+    # Keep per-status counts in a counters document updated with $inc on writes
+    use_counters: bool = True
+
+    # Mongo commands slower than this many milliseconds are logged; 0 disables the log
+    slow_query_ms: float = 100.0
+
+    # Response encodings offered to clients, in order of preference ("br"
+    # needs the brotli package); empty disables compression
+    compression: str = "br,gzip"
+    # Smaller responses are sent uncompressed
+    compression_min_size: int = 1024
+    gzip_level: int = 6
+    brotli_quality: int = 4
+
+    # Threads AsyncJobList runs pymongo calls on
+    executor_workers: int = 32
+    # Database operations a worker runs at once; up to db_max_queue more wait for
+    # at most db_queue_timeout_ms and the rest get 503 with Retry-After. Keep it
+    # at or below executor_workers and max_pool_size; 0 disables the limit
+    db_max_in_flight: int = 32
+    db_max_queue: int = 256
+    db_queue_timeout_ms: float = 1000.0
+
+    @classmethod
+    def from_env(cls):
+        load_dotenv()
+        return cls(
+            storage=os.getenv("JOB_STORAGE", cls.storage),
+            sqlite_path=os.getenv("JOB_SQLITE_PATH", cls.sqlite_path),
+            mongo_uri=os.getenv("MONGODB_ATLAS_CLUSTER_URI"),
+            db_name=os.getenv("MONGODB_DB_NAME", cls.db_name),
+            max_pool_size=_env_int("MONGODB_MAX_POOL_SIZE", cls.max_pool_size),
+            min_pool_size=_env_int("MONGODB_MIN_POOL_SIZE", cls.min_pool_size),
+            max_idle_time_ms=_env_int("MONGODB_MAX_IDLE_TIME_MS", cls.max_idle_time_ms),
+            server_selection_timeout_ms=_env_int("MONGODB_SERVER_SELECTION_TIMEOUT_MS", cls.server_selection_timeout_ms),
+            connect_timeout_ms=_env_int("MONGODB_CONNECT_TIMEOUT_MS", cls.connect_timeout_ms),
+            socket_timeout_ms=_env_int("MONGODB_SOCKET_TIMEOUT_MS", cls.socket_timeout_ms),
+            create_indexes=_env_bool("JOB_CREATE_INDEXES", cls.create_indexes),
+            warm_up=_env_bool("JOB_WARM_UP", cls.warm_up),
+            cache_ttl=_env_float("JOB_CACHE_TTL", cls.cache_ttl),
+            cache_max_entries=_env_int("JOB_CACHE_MAX_ENTRIES", cls.cache_max_entries),
+            cache_max_size=_env_int("JOB_CACHE_MAX_SIZE", cls.cache_max_size),
+            cache_sync_ms=_env_float("JOB_CACHE_SYNC_MS", cls.cache_sync_ms),
+            default_tenant=os.getenv("JOB_DEFAULT_TENANT", cls.default_tenant),
+            trust_tenant_header=_env_bool("JOB_TRUST_TENANT_HEADER", cls.trust_tenant_header),
+            require_tenant=_env_bool("JOB_REQUIRE_TENANT", cls.require_tenant),
+            tombstone_days=_env_int("JOB_TOMBSTONE_DAYS", cls.tombstone_days),
+            changes_overlap_seconds=_env_float("JOB_CHANGES_OVERLAP_SECONDS", cls.changes_overlap_seconds),
+            detect_duplicates=_env_bool("JOB_DETECT_DUPLICATES", cls.detect_duplicates),
+            idempotency_ttl_hours=_env_float("JOB_IDEMPOTENCY_TTL_HOURS", cls.idempotency_ttl_hours),
+            archive_after_days=_env_int("JOB_ARCHIVE_AFTER_DAYS", cls.archive_after_days),
+            archive_idle_days=_env_int("JOB_ARCHIVE_IDLE_DAYS", cls.archive_idle_days),
+            archive_batch_size=_env_int("JOB_ARCHIVE_BATCH_SIZE", cls.archive_batch_size),
+            archive_interval_minutes=_env_float("JOB_ARCHIVE_INTERVAL_MINUTES", cls.archive_interval_minutes),
+            events_source=os.getenv("JOB_EVENTS_SOURCE", cls.events_source),
+            events_max_subscribers=_env_int("JOB_EVENTS_MAX_SUBSCRIBERS", cls.events_max_subscribers),
+            events_max_queue=_env_int("JOB_EVENTS_MAX_QUEUE", cls.events_max_queue),
+            use_counters=_env_bool("JOB_COUNTERS", cls.use_counters),
+            slow_query_ms=_env_float("SLOW_QUERY_MS", cls.slow_query_ms),
+            compression=os.getenv("JOB_COMPRESSION", cls.compression),
+            compression_min_size=_env_int("JOB_COMPRESSION_MIN_SIZE", cls.compression_min_size),
+            gzip_level=_env_int("JOB_GZIP_LEVEL", cls.gzip_level),
+            brotli_quality=_env_int("JOB_BROTLI_QUALITY", cls.brotli_quality),
+            executor_workers=_env_int("JOB_EXECUTOR_WORKERS", cls.executor_workers),
+            db_max_in_flight=_env_int("JOB_DB_MAX_IN_FLIGHT", cls.db_max_in_flight),
+            db_max_queue=_env_int("JOB_DB_MAX_QUEUE", cls.db_max_queue),
+            db_queue_timeout_ms=_env_float("JOB_DB_QUEUE_TIMEOUT_MS", cls.db_queue_timeout_ms),
+        )
+
+    def client_options(self):
+        """Keyword arguments for MongoClient"""
+        options = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+            "connectTimeoutMS": self.connect_timeout_ms,
+        }
+        if self.max_idle_time_ms is not None:
+            options["maxIdleTimeMS"] = self.max_idle_time_ms
+        if self.socket_timeout_ms is not None:
+            options["socketTimeoutMS"] = self.socket_timeout_ms
+        return options
@@ -0,0 +1,180 @@
+from collections import deque
+from pymongo.errors import PyMongoError
+import asyncio
+import itertools
+import threading
+import time
+
+# Sent to a subscriber whose queue overflowed; it has to resync with /jobs/changes
+RESET_EVENT = "reset"
+
+
+class Subscription:
+    """One subscriber's bounded queue of encoded events"""
+
+    def __init__(self, max_queue):
+        self.queue = deque()
+        self.max_queue = max_queue
+        self.overflowed = False
+        self.ready = asyncio.Event()
+
+    def push(self, message):
+        if self.overflowed:
+            return
+        if len(self.queue) >= self.max_queue:
+            # Never block the publisher on a slow client: drop its backlog and
+            # tell it to resync instead
+            self.queue.clear()
+            self.overflowed = True
+        else:
+            self.queue.append(message)
+        self.ready.set()
+
+    def drain(self):
+        """Take every queued message, plus a reset marker after an overflow"""
+        messages = list(self.queue)
+        self.queue.clear()
+        overflowed, self.overflowed = self.overflowed, False
+        self.ready.clear()
+        return messages, overflowed
+
+
+class JobEvents:
+    """Fans job change events out to Server-Sent Events subscribers.
+
+    Events are encoded once, on the thread that published them, and shared by
+    every subscriber of the job's tenant; other tenants never see them. Each subscriber only holds a deque and an asyncio.Event,
+    so thousands of idle connections per worker cost little; a subscriber
+    that falls max_queue events behind is reset instead of slowing anyone.
+    """
+
+    def __init__(self, loop, max_subscribers=10000, max_queue=1000, heartbeat=15.0):
+        self.loop = loop
+        self.max_subscribers = max_subscribers
+        self.max_queue = max_queue
+        self.heartbeat = heartbeat
+        self.published = 0
+        self.resets = 0
+        self._ids = itertools.count(1)
+        self._count = 0
+        # Tenant ID -> set of Subscriptions
+        self._subscribers = {}
+
+    def publish_threadsafe(self, tenant_id, event_type, data):
+        """Queue an event from any thread; data is already JSON-encoded bytes"""
+        message = b"event: %s\ndata: %s\n\n" % (event_type.encode(), data)
+        self.loop.call_soon_threadsafe(self._publish, tenant_id, message)
+
+    def _publish(self, tenant_id, message):
+        self.published += 1
+        subscriptions = self._subscribers.get(tenant_id)
+        if not subscriptions:
+            return
+        message = b"id: %d\n" % next(self._ids) + message
+        for subscription in subscriptions:
+            subscription.push(message)
+
+    @property
+    def full(self):
+        return self._count >= self.max_subscribers
+
+    async def stream(self, tenant_id):
+        """Subscribe and yield SSE messages until the client goes away.
+
+        The subscription is made on the first iteration, so a response that
+        never starts streaming leaves nothing behind.
+        """
+        subscription = Subscription(self.max_queue)
+        self._subscribers.setdefault(tenant_id, set()).add(subscription)
+        self._count += 1
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                try:
+                    await asyncio.wait_for(subscription.ready.wait(), self.heartbeat)
+                except asyncio.TimeoutError:
+                    # Comment line; keeps proxies from closing an idle connection
+                    yield b": keep-alive\n\n"
+                    continue
+                messages, overflowed = subscription.drain()
+                if overflowed:
+                    self.resets += 1
+                    messages.append(b"event: %s\ndata: {}\n\n" % RESET_EVENT.encode())
+                yield b"".join(messages)
+        finally:
+            self._count -= 1
+            subscriptions = self._subscribers[tenant_id]
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscribers[tenant_id]
+
+    def stats(self):
+        return {
+            "subscribers": self._count,
+            "tenants": len(self._subscribers),
+            "published": self.published,
+            "resets": self.resets,
+        }
+
+
+class ChangeStreamWatcher:
+    """Feeds JobEvents from a MongoDB change stream on the jobs and tombstones collections.
+
+    Unlike the in-process listeners this sees writes from every worker and
+    every other client, but it needs a replica set. Runs on its own thread
+    and resumes after errors from the last seen resume token. Deletions are
+    taken from the tombstones, since a delete event on the jobs collection
+    carries only the _id and not the tenant it belonged to.
+    """
+
+    def __init__(self, job_list, publish):
+        self.job_list = job_list
+        self.publish = publish
+        self._stream = None
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-change-stream", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        stream = self._stream
+        if stream is not None:
+            stream.close()
+        self._thread.join(timeout=5)
+
+    def _run(self):
+        resume_token = None
+        while not self._stopped.is_set():
+            try:
+                collections = [self.job_list.jobs_collection.name, self.job_list.tombstones_collection.name]
+                with self.job_list.db.watch(
+                    [{"$match": {"ns.coll": {"$in": collections}}}],
+                    full_document="updateLookup", resume_after=resume_token
+                ) as stream:
+                    self._stream = stream
+                    for change in stream:
+                        resume_token = stream.resume_token
+                        self._dispatch(change)
+            except PyMongoError as e:
+                if self._stopped.is_set():
+                    return
+                print(f"Change stream interrupted, resuming: {e}")
+                time.sleep(1)
+
+    def _dispatch(self, change):
+        operation = change["operationType"]
+        if change["ns"]["coll"] == self.job_list.tombstones_collection.name:
+            # Tombstones are upserted, so a re-deleted ID arrives as an update
+            tombstone = change.get("fullDocument")
+            if operation in ("insert", "update", "replace") and tombstone:
+                event_type = "archived" if tombstone.get("reason") == "archived" else "deleted"
+                self.publish(event_type, {"_id": tombstone["_id"], "owner_id": tombstone["owner_id"]})
+            return
+        if operation == "insert":
+            self.publish("created", self.job_list._public(change["fullDocument"]))
+        elif operation in ("update", "replace"):
+            # fullDocument is None when the job was deleted before the lookup
+            if change.get("fullDocument"):
+                self.publish("updated", self.job_list._public(change["fullDocument"]))
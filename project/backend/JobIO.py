@@ -0,0 +1,124 @@
+from datetime import datetime
+import codecs
+import csv
+import io
+import json
+
+# Columns of a CSV export, and the columns an import understands
+CSV_FIELDS = ["id", "company", "position", "status", "date_applied", "salary", "job_url", "remarks"]
+IMPORT_FIELDS = CSV_FIELDS[1:]
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def iter_lines(chunks):
+    """Turn an iterator of byte chunks into text lines, keeping the line endings.
+
+    Decoding is incremental, so a multi-byte character split across two
+    chunks is handled and only one partial line is ever buffered.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    for chunk in chunks:
+        # The last piece may be an unfinished line
+        *lines, pending = (pending + decoder.decode(chunk)).split("\n")
+        for line in lines:
+            yield line + "\n"
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+def _as_date(value):
+    # Exports write full ISO datetimes; create_job itself only takes YYYY-MM-DD
+    if isinstance(value, str) and "T" in value:
+        try:
+            return datetime.fromisoformat(value.strip())
+        except ValueError:
+            pass
+    return value
+
+
+def _job_from_row(row):
+    job = {}
+    for field in IMPORT_FIELDS:
+        value = row.get(field)
+        if isinstance(value, str):
+            value = value.strip() or None
+        job[field] = value
+    job["date_applied"] = _as_date(job["date_applied"])
+    return job
+
+
+def parse_csv(lines):
+    """Yield (row number, job dict or error) for each data row of a CSV file.
+
+    The first row is the header; column names are matched case-insensitively
+    and unknown columns (such as the id of an export) are ignored.
+    """
+    reader = csv.reader(lines)
+    try:
+        header = [name.strip().lower() for name in next(reader)]
+    except StopIteration:
+        return
+    except csv.Error as e:
+        yield 1, ValueError(f"Invalid CSV header: {e}")
+        return
+    missing = [field for field in ("company", "position", "status", "date_applied") if field not in header]
+    if missing:
+        yield 1, ValueError(f"Missing CSV columns: {', '.join(missing)}")
+        return
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # The reader cannot resynchronise after a malformed row
+            yield reader.line_num, ValueError(f"Invalid CSV: {e}")
+            return
+        if not any(value.strip() for value in values):
+            continue
+        yield reader.line_num, _job_from_row(dict(zip(header, values)))
+
+
+def parse_ndjson(lines):
+    """Yield (line number, job dict or error) for each non-empty NDJSON line"""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, ValueError(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(row, dict):
+            yield number, ValueError("Each line must be a JSON object")
+            continue
+        yield number, _job_from_row(row)
+
+
+PARSERS = {"csv": parse_csv, "ndjson": parse_ndjson}
+
+
+def csv_chunks(jobs, rows_per_chunk=500, header=True):
+    """Encode jobs as CSV, yielding the header and then a chunk every rows_per_chunk rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_FIELDS)
+    rows = 0
+    for job in jobs:
+        date_applied = job.get("date_applied")
+        writer.writerow([
+            job["_id"], job["company"], job["position"], job["status"],
+            date_applied.isoformat() if date_applied else "",
+            job.get("salary") if job.get("salary") is not None else "",
+            job.get("job_url") or "", job.get("remarks") or "",
+        ])
+        rows += 1
+        if rows % rows_per_chunk == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
@@ -1,103 +1,273 @@
-from pymongo import MongoClient
-from datetime import datetime, date
+from pymongo import MongoClient, IndexModel, ASCENDING, DESCENDING
+from pymongo import DeleteOne, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from datetime import datetime, timedelta
 from bson.objectid import ObjectId
-from dotenv import load_dotenv
-import os
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from functools import partial
+from heapq import merge
+from JobCache import JobCache
+from JobConfig import JobConfig
+from JobStore import (
+    JobStore, ALLOWED_STATUSES, SEARCH_FIELDS, INTERNAL_FIELDS, FINGERPRINT_FIELDS, open_store,
+    DuplicateJobError, IdempotencyKeyReused, job_fingerprint,
+    parse_sort, encode_cursor, decode_cursor, encode_changes_token, parse_since, MIN_OBJECT_ID,
+    _utc_naive, _now, _tokenize, _as_datetime,
+)
+import asyncio
+import copy
+import itertools
+import re
+import time
 
-load_dotenv()
+# Closed applications; archive_jobs() moves them out of the hot collection
+CLOSED_STATUSES = ["rejected"]
 
-mongo_uri = os.getenv("MONGODB_ATLAS_CLUSTER_URI")
+# Fields deciding whether archive_jobs() moves a job
+ARCHIVE_FIELDS = {"status": 1, "date_applied": 1, "updated_at": 1}
 
-if not mongo_uri:
-    raise ValueError("MONGODB_ATLAS_CLUSTER_URI not found in environment variables.")
+JOB_PROJECTION = {field: 0 for field in INTERNAL_FIELDS}
 
-class JobList:
+# Every job belongs to one tenant (owner_id) and every query is scoped to it,
+# so all indexes lead with owner_id. Shard on {owner_id: 1}: the unique
+# FINGERPRINT_INDEX must start with the shard key, so (owner_id, _id) cannot be.
+JOB_INDEXES = [
+    IndexModel([("owner_id", ASCENDING), ("_id", ASCENDING)], name="owner_id_id"),
+    IndexModel([("owner_id", ASCENDING), ("date_applied", DESCENDING), ("_id", DESCENDING)], name="owner_date_applied_id"),
+    IndexModel([("owner_id", ASCENDING), ("status", ASCENDING), ("date_applied", DESCENDING), ("_id", DESCENDING)], name="owner_status_date_applied_id"),
+    IndexModel([("owner_id", ASCENDING), ("company", ASCENDING), ("date_applied", DESCENDING), ("_id", DESCENDING)], name="owner_company_date_applied_id"),
+    IndexModel([("owner_id", ASCENDING), ("company", ASCENDING), ("_id", ASCENDING)], name="owner_company_id"),
+    IndexModel([("owner_id", ASCENDING), ("position", ASCENDING), ("_id", ASCENDING)], name="owner_position_id"),
+    IndexModel([("owner_id", ASCENDING), ("updated_at", ASCENDING), ("_id", ASCENDING)], name="owner_updated_at_id"),
+    # Multikey indexes over the search tokens; anchored regexes become range scans
+    IndexModel([("owner_id", ASCENDING), ("search.company", ASCENDING)], name="owner_search_company"),
+    IndexModel([("owner_id", ASCENDING), ("search.position", ASCENDING)], name="owner_search_position"),
+    IndexModel([("owner_id", ASCENDING), ("search.remarks", ASCENDING)], name="owner_search_remarks"),
+]
+
+# One active job per posting and tenant. Only on jobs: archived jobs keep their
+# fingerprint, so applying again to an archived posting is allowed. Jobs left
+# with a null fingerprint are older duplicates kept as they are.
+FINGERPRINT_INDEX_NAME = "owner_fingerprint"
+FINGERPRINT_INDEX = IndexModel(
+    [("owner_id", ASCENDING), ("fingerprint", ASCENDING)], name=FINGERPRINT_INDEX_NAME,
+    unique=True, partialFilterExpression={"fingerprint": {"$type": "string"}},
+)
+
+# Indexes of earlier versions, superseded by the owner_id ones above
+LEGACY_INDEXES = [
+    "job_id_1", "date_applied_id", "status_date_applied_id", "company_date_applied_id", "company_id",
+    "position_id", "updated_at_id", "search_company", "search_position", "search_remarks",
+]
+
+# jobs_meta document listing the one-off backfills already run on this database
+MIGRATIONS_ID = "migrations"
+
+def _is_duplicate_posting(error):
+    """Whether a duplicate key error (details or a bulk write error) comes from FINGERPRINT_INDEX"""
+    # Servers before 4.4 send no keyPattern, but the message names the index
+    return "fingerprint" in (error.get("keyPattern") or {}) or FINGERPRINT_INDEX_NAME in error.get("errmsg", "")
+
+class JobList(JobStore):
+    """The MongoDB store"""
 
     # Connection and creating indexes
-    def __init__(self, db_name="job_list", connection_string=mongo_uri):
-        self.client = MongoClient(connection_string)
-        self.db = self.client[db_name]
+    def __init__(self, db_name=None, connection_string=None, event_listeners=None, config=None):
+        super().__init__(config or JobConfig.from_env())
+        connection_string = connection_string or self.config.mongo_uri
+        if not connection_string:
+            raise ValueError("MONGODB_ATLAS_CLUSTER_URI not found in environment variables.")
+        # MongoClient connects in the background; nothing blocks until the first command
+        self.client = MongoClient(
+            connection_string, event_listeners=event_listeners or [], **self.config.client_options()
+        )
+        self.db = self.client[db_name or self.config.db_name]
         self.jobs_collection = self.db.jobs
-        self.init_database()
+        self.meta_collection = self.db.jobs_meta
+        self.tombstones_collection = self.db.jobs_tombstones
+        # Cold tier: closed and old jobs moved out of jobs by archive_jobs()
+        self.archive_collection = self.db.jobs_archive
+        # Results of create_job calls made with an Idempotency-Key, expired by a TTL index
+        self.idempotency_collection = self.db.idempotency_keys
+        self.use_counters = self.config.use_counters
+        self.cache = JobCache(
+            max_entries=self.config.cache_max_entries,
+            max_size=self.config.cache_max_size,
+            ttl=self.config.cache_ttl,
+        )
+        # tenant -> (data version, monotonic time of the check); shared by the tenant views
+        self._sync_state = {}
+        # Filled on first use by _server_version(); shared by the tenant views
+        self._server = {}
+        if self.config.create_indexes:
+            self.init_database()
 
     def init_database(self):
-        self.jobs_collection.create_index("job_id")
+        # Jobs stored before tenants existed belong to the default tenant
+        self.jobs_collection.update_many({"owner_id": {"$exists": False}}, {"$set": {"owner_id": self.config.default_tenant}})
+        self.tombstones_collection.update_many({"owner_id": {"$exists": False}}, {"$set": {"owner_id": self.config.default_tenant}})
+        self.jobs_collection.create_indexes(JOB_INDEXES)
+        # Same shape as jobs, so include_archived reads are indexed too
+        self.archive_collection.create_indexes(JOB_INDEXES)
+        for name in LEGACY_INDEXES:
+            try:
+                self.jobs_collection.drop_index(name)
+            except OperationFailure:
+                pass
+        self.tombstones_collection.create_index(
+            [("owner_id", ASCENDING), ("deleted_at", ASCENDING), ("_id", ASCENDING)], name="owner_deleted_at_id"
+        )
+        self._create_ttl_index(self.tombstones_collection, "deleted_at", self.config.tombstone_days * 86400)
+        self.idempotency_collection.create_index(
+            [("owner_id", ASCENDING), ("key", ASCENDING)], name="owner_key", unique=True
+        )
+        self._create_ttl_index(self.idempotency_collection, "created_at", int(self.config.idempotency_ttl_hours * 3600))
+        if self.config.detect_duplicates:
+            self.jobs_collection.create_indexes([FINGERPRINT_INDEX])
+        else:
+            # Left over from a run with detection on, it would go on rejecting duplicates
+            try:
+                self.jobs_collection.drop_index(FINGERPRINT_INDEX_NAME)
+            except OperationFailure:
+                pass
+        if not self.use_counters:
+            # Writes made from now on are not counted; dropping the counters
+            # makes the next run with them on rebuild instead of trusting them
+            self.meta_collection.delete_many({"_id": {"$regex": "^counters:"}})
+        elif not self.meta_collection.find_one({"_id": self._meta_id("counters")}):
+            self.rebuild_counters()
+        self.run_migrations()
+
+    def _migrations(self):
+        """Backfills for jobs written by earlier versions, by name, in the order they run"""
+        # Tokens written before they were Unicode words are recomputed too
+        migrations = {"unicode_search_terms": self.rebuild_search_terms, "updated_at": self.backfill_updated_at}
+        if self.config.detect_duplicates:
+            # Left pending while detection is off, so it runs when it is turned on
+            migrations["fingerprints"] = self.backfill_fingerprints
+        return migrations
+
+    def run_migrations(self, force=False):
+        """Run the backfills not yet recorded in jobs_meta, or all of them with force.
+
+        Each scans the whole collection, so it runs once per database rather
+        than on every startup. Returns the names that ran.
+        """
+        done = set((self.meta_collection.find_one({"_id": MIGRATIONS_ID}) or {}).get("done", []))
+        ran = []
+        for name, migrate in self._migrations().items():
+            if force or name not in done:
+                migrate()
+                self.meta_collection.update_one({"_id": MIGRATIONS_ID}, {"$addToSet": {"done": name}}, upsert=True)
+                ran.append(name)
+        return ran
     
-    def _validate_status(self, status):
-        """Validate job status against allowed values"""
-        allowed_statuses = [
-            "applied", "interviewing", "offered", "rejected"
+    def _create_ttl_index(self, collection, field, seconds):
+        name = f"{field}_ttl"
+        try:
+            collection.create_index(field, name=name, expireAfterSeconds=seconds)
+        except OperationFailure:
+            # The retention changed since the index was created
+            self.db.command("collMod", collection.name, index={"name": name, "expireAfterSeconds": seconds})
+
+    def _server_version(self):
+        """(major, minor) of the connected MongoDB server"""
+        if "version" not in self._server:
+            self._server["version"] = tuple(self.client.server_info()["versionArray"][:2])
+        return self._server["version"]
+
+    def _salary_pipeline(self):
+        """$facet branch summarising salaries; $median needs MongoDB 7.0, see _salary_median"""
+        summary = {"_id": None, "count": {"$sum": 1}, "min": {"$min": "$salary"}, "max": {"$max": "$salary"}}
+        if self._server_version() >= (7, 0):
+            summary["median"] = {"$median": {"input": "$salary", "method": "approximate"}}
+        return [{"$match": {"salary": {"$type": "number"}}}, {"$group": summary}]
+
+    def _salary_median(self, count):
+        """Median salary for servers without $median: the lower middle one, like its approximate method.
+
+        A sort skipping to the middle, so the salaries are never gathered
+        into one document.
+        """
+        owner = {"$match": {"owner_id": self.tenant_id, "salary": {"$type": "number"}}}
+        pipeline = [
+            owner, {"$unionWith": {"coll": self.archive_collection.name, "pipeline": [owner]}},
+            {"$sort": {"salary": 1}}, {"$skip": (count - 1) // 2}, {"$limit": 1}, {"$project": {"salary": 1}},
         ]
-        return status.lower() in allowed_statuses
+        middle = next(self.jobs_collection.aggregate(pipeline, allowDiskUse=True), None)
+        return middle["salary"] if middle else None
+
+    def _meta_id(self, name):
+        """_id of this tenant's counters or version document in jobs_meta"""
+        return f"{name}:{self.tenant_id}"
+
+    def _cache_key(self, *parts):
+        # The tenant leads every key so a write can drop just that tenant's entries
+        return (self.tenant_id,) + parts
+
+    def _build_query(self, status=None, company=None, date_from=None, date_to=None):
+        """Build the Mongo filter for the listing parameters"""
+        query = {"owner_id": self.tenant_id}
+        if status:
+            statuses = [s.strip().lower() for s in status.split(",") if s.strip()]
+            query["status"] = statuses[0] if len(statuses) == 1 else {"$in": statuses}
+        if company:
+            query["company"] = company.strip()
+        if date_from or date_to:
+            query["date_applied"] = {}
+            if date_from:
+                query["date_applied"]["$gte"] = _as_datetime(date_from)
+            if date_to:
+                # date_to is inclusive, so stop at the start of the next day
+                query["date_applied"]["$lt"] = _as_datetime(date_to) + timedelta(days=1)
+        return query
     
-    def _validate_url(self, url):
-        """Basic URL validation"""
-        if not url:
-            return True
-        url = url.strip()
-        return url.startswith(('http://', 'https://')) or '.' in url
-
-    def create_job(self, company, position, status, date_applied, salary, job_url, remarks):
-        """Create job from user input"""
+    def _to_object_id(self, job_id):
+        """Convert string job_id to ObjectId if it is a valid ObjectId"""
+        if ObjectId.is_valid(job_id):
+            return ObjectId(job_id)
+        return job_id
+
+    def create_job(self, company, position, status, date_applied, salary, job_url, remarks, idempotency_key=None):
+        """Create job from user input and return the stored document.
+
+        With an idempotency_key, the key is claimed together with the new
+        job's _id before the insert, so a retry after a timeout either returns
+        the job the first call created or finishes that insert under the
+        same _id; it never creates a second job. Raises DuplicateJobError when
+        the tenant already has the posting and IdempotencyKeyReused when the
+        key came with different arguments.
+        """
         try:
-            # Validate required fields
-            if not company or not company.strip():
-                raise ValueError("Company name is required")
-            if not position or not position.strip():
-                raise ValueError("Position is required")
-            if not status or not status.strip():
-                raise ValueError("Status is required")
-            if not self._validate_status(status):
-                raise ValueError(f"Invalid status: {status}. Allowed: applied, interviewing, offer, rejected")
-            
-            # Validate job_url format
-            if job_url and job_url.strip() and not self._validate_url(job_url):
-                raise ValueError("Invalid URL format. Must start with http:// or https://")
-            
-            # Validate and convert date_applied
-            if isinstance(date_applied, str):
-                date_str = date_applied.strip()
-                if not date_str:
-                    raise ValueError("date_applied cannot be empty")
-                try:
-                    # Parse YYYY-MM-DD format only and convert to datetime
-                    date_applied = datetime.strptime(date_str, "%Y-%m-%d")
-                except ValueError:
-                    raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD format only")
-            elif isinstance(date_applied, date) and not isinstance(date_applied, datetime):
-                # Convert date to datetime (set time to midnight)
-                date_applied = datetime.combine(date_applied, datetime.min.time())
-            elif isinstance(date_applied, datetime):
-                # Already a datetime, keep as is
-                pass
-            else:
-                raise ValueError("date_applied must be a date object or valid date string (YYYY-MM-DD)")
-            
-            # Validate salary (if provided)
-            if salary is not None:
-                if isinstance(salary, str):
-                    try:
-                        salary = float(salary)
-                    except ValueError:
-                        raise ValueError(f"Invalid salary: {salary}. Must be a number")
-                elif not isinstance(salary, (int, float)):
-                    raise ValueError("Salary must be a number")
-                
-                if salary < 0:
-                    raise ValueError("Salary cannot be negative")
-            
-            # Create dictionary
-            job_doc = {
-                "company": company.strip(),
-                "position": position.strip(),
-                "status": status.strip().lower(),
-                "date_applied": date_applied,
-                "salary": salary if salary is not None else None,
-                "job_url": job_url.strip() if job_url else None,
-                "remarks": remarks.strip() if remarks else None
-            }
-            result = self.jobs_collection.insert_one(job_doc)
-            return str(result.inserted_id)
+            job_doc = self._build_job_doc(company, position, status, date_applied, salary, job_url, remarks)
+            if idempotency_key is not None:
+                claim = self._claim_idempotency_key(idempotency_key, job_doc)
+                if claim is not None:
+                    if claim.get("job"):
+                        return claim["job"]
+                    # The first call has not stored its job (yet); insert it under its _id
+                    job_doc["_id"] = claim["job_id"]
+            try:
+                self.jobs_collection.insert_one(job_doc)
+            except DuplicateKeyError as e:
+                if _is_duplicate_posting(e.details or {"errmsg": str(e)}):
+                    raise DuplicateJobError(self._duplicates_of([job_doc["fingerprint"]]).get(job_doc["fingerprint"]))
+                if idempotency_key is None:
+                    raise
+                # A concurrent retry with the same key inserted it first
+                return self.get_job(job_doc["_id"])
+            self._record_write({job_doc["status"]: 1})
+            job_doc["_id"] = str(job_doc["_id"])
+            created_job = self._public(job_doc)
+            if idempotency_key is not None:
+                self.idempotency_collection.update_one(
+                    {"owner_id": self.tenant_id, "key": idempotency_key}, {"$set": {"job": created_job}}
+                )
+            self._emit("created", created_job)
+            return created_job
+        except (DuplicateJobError, IdempotencyKeyReused):
+            raise
         except ValueError as ve:
             print(f"Validation error: {ve}")
             return None
@@ -105,130 +275,250 @@ class JobList:
             print(f"Error creating jobs: {e}")
             return None
         
-    def get_all_jobs(self):
-        """Retrieve all jobs from the database"""
+    def _claim_idempotency_key(self, key, job_doc):
+        """Record key for this create_job call, or return the record of the call that used it first"""
+        request_hash = self._request_hash(job_doc)
+        claim = self.idempotency_collection.find_one_and_update(
+            {"owner_id": self.tenant_id, "key": key},
+            {"$setOnInsert": {"request_hash": request_hash, "job_id": job_doc["_id"], "created_at": _now()}},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+        if claim is not None and claim["request_hash"] != request_hash:
+            raise IdempotencyKeyReused(key)
+        return claim
+
+    def _duplicates_of(self, fingerprints):
+        """{fingerprint: job ID} of the tenant's active jobs with these fingerprints"""
+        query = {"owner_id": self.tenant_id, "fingerprint": {"$in": list(fingerprints)}}
+        return {job["fingerprint"]: str(job["_id"]) for job in self.jobs_collection.find(query, {"fingerprint": 1})}
+
+    def _write_errors(self, bwe, fingerprints):
+        """{index: message} for a BulkWriteError; duplicates name the job they duplicate"""
+        errors = bwe.details["writeErrors"]
+        conflicts = {err["index"] for err in errors if _is_duplicate_posting(err)}
+        existing = self._duplicates_of({fingerprints[index] for index in conflicts}) if conflicts else {}
+        return {
+            err["index"]: str(DuplicateJobError(existing.get(fingerprints[err["index"]])))
+            if err["index"] in conflicts else err["errmsg"]
+            for err in errors
+        }
+
+    def get_job(self, job_id):
+        """Retrieve a single job by ID"""
         try:
-            jobs = list(self.jobs_collection.find())
-            for job in jobs:
-                job["_id"] = str(job["_id"])  # Convert ObjectId to string for easier handling
-            return jobs
+            query = {"_id": self._to_object_id(job_id), "owner_id": self.tenant_id}
+            job = self.jobs_collection.find_one(query, JOB_PROJECTION)
+            if job is None:
+                job = self.archive_collection.find_one(query, JOB_PROJECTION)
+            if job:
+                job["_id"] = str(job["_id"])
+            return job
+        except Exception as e:
+            print(f"Error retrieving job: {e}")
+            return None
+
+    def _collections(self, include_archived=False):
+        """Collections a read covers: the hot tier, plus the archive on request"""
+        if include_archived:
+            return [self.jobs_collection, self.archive_collection]
+        return [self.jobs_collection]
+
+    def _projection(self, fields, sort_field):
+        """Mongo projection for a listing: only the requested fields, plus the sort key for cursors"""
+        if not fields:
+            return JOB_PROJECTION
+        projection = {name: 1 for name in fields}
+        projection[sort_field] = 1
+        return projection
+
+    def _find_sorted(self, query, field, direction, include_archived=False, limit=0, batch_size=None, fields=None):
+        """Documents matching query in (field, _id) order, across the requested tiers.
+
+        Each tier is read with its own indexed, sorted cursor and the results
+        are merged, so adding the archive never needs an in-memory sort.
+        """
+        projection = self._projection(fields, field)
+        cursors = []
+        for collection in self._collections(include_archived):
+            cursor = collection.find(query, projection).sort([(field, direction), ("_id", direction)]).limit(limit)
+            if batch_size:
+                cursor = cursor.batch_size(batch_size)
+            cursors.append(cursor)
+        if len(cursors) == 1:
+            return cursors[0]
+        jobs = merge(*cursors, key=lambda job: (job[field], job["_id"]), reverse=direction == DESCENDING)
+        return jobs if not limit else list(itertools.islice(jobs, limit))
+
+    def get_all_jobs(self, status=None, company=None, date_from=None, date_to=None, sort=None, include_archived=False,
+                     fields=None, data_version=None):
+        """Retrieve all jobs matching the filters from the database.
+
+        Only the hot tier is read unless include_archived is set. fields, a
+        tuple from parse_fields, becomes a projection so other fields are
+        never read or sent over the network. data_version, when the caller
+        has just read it, saves reading it again to check the cache.
+        """
+        try:
+            key = self._cache_key("all", status, company, date_from, date_to, sort, include_archived, fields)
+            self._sync_cache(data_version)
+            jobs = self.cache.get(key)
+            if jobs is None:
+                generation = self.cache.generation
+                field, direction = parse_sort(sort)
+                jobs = list(self._find_sorted(
+                    self._build_query(status, company, date_from, date_to), field, direction, include_archived,
+                    fields=fields
+                ))
+                for job in jobs:
+                    job["_id"] = str(job["_id"])  # Convert ObjectId to string for easier handling
+                self.cache.put(key, jobs, generation, size=len(jobs))
+            # Cached documents are shared, only the list is copied
+            return list(jobs)
         except Exception as e:
             print(f"Error retrieving jobs: {e}")
             return []
-        
+
+    def _page_query(self, after=None, status=None, company=None, date_from=None, date_to=None, sort=None):
+        """(filter, sort field, direction) of a get_jobs_page call, continuing after the cursor"""
+        field, direction = parse_sort(sort)
+        query = self._build_query(status, company, date_from, date_to)
+        if after:
+            after_value, after_id = decode_cursor(after)
+            op = "$gt" if direction == ASCENDING else "$lt"
+            keyset = {"$or": [
+                {field: {op: after_value}},
+                {field: after_value, "_id": {op: after_id}},
+            ]}
+            query = {"$and": [query, keyset]}
+        return query, field, direction
+
+    def get_jobs_page(self, limit=100, after=None, status=None, company=None, date_from=None, date_to=None, sort=None,
+                      include_archived=False, fields=None, data_version=None):
+        """Retrieve one page of jobs matching the filters.
+
+        Returns (jobs, next_cursor); next_cursor is None on the last page.
+        Archived jobs are only included when include_archived is set, and
+        fields and data_version work like in get_all_jobs.
+        """
+        try:
+            key = self._cache_key("page", limit, after, status, company, date_from, date_to, sort, include_archived, fields)
+            self._sync_cache(data_version)
+            page = self.cache.get(key)
+            if page is not None:
+                return list(page[0]), page[1]
+            generation = self.cache.generation
+
+            query, field, direction = self._page_query(after, status, company, date_from, date_to, sort)
+            # Fetch one extra document to know whether another page exists
+            jobs = list(self._find_sorted(query, field, direction, include_archived, limit=limit + 1, fields=fields))
+            next_cursor = encode_cursor(jobs[limit - 1], sort) if len(jobs) > limit else None
+            jobs = jobs[:limit]
+            for job in jobs:
+                job["_id"] = str(job["_id"])
+            self.cache.put(key, (jobs, next_cursor), generation, size=len(jobs))
+            return list(jobs), next_cursor
+        except Exception as e:
+            print(f"Error retrieving jobs: {e}")
+            return None
+
+    def iter_jobs(self, status=None, company=None, date_from=None, date_to=None, sort=None, batch_size=500,
+                  include_archived=False, fields=None):
+        """Yield every matching job while the cursors are still being read"""
+        field, direction = parse_sort(sort)
+        query = self._build_query(status, company, date_from, date_to)
+        projection = self._projection(fields, field)
+        cursors = [
+            collection.find(query, projection).sort([(field, direction), ("_id", direction)]).batch_size(batch_size)
+            for collection in self._collections(include_archived)
+        ]
+        jobs = merge(*cursors, key=lambda job: (job[field], job["_id"]), reverse=direction == DESCENDING)
+        try:
+            for job in jobs:
+                job["_id"] = str(job["_id"])
+                yield job
+        finally:
+            for cursor in cursors:
+                cursor.close()
+
+    def _update_doc(self, update_fields, fingerprint=None):
+        """$set document for validated update fields, refreshing changed search tokens.
+
+        Also stamps updated_at into update_fields, so callers merging them
+        into the previous document get the stored value.
+        """
+        update_fields["updated_at"] = _now()
+        set_fields = dict(update_fields)
+        for field in SEARCH_FIELDS:
+            if field in update_fields:
+                set_fields[f"search.{field}"] = _tokenize(update_fields[field])
+        if fingerprint is not None:
+            set_fields["fingerprint"] = fingerprint
+        return {"$set": set_fields}
+
+    def _updated_fingerprint(self, job, update_fields):
+        """Fingerprint of job (holding at least FINGERPRINT_FIELDS) after the update, or None if unchanged"""
+        if job is None or not any(field in update_fields for field in FINGERPRINT_FIELDS):
+            return None
+        return job_fingerprint(*(update_fields.get(field, job.get(field)) for field in FINGERPRINT_FIELDS))
+
     def update_job(self, job_id, company=None, position=None, status=None, date_applied=None, salary=None, job_url=None, remarks=None):
-        """Update job listed"""
+        """Update job listed.
+
+        Returns the updated document, False if the job does not exist and
+        None on validation or database errors.
+        """
         try:
-            # Convert string job_id to ObjectId if it is a valid ObjectId
-            if ObjectId.is_valid(job_id):
-                job_object_id = ObjectId(job_id)
-            else: 
-                job_object_id = job_id
-            
-            # Check if job exists
-            existing_job = self.jobs_collection.find_one({"_id": job_object_id})
-            if not existing_job:
-                raise ValueError(f"Job with ID {job_id} not found")
-            
-            update_fields = {}
-            
-            # Validate and add company
-            if company is not None:
-                company = company.strip() if isinstance(company, str) else company
-                if not company:
-                    raise ValueError("Company name cannot be empty")
-                update_fields["company"] = company
-            
-            # Validate and add position
-            if position is not None:
-                position = position.strip() if isinstance(position, str) else position
-                if not position:
-                    raise ValueError("Position cannot be empty")
-                update_fields["position"] = position
-            
-            # Validate and add status
-            if status is not None:
-                status = status.strip() if isinstance(status, str) else status
-                if not status:
-                    raise ValueError("Status cannot be empty")
-                if not self._validate_status(status):
-                    raise ValueError(f"Invalid status: {status}. Allowed: applied, interviewing, offer, rejected")
-                update_fields["status"] = status.lower()
-            
-            # Validate and convert date_applied
-            if date_applied is not None:
-                if isinstance(date_applied, str):
-                    date_str = date_applied.strip()
-                    if not date_str:
-                        raise ValueError("date_applied cannot be empty")
-                    try:
-                        # Parse YYYY-MM-DD format and convert to datetime
-                        date_applied = datetime.strptime(date_str, "%Y-%m-%d")
-                    except ValueError:
-                        raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD format only")
-                elif isinstance(date_applied, date) and not isinstance(date_applied, datetime):
-                    # Convert date to datetime (set time to midnight)
-                    date_applied = datetime.combine(date_applied, datetime.min.time())
-                elif isinstance(date_applied, datetime):
-                    # Already a datetime, keep as is
-                    pass
-                else:
-                    raise ValueError("date_applied must be a date/datetime object or valid date string (YYYY-MM-DD)")
-                update_fields["date_applied"] = date_applied
-            
-            # Validate salary
-            if salary is not None:
-                if isinstance(salary, str):
-                    salary = salary.strip()
-                    if not salary:  # Empty string, set to None
-                        update_fields["salary"] = None
-                    else:
-                        try:
-                            salary = float(salary)
-                            if salary < 0:
-                                raise ValueError("Salary cannot be negative")
-                            update_fields["salary"] = salary
-                        except ValueError:
-                            raise ValueError(f"Invalid salary: {salary}. Must be a number")
-                elif isinstance(salary, (int, float)):
-                    if salary < 0:
-                        raise ValueError("Salary cannot be negative")
-                    update_fields["salary"] = salary
-                else:
-                    raise ValueError("Salary must be a number or numeric string")
-            
-            # Validate and add job_url
-            if job_url is not None:
-                job_url = job_url.strip() if isinstance(job_url, str) else job_url
-                if job_url and not self._validate_url(job_url):
-                    raise ValueError("Invalid URL format. Must start with http:// or https://")
-                update_fields["job_url"] = job_url if job_url else None
-            
-            # Add remarks
-            if remarks is not None:
-                remarks = remarks.strip() if isinstance(remarks, str) else remarks
-                update_fields["remarks"] = remarks if remarks else None
+            job_object_id = self._to_object_id(job_id)
+            update_fields = self._build_update_fields(company, position, status, date_applied, salary, job_url, remarks)
 
             if not update_fields:
-                print("No fields to update.")
-                return None
-
-            # Update the document
-            result = self.jobs_collection.update_one(
-                {"_id": job_object_id},
-                {"$set": update_fields}
-            )
-            
-            # Return the updated document
-            if result.modified_count > 0:
-                updated_job = self.jobs_collection.find_one({"_id": job_object_id})
-                updated_job["_id"] = str(updated_job["_id"])
-                return updated_job
+                # Nothing to change, return the job as it is
+                updated_job = self.get_job(job_id)
             else:
-                # No changes made, but job exists
-                existing_job["_id"] = str(existing_job["_id"])
-                return existing_job
-                
+                fingerprint = None
+                if any(field in update_fields for field in FINGERPRINT_FIELDS):
+                    # A changed company, position or URL needs the other two
+                    # for the new fingerprint
+                    query = {"_id": job_object_id, "owner_id": self.tenant_id}
+                    projection = {field: 1 for field in FINGERPRINT_FIELDS}
+                    current = self.jobs_collection.find_one(query, projection)
+                    if current is None and self._restore([job_object_id]):
+                        current = self.jobs_collection.find_one(query, projection)
+                    fingerprint = self._updated_fingerprint(current, update_fields)
+
+                # Update in one round trip. The previous version is returned so
+                # the status counters can be moved; the new one is built locally.
+                def apply_update():
+                    return self.jobs_collection.find_one_and_update(
+                        {"_id": job_object_id, "owner_id": self.tenant_id},
+                        self._update_doc(update_fields, fingerprint),
+                        projection=JOB_PROJECTION,
+                        return_document=ReturnDocument.BEFORE
+                    )
+                try:
+                    previous_job = apply_update()
+                    # An archived job moves back to the hot tier when it is edited
+                    if previous_job is None and self._restore([job_object_id]):
+                        previous_job = apply_update()
+                except DuplicateKeyError as e:
+                    if not _is_duplicate_posting(e.details or {"errmsg": str(e)}):
+                        raise
+                    raise DuplicateJobError(self._duplicates_of([fingerprint]).get(fingerprint))
+                updated_job = None
+                if previous_job:
+                    updated_job = {**previous_job, **update_fields}
+                    self._record_write(self._status_change(previous_job["status"], updated_job["status"]))
+
+            if not updated_job:
+                return False
+            updated_job["_id"] = str(updated_job["_id"])
+            if update_fields:
+                self._emit("updated", updated_job)
+            return updated_job
+
+        except DuplicateJobError:
+            raise
         except ValueError as ve:
             print(f"Validation error: {ve}")
             return None
@@ -237,33 +527,832 @@ class JobList:
             return None
         
     def delete_job(self, job_id):
-        """Delete specific jobs"""
+        """Delete specific jobs.
+
+        Returns True if deleted, False if the job does not exist and None on
+        database errors.
+        """
         try:
-            # Convert string job_id to ObjectId if it is a valid ObjectId
-            if ObjectId.is_valid(job_id):
-                job_object_id = ObjectId(job_id)
-            else: 
-                job_object_id = job_id
+            job_object_id = self._to_object_id(job_id)
 
-            # Delete the job
-            result = self.jobs_collection.delete_one({"_id": job_object_id})
-            return result.deleted_count > 0
+            # Delete the job, keeping its status for the counters
+            query = {"_id": job_object_id, "owner_id": self.tenant_id}
+            deleted_job = self.jobs_collection.find_one_and_delete(query, projection=ARCHIVE_FIELDS)
+            if deleted_job is not None:
+                self._tombstone([job_object_id])
+                if self._archivable(deleted_job):
+                    # An archival may be copying it right now. Tombstoned first,
+                    # so the archival drops its copy if it lands after this
+                    self.archive_collection.delete_one(query)
+            else:
+                deleted_job = self.archive_collection.find_one_and_delete(query, projection={"status": 1})
+                if deleted_job is not None:
+                    self._tombstone([job_object_id])
+            if deleted_job:
+                self._record_write({deleted_job["status"]: -1})
+                self._emit("deleted", {"_id": str(job_object_id), "owner_id": self.tenant_id})
+            return deleted_job is not None
         except Exception as e:
             print(f"Delete failed: {e}")
             return None
         
-    def total_application(self):
-        """Return total number of jobs in the database."""
+    def _archivable(self, job, now=None):
+        """Whether archive_jobs would move this job (holding ARCHIVE_FIELDS) now"""
+        now = now or _now()
+        if job["updated_at"] >= now - timedelta(days=self.config.archive_idle_days):
+            return False
+        return (
+            job["status"] in CLOSED_STATUSES
+            or job["date_applied"] < now - timedelta(days=self.config.archive_after_days)
+        )
+
+    def _tombstone(self, object_ids):
+        """Remember deleted jobs so /jobs/changes can report them"""
+        deleted_at = _now()
+        try:
+            self.tombstones_collection.bulk_write([
+                UpdateOne(
+                    {"_id": object_id},
+                    {"$set": {"owner_id": self.tenant_id, "deleted_at": deleted_at, "reason": "deleted"}},
+                    upsert=True
+                )
+                for object_id in object_ids
+            ], ordered=False)
+        except Exception as e:
+            # The delete itself succeeded; clients see it on their next full reload
+            print(f"Error recording deleted jobs: {e}")
+
+    def _record_write(self, status_delta=None):
+        """Bookkeeping after a write: move the status counters and drop cached reads.
+
+        status_delta maps status -> change in number of jobs with that status.
+        """
+        if self.use_counters and status_delta:
+            inc = {f"status.{s}": n for s, n in status_delta.items() if n}
+            total = sum(status_delta.values())
+            if total:
+                inc["total"] = total
+            if inc:
+                try:
+                    self.meta_collection.update_one({"_id": self._meta_id("counters")}, {"$inc": inc}, upsert=True)
+                except Exception as e:
+                    # The write itself succeeded; rebuild_counters() repairs any drift
+                    print(f"Error updating counters: {e}")
         try:
-            return self.jobs_collection.count_documents({})
+            # Tells the other workers' caches that the data changed
+            self.meta_collection.update_one({"_id": self._meta_id("version")}, {"$inc": {"v": 1}}, upsert=True)
         except Exception as e:
-            print(f"Error counting jobs: {e}")
+            print(f"Error updating data version: {e}")
+        self.cache.clear(self.tenant_id)
+
+    def data_version(self):
+        """Counter bumped by every write to this tenant through JobList, shared by all workers"""
+        doc = self.meta_collection.find_one({"_id": self._meta_id("version")})
+        return doc["v"] if doc else 0
+
+    def _sync_cache(self, version=None):
+        """Drop cached reads if any process has written since the last check.
+
+        Each worker has its own cache, so a write only clears the cache of the
+        worker that served it. Comparing the shared version document costs one
+        point read per cached read (or per cache_sync_ms interval), none when
+        the caller passes the version it just read.
+        """
+        interval = self.config.cache_sync_ms
+        if interval < 0 or not self.cache.enabled:
+            return
+        now = time.monotonic()
+        seen_version, checked_at = self._sync_state.get(self.tenant_id, (None, 0.0))
+        if version is None:
+            if interval and now - checked_at < interval / 1000:
+                return
+            version = self.data_version()
+        self._sync_state[self.tenant_id] = (version, now)
+        if version != seen_version:
+            self.cache.clear(self.tenant_id)
+
+    def _restore(self, object_ids):
+        """Move archived jobs of this tenant back to the hot tier; returns how many moved.
+
+        The copy is written before the archived one is removed, so a job is
+        never missing from both tiers, only briefly present in both.
+        """
+        query = {"_id": {"$in": object_ids}, "owner_id": self.tenant_id}
+        jobs = list(self.archive_collection.find(query))
+        if not jobs:
             return 0
-        
+        try:
+            self.jobs_collection.bulk_write(
+                [ReplaceOne({"_id": job["_id"]}, job, upsert=True) for job in jobs], ordered=False
+            )
+        except BulkWriteError as bwe:
+            errors = bwe.details["writeErrors"]
+            if not all(_is_duplicate_posting(err) for err in errors):
+                raise
+            # The posting was applied to again while this job was archived;
+            # restore it as an older duplicate, without a fingerprint
+            self.jobs_collection.bulk_write(
+                [
+                    ReplaceOne({"_id": job["_id"]}, {**job, "fingerprint": None}, upsert=True)
+                    for job in (jobs[err["index"]] for err in errors)
+                ],
+                ordered=False
+            )
+        self.archive_collection.delete_many({"_id": {"$in": [job["_id"] for job in jobs]}})
+        # The jobs are active again; the edit that restored them reaches /jobs/changes as an update
+        self.tombstones_collection.delete_many({"_id": {"$in": [job["_id"] for job in jobs]}, "reason": "archived"})
+        self._record_write()
+        return len(jobs)
+
+    def archive_jobs(self, batch_size=None, max_jobs=None):
+        """Move closed and old jobs of every tenant from jobs to jobs_archive.
+
+        A job is archived when it is closed or was applied for more than
+        archive_after_days ago, and has not been updated for
+        archive_idle_days, so a job restored by an edit stays hot for a
+        while. Jobs move in batches: each batch is
+        copied, then removed from jobs only if unchanged since the copy, so
+        an update racing the archival keeps the job hot and a delete racing
+        it stays deleted. Moved jobs are reported by get_changes as archived
+        and to listeners as "archived" events. Safe to run from several
+        processes at once. Returns the number of jobs moved.
+        """
+        batch_size = batch_size or self.config.archive_batch_size
+        now = _now()
+        idle_before = now - timedelta(days=self.config.archive_idle_days)
+        closed_or_old = {"$or": [
+            {"status": {"$in": CLOSED_STATUSES}},
+            {"date_applied": {"$lt": now - timedelta(days=self.config.archive_after_days)}},
+        ]}
+        moved = 0
+        # One tenant at a time, so every batch is a range of owner_updated_at_id
+        for tenant in self.jobs_collection.aggregate([{"$sort": {"owner_id": 1}}, {"$group": {"_id": "$owner_id"}}]):
+            if max_jobs is not None and moved >= max_jobs:
+                break
+            idle = {"updated_at": {"$lt": idle_before}}
+            while max_jobs is None or moved < max_jobs:
+                limit = batch_size if max_jobs is None else min(batch_size, max_jobs - moved)
+                batch = list(
+                    self.jobs_collection.find({"owner_id": tenant["_id"], "$and": [idle, closed_or_old]})
+                    .sort([("updated_at", ASCENDING), ("_id", ASCENDING)])
+                    .limit(limit)
+                )
+                if not batch:
+                    break
+                last = batch[-1]
+                # Continue after the last job in (updated_at, _id) order
+                idle = {"$or": [
+                    {"updated_at": {"$gt": last["updated_at"], "$lt": idle_before}},
+                    {"updated_at": last["updated_at"], "_id": {"$gt": last["_id"]}},
+                ]}
+                self.archive_collection.bulk_write(
+                    [ReplaceOne({"_id": job["_id"]}, job, upsert=True) for job in batch], ordered=False
+                )
+                result = self.jobs_collection.bulk_write(
+                    [DeleteOne({"_id": job["_id"], "updated_at": job["updated_at"]}) for job in batch], ordered=False
+                )
+                archived = batch
+                if result.deleted_count < len(batch):
+                    archived = self._archive_conflicts(batch)
+                moved += result.deleted_count
+                self._record_archived(archived)
+        return moved
+
+    def _archive_conflicts(self, batch):
+        """Undo the archive copies of batch jobs that changed while being moved; returns the jobs that did move.
+
+        An updated job is still hot and newer than its copy. A deleted job
+        was tombstoned after the copy's updated_at and before its deleter
+        cleared the archive, so the copy is either gone already or dropped
+        here. Anything else was moved, by this call or a concurrent one.
+        """
+        ids = [job["_id"] for job in batch]
+        still_hot = {job["_id"] for job in self.jobs_collection.find({"_id": {"$in": ids}}, {"_id": 1})}
+        updated_at = {job["_id"]: job["updated_at"] for job in batch if job["_id"] not in still_hot}
+        deleted = {
+            tombstone["_id"]
+            for tombstone in self.tombstones_collection.find(
+                {"_id": {"$in": list(updated_at)}, "reason": {"$ne": "archived"}}, {"deleted_at": 1}
+            )
+            if tombstone["deleted_at"] >= updated_at[tombstone["_id"]]
+        }
+        if still_hot or deleted:
+            self.archive_collection.delete_many({"_id": {"$in": list(still_hot | deleted)}})
+        return [job for job in batch if job["_id"] not in still_hot and job["_id"] not in deleted]
+
+    def _record_archived(self, jobs):
+        """Tell /jobs/changes, listeners and the caches of each tenant that these jobs left the hot tier"""
+        archived_at = _now()
+        if jobs:
+            try:
+                # $setOnInsert keeps the tombstone of a delete that raced the archival
+                self.tombstones_collection.bulk_write([
+                    UpdateOne(
+                        {"_id": job["_id"]},
+                        {"$setOnInsert": {"owner_id": job["owner_id"], "deleted_at": archived_at, "reason": "archived"}},
+                        upsert=True
+                    )
+                    for job in jobs
+                ], ordered=False)
+            except Exception as e:
+                print(f"Error recording archived jobs: {e}")
+        for job in jobs:
+            self._emit("archived", {"_id": str(job["_id"]), "owner_id": job["owner_id"]})
+        # Listings of the affected tenants changed; their counts did not
+        for tenant_id in {job["owner_id"] for job in jobs}:
+            self.for_tenant(tenant_id)._record_write()
+
+    def create_jobs(self, jobs):
+        """Validate a batch of jobs and insert the valid ones with one insert_many.
+
+        jobs is a list of dicts with the create_job arguments. Returns one
+        result per item, in input order.
+        """
+        results = [None] * len(jobs)
+        docs, positions = [], []
+        for index, job in enumerate(jobs):
+            try:
+                docs.append(self._build_job_doc(
+                    job.get("company"), job.get("position"), job.get("status"), job.get("date_applied"),
+                    job.get("salary"), job.get("job_url"), job.get("remarks")
+                ))
+                positions.append(index)
+            except Exception as e:
+                results[index] = self._bulk_result(index, error=str(e))
+
+        failed = {}
+        if docs:
+            try:
+                self.jobs_collection.insert_many(docs, ordered=False)
+            except BulkWriteError as bwe:
+                failed = self._write_errors(bwe, [doc["fingerprint"] for doc in docs])
+            except Exception as e:
+                print(f"Error creating jobs: {e}")
+                failed = {n: str(e) for n in range(len(docs))}
+            self._record_write(Counter(doc["status"] for n, doc in enumerate(docs) if n not in failed))
+            if self._listeners:
+                for n, doc in enumerate(docs):
+                    if n not in failed:
+                        self._emit("created", {**self._public(doc), "_id": str(doc["_id"])})
+
+        for n, index in enumerate(positions):
+            if n in failed:
+                results[index] = self._bulk_result(index, error=failed[n])
+            else:
+                results[index] = self._bulk_result(index, str(docs[n]["_id"]))
+        return results
+
+    def update_jobs(self, updates):
+        """Validate a batch of updates and apply them one find_one_and_update each.
+
+        updates is a list of dicts holding an "id" plus the update_job fields.
+        Returns one result per item, in input order.
+        """
+        results = [None] * len(updates)
+        pending = []
+        for index, update in enumerate(updates):
+            job_id = update.get("id")
+            try:
+                if not ObjectId.is_valid(job_id):
+                    raise ValueError("Invalid job ID format")
+                fields = {k: v for k, v in update.items() if k != "id"}
+                update_fields = self._build_update_fields(**fields)
+                if not update_fields:
+                    raise ValueError("No fields to update")
+                pending.append((index, ObjectId(job_id), update_fields))
+            except Exception as e:
+                results[index] = self._bulk_result(index, job_id, str(e))
+
+        if pending:
+            status_delta = Counter()
+            try:
+                # A changed company, position or URL needs the other two for
+                # the new fingerprint, from whichever tier holds the job
+                refingerprint = {
+                    job_object_id for _, job_object_id, update_fields in pending
+                    if any(field in update_fields for field in FINGERPRINT_FIELDS)
+                }
+                current = {}
+                for collection in self._collections(include_archived=True):
+                    if refingerprint - current.keys():
+                        query = {"_id": {"$in": list(refingerprint - current.keys())}, "owner_id": self.tenant_id}
+                        current.update((job["_id"], job) for job in collection.find(query, {field: 1 for field in FINGERPRINT_FIELDS}))
+                # Only the full job is needed for the listeners
+                projection = JOB_PROJECTION if self._listeners else {"status": 1}
+
+                def apply_updates(items):
+                    # The previous version of each job says what the write
+                    # actually changed; returns the items that matched nothing
+                    missed = []
+                    for index, job_object_id, update_fields in items:
+                        fingerprint = self._updated_fingerprint(current.get(job_object_id), update_fields)
+                        try:
+                            previous_job = self.jobs_collection.find_one_and_update(
+                                {"_id": job_object_id, "owner_id": self.tenant_id},
+                                self._update_doc(update_fields, fingerprint),
+                                projection=projection,
+                                return_document=ReturnDocument.BEFORE
+                            )
+                        except DuplicateKeyError as e:
+                            error = str(e)
+                            if _is_duplicate_posting(e.details or {"errmsg": error}):
+                                error = str(DuplicateJobError(self._duplicates_of([fingerprint]).get(fingerprint)))
+                            results[index] = self._bulk_result(index, updates[index]["id"], error)
+                            continue
+                        if previous_job is None:
+                            missed.append((index, job_object_id, update_fields))
+                            continue
+                        if "status" in update_fields:
+                            status_delta.update(self._status_change(previous_job["status"], update_fields["status"]))
+                        results[index] = self._bulk_result(index, updates[index]["id"])
+                        if self._listeners:
+                            self._emit("updated", {**previous_job, **update_fields, "_id": str(job_object_id)})
+                    return missed
+
+                missed = apply_updates(pending)
+                # Archived jobs move back to the hot tier before being updated
+                if missed and self._restore(list({job_object_id for _, job_object_id, _ in missed})):
+                    missed = apply_updates(missed)
+                for index, _, _ in missed:
+                    results[index] = self._bulk_result(index, updates[index]["id"], "Job not found")
+            except Exception as e:
+                print(f"Error updating jobs: {e}")
+                for index, _, _ in pending:
+                    if results[index] is None:
+                        results[index] = self._bulk_result(index, updates[index]["id"], str(e))
+            self._record_write(status_delta)
+        return results
+
+    def delete_jobs(self, job_ids):
+        """Delete a batch of jobs, one find_one_and_delete each.
+
+        Returns one result per ID, in input order.
+        """
+        results = [None] * len(job_ids)
+        object_ids = {}
+        for index, job_id in enumerate(job_ids):
+            if ObjectId.is_valid(job_id):
+                object_ids[index] = ObjectId(job_id)
+            else:
+                results[index] = self._bulk_result(index, job_id, "Invalid job ID format")
+
+        if object_ids:
+            deleted = {}
+            try:
+                # Only what each delete returned is counted, so a job deleted
+                # twice (in this batch or concurrently) is reported once
+                missed = []
+                for index, job_object_id in object_ids.items():
+                    query = {"_id": job_object_id, "owner_id": self.tenant_id}
+                    job = self.jobs_collection.find_one_and_delete(query, projection=ARCHIVE_FIELDS)
+                    if job is None:
+                        missed.append(index)
+                    else:
+                        deleted[index] = job
+                if deleted:
+                    # Before the archive is cleared; see delete_job
+                    self._tombstone([job["_id"] for job in deleted.values()])
+                    archivable = [job["_id"] for job in deleted.values() if self._archivable(job)]
+                    if archivable:
+                        self.archive_collection.delete_many({"_id": {"$in": archivable}, "owner_id": self.tenant_id})
+                archived = {}
+                for index in missed:
+                    query = {"_id": object_ids[index], "owner_id": self.tenant_id}
+                    job = self.archive_collection.find_one_and_delete(query, projection={"status": 1})
+                    if job is not None:
+                        archived[index] = job
+                if archived:
+                    self._tombstone([job["_id"] for job in archived.values()])
+                    deleted.update(archived)
+                for index in object_ids:
+                    error = None if index in deleted else "Job not found"
+                    results[index] = self._bulk_result(index, job_ids[index], error)
+            except Exception as e:
+                print(f"Error deleting jobs: {e}")
+                for index in object_ids:
+                    if results[index] is None:
+                        results[index] = self._bulk_result(index, job_ids[index], str(e))
+            for job in deleted.values():
+                self._emit("deleted", {"_id": str(job["_id"]), "owner_id": self.tenant_id})
+            self._record_write(Counter({status: -n for status, n in Counter(job["status"] for job in deleted.values()).items()}))
+        return results
+
+    def rebuild_search_terms(self, batch_size=1000):
+        """Recompute the search tokens of every active and archived job"""
+        for collection in (self.jobs_collection, self.archive_collection):
+            cursor = collection.find({}, {field: 1 for field in SEARCH_FIELDS}).batch_size(batch_size)
+            operations = []
+            for job in cursor:
+                terms = {field: _tokenize(job.get(field)) for field in SEARCH_FIELDS}
+                operations.append(UpdateOne({"_id": job["_id"]}, {"$set": {"search": terms}}))
+                if len(operations) >= batch_size:
+                    collection.bulk_write(operations, ordered=False)
+                    operations = []
+            if operations:
+                collection.bulk_write(operations, ordered=False)
+
+    def backfill_updated_at(self, batch_size=1000):
+        """Stamp jobs stored before updated_at existed with their creation time"""
+        cursor = self.jobs_collection.find({"updated_at": {"$exists": False}}, {"_id": 1}).batch_size(batch_size)
+        operations = []
+        for job in cursor:
+            created_at = _utc_naive(job["_id"].generation_time)
+            operations.append(UpdateOne({"_id": job["_id"]}, {"$set": {"updated_at": created_at}}))
+            if len(operations) >= batch_size:
+                self.jobs_collection.bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            self.jobs_collection.bulk_write(operations, ordered=False)
+
+    def backfill_fingerprints(self, batch_size=1000):
+        """Fingerprint jobs stored before duplicate detection existed.
+
+        The oldest job of each posting gets the fingerprint; later duplicates
+        are rejected by the unique index and kept with a null fingerprint,
+        which the index ignores.
+        """
+        cursor = self.jobs_collection.find(
+            {"fingerprint": {"$exists": False}}, {"owner_id": 1, **{field: 1 for field in FINGERPRINT_FIELDS}}
+        ).sort("_id", ASCENDING).batch_size(batch_size)
+        duplicates = 0
+
+        def flush(jobs):
+            nonlocal duplicates
+            try:
+                self.jobs_collection.bulk_write([
+                    UpdateOne(
+                        {"_id": job["_id"], "fingerprint": {"$exists": False}},
+                        {"$set": {"fingerprint": job_fingerprint(*(job.get(field) for field in FINGERPRINT_FIELDS))}}
+                    )
+                    for job in jobs
+                ], ordered=False)
+            except BulkWriteError as bwe:
+                errors = bwe.details["writeErrors"]
+                if not all(_is_duplicate_posting(err) for err in errors):
+                    raise
+                duplicates += len(errors)
+                self.jobs_collection.update_many(
+                    {"_id": {"$in": [jobs[err["index"]]["_id"] for err in errors]}}, {"$set": {"fingerprint": None}}
+                )
+
+        batch = []
+        for job in cursor:
+            batch.append(job)
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        if duplicates:
+            print(f"Found {duplicates} duplicate jobs; they were kept but are not checked for duplicates")
+
+    def get_changes(self, since, limit=1000):
+        """Jobs created or updated, and IDs of jobs deleted or archived, after since.
+
+        since is a datetime, an ISO datetime string or the next token of an
+        earlier call. Returns {"jobs", "deleted", "archived", "next",
+        "has_more"}; archived jobs left the hot tier (see archive_jobs). When
+        has_more is set, call again with next straight away. Changes in the
+        last changes_overlap_seconds are sent again on the following call, so
+        clients must apply them idempotently. Returns False when since is
+        older than the tombstone retention (the client has to reload
+        everything) and None on database errors.
+        """
+        if isinstance(since, datetime):
+            since = _utc_naive(since)
+            position = {"jobs": (since, MIN_OBJECT_ID), "deleted": (since, MIN_OBJECT_ID)}
+        else:
+            position = parse_since(since)
+        now = _now()
+        if position["deleted"][0] < now - timedelta(days=self.config.tombstone_days):
+            return False
+        horizon = (now - timedelta(seconds=self.config.changes_overlap_seconds), MIN_OBJECT_ID)
+        streams = {
+            "jobs": (self.jobs_collection, "updated_at", JOB_PROJECTION),
+            "deleted": (self.tombstones_collection, "deleted_at", None),
+        }
+        try:
+            changes = {"has_more": False}
+            next_position = {}
+            for name, (collection, field, projection) in streams.items():
+                after_time, after_id = position[name]
+                docs = list(
+                    collection.find(
+                        {
+                            "owner_id": self.tenant_id,
+                            "$or": [{field: {"$gt": after_time}}, {field: after_time, "_id": {"$gt": after_id}}],
+                        },
+                        projection
+                    )
+                    .sort([(field, ASCENDING), ("_id", ASCENDING)])
+                    .limit(limit + 1)
+                )
+                if len(docs) > limit:
+                    docs = docs[:limit]
+                    changes["has_more"] = True
+                    next_position[name] = (docs[-1][field], docs[-1]["_id"])
+                else:
+                    next_position[name] = max(position[name], horizon)
+                changes[name] = docs
+            for job in changes["jobs"]:
+                job["_id"] = str(job["_id"])
+            tombstones = changes["deleted"]
+            changes["deleted"] = [str(doc["_id"]) for doc in tombstones if doc.get("reason") != "archived"]
+            changes["archived"] = [str(doc["_id"]) for doc in tombstones if doc.get("reason") == "archived"]
+            changes["next"] = encode_changes_token(next_position)
+            return changes
+        except Exception as e:
+            print(f"Error retrieving changes: {e}")
+            return None
+
+    def _search_query(self, terms):
+        """Filter of search_jobs: every term prefix-matches a token of one of the fields"""
+        return {"owner_id": self.tenant_id, "$and": [
+            {"$or": [{f"search.{field}": {"$regex": f"^{re.escape(term)}"}} for field in SEARCH_FIELDS]}
+            for term in terms
+        ]}
+
+    def search_jobs(self, q, limit=20, offset=0, include_archived=False):
+        """Ranked prefix search over company, position and remarks.
+
+        Every query term must prefix-match a token of one of the fields.
+        Matches in company rank above position, which rank above remarks,
+        and whole-token matches rank above prefix matches. Returns
+        (jobs, next_offset); next_offset is None on the last page.
+        Archived jobs are only searched when include_archived is set.
+        """
+        try:
+            terms = _tokenize(q)[:8]
+            if not terms:
+                return [], None
+            match = self._search_query(terms)
+            score = []
+            for term in terms:
+                for field, weight in SEARCH_FIELDS.items():
+                    tokens = {"$ifNull": [f"$search.{field}", []]}
+                    prefix_hits = {"$filter": {
+                        "input": tokens,
+                        "as": "token",
+                        "cond": {"$eq": [{"$indexOfCP": ["$$token", term]}, 0]},
+                    }}
+                    score.append({"$cond": [{"$gt": [{"$size": prefix_hits}, 0]}, weight, 0]})
+                    score.append({"$cond": [{"$in": [term, tokens]}, weight, 0]})
+            pipeline = [{"$match": match}]
+            if include_archived:
+                pipeline.append({"$unionWith": {"coll": self.archive_collection.name, "pipeline": [{"$match": match}]}})
+            pipeline += [
+                {"$addFields": {"score": {"$add": score}}},
+                {"$sort": {"score": -1, "date_applied": -1, "_id": -1}},
+                {"$skip": offset},
+                {"$limit": limit + 1},
+                {"$project": JOB_PROJECTION},
+            ]
+            jobs = list(self.jobs_collection.aggregate(pipeline))
+            next_offset = offset + limit if len(jobs) > limit else None
+            jobs = jobs[:limit]
+            for job in jobs:
+                job["_id"] = str(job["_id"])
+            return jobs, next_offset
+        except Exception as e:
+            print(f"Error searching jobs: {e}")
+            return None
+
+    def rebuild_counters(self):
+        """Recompute the counters documents of every tenant from the jobs collection"""
+        by_tenant = {}
+        pipeline = [
+            {"$project": {"owner_id": 1, "status": 1}},
+            {"$unionWith": {"coll": self.archive_collection.name, "pipeline": [{"$project": {"owner_id": 1, "status": 1}}]}},
+            {"$group": {"_id": {"owner": "$owner_id", "status": "$status"}, "count": {"$sum": 1}}},
+        ]
+        for row in self.jobs_collection.aggregate(pipeline):
+            by_tenant.setdefault(row["_id"]["owner"], {})[row["_id"]["status"]] = row["count"]
+        by_tenant.setdefault(self.tenant_id, {})
+        for tenant_id, by_status in by_tenant.items():
+            self.meta_collection.replace_one(
+                {"_id": f"counters:{tenant_id}"},
+                {"total": sum(by_status.values()), "status": by_status},
+                upsert=True
+            )
+        self.cache.clear()
+
+    def get_status_counts(self):
+        """Return {"total", "by_status"} over both tiers; O(1) when the counters document is enabled"""
+        self._sync_cache()
+        key = self._cache_key("counts")
+        counts = self.cache.get(key)
+        if counts is None:
+            generation = self.cache.generation
+            counters = self.meta_collection.find_one({"_id": self._meta_id("counters")}) if self.use_counters else None
+            if counters:
+                by_status = counters.get("status", {})
+                total = counters.get("total", 0)
+            else:
+                by_status = {
+                    row["_id"]: row["count"]
+                    for row in self.jobs_collection.aggregate([
+                        {"$match": {"owner_id": self.tenant_id}},
+                        {"$unionWith": {"coll": self.archive_collection.name, "pipeline": [{"$match": {"owner_id": self.tenant_id}}]}},
+                        {"$group": {"_id": "$status", "count": {"$sum": 1}}},
+                    ])
+                }
+                total = sum(by_status.values())
+            counts = {
+                "total": total,
+                "by_status": {status: by_status.get(status, 0) for status in ALLOWED_STATUSES},
+            }
+            self.cache.put(key, counts, generation)
+        return counts
+
+    def get_stats(self):
+        """Application statistics computed with a single $facet aggregation.
+
+        Archived jobs are included. The salary median uses $median on
+        MongoDB 7.0 or newer and a second, sorted query before that.
+        """
+        try:
+            self._sync_cache()
+            key = self._cache_key("stats")
+            stats = self.cache.get(key)
+            if stats is not None:
+                return stats
+            generation = self.cache.generation
+            owner = {"$match": {"owner_id": self.tenant_id}}
+            pipeline = [owner, {"$unionWith": {"coll": self.archive_collection.name, "pipeline": [owner]}}, {"$facet": {
+                "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+                "by_month": [
+                    {"$group": {"_id": {"$dateToString": {"format": "%Y-%m", "date": "$date_applied"}}, "count": {"$sum": 1}}},
+                    {"$sort": {"_id": 1}},
+                ],
+                "by_week": [
+                    {"$group": {"_id": {"$dateToString": {"format": "%G-W%V", "date": "$date_applied"}}, "count": {"$sum": 1}}},
+                    {"$sort": {"_id": 1}},
+                ],
+                "salary": self._salary_pipeline(),
+            }}]
+            result = next(self.jobs_collection.aggregate(pipeline))
+            by_status = {row["_id"]: row["count"] for row in result["by_status"]}
+            total = sum(by_status.values())
+            salary = result["salary"][0] if result["salary"] else {}
+            if salary and "median" not in salary:
+                salary["median"] = self._salary_median(salary["count"])
+            stats = {
+                "total": total,
+                "by_status": {status: by_status.get(status, 0) for status in ALLOWED_STATUSES},
+                "by_month": [{"period": row["_id"], "count": row["count"]} for row in result["by_month"]],
+                "by_week": [{"period": row["_id"], "count": row["count"]} for row in result["by_week"]],
+                "salary": {
+                    "count": salary.get("count", 0),
+                    "min": salary.get("min"),
+                    "median": salary.get("median"),
+                    "max": salary.get("max"),
+                },
+                "funnel": self._funnel(by_status, total),
+            }
+            self.cache.put(key, stats, generation)
+            return stats
+        except Exception as e:
+            print(f"Error computing stats: {e}")
+            return None
+
+    def is_replica_set(self):
+        """Change streams need a replica set (or a sharded cluster)"""
+        hello = self.client.admin.command("hello")
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    def ping(self):
+        """Round trip to the server; raises if it cannot be reached"""
+        self.client.admin.command("ping")
+
     def close_connection(self):
         """Close the database connection."""
         self.client.close()
 
+class AsyncJobList:
+    """Awaitable wrapper that runs job store calls on a thread pool so pymongo or sqlite never block the event loop.
+
+    With an AdmissionController, calls beyond its limit wait in its queue or
+    raise Overloaded instead of queueing without bound on the thread pool.
+    """
+
+    def __init__(self, job_list, max_workers=32, admission=None):
+        self.job_list = job_list
+        self.admission = admission
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="joblist")
+
+    def for_tenant(self, tenant_id):
+        """Tenant-scoped wrapper sharing this wrapper's thread pool"""
+        view = copy.copy(self)
+        view.job_list = self.job_list.for_tenant(tenant_id)
+        return view
+
+    async def _run(self, fn, *args, **kwargs):
+        if self.admission is None:
+            return await self._execute(fn, *args, **kwargs)
+        await self.admission.acquire()
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(partial(fn, *args, **kwargs))
+        # Released when the thread finishes, not when the caller stops waiting,
+        # so a cancelled request cannot push more work onto the database
+        future.add_done_callback(lambda _: self._release(loop))
+        return await asyncio.wrap_future(future)
+
+    def _release(self, loop):
+        try:
+            loop.call_soon_threadsafe(self.admission.release)
+        except RuntimeError:
+            pass  # The event loop closed during shutdown
+
+    async def _execute(self, fn, *args, **kwargs):
+        """Run without admission control"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args, **kwargs))
+
+    async def create_job(self, *args, **kwargs):
+        return await self._run(self.job_list.create_job, *args, **kwargs)
+
+    async def get_job(self, job_id):
+        return await self._run(self.job_list.get_job, job_id)
+
+    async def get_all_jobs(self, *args, **kwargs):
+        return await self._run(self.job_list.get_all_jobs, *args, **kwargs)
+
+    async def get_jobs_page(self, *args, **kwargs):
+        return await self._run(self.job_list.get_jobs_page, *args, **kwargs)
+
+    async def update_job(self, job_id, **kwargs):
+        return await self._run(self.job_list.update_job, job_id, **kwargs)
+
+    async def delete_job(self, job_id):
+        return await self._run(self.job_list.delete_job, job_id)
+
+    async def create_jobs(self, jobs):
+        return await self._run(self.job_list.create_jobs, jobs)
+
+    async def iter_job_batches(self, batch_size=500, **filters):
+        """Yield lists of matching jobs; reading each one from the cursor is admitted like any other call"""
+        jobs = self.job_list.iter_jobs(batch_size=batch_size, **filters)
+        try:
+            while True:
+                batch = await self._run(lambda: list(itertools.islice(jobs, batch_size)))
+                if batch:
+                    yield batch
+                if len(batch) < batch_size:
+                    return
+        finally:
+            # Closing the cursors is a round trip; keep it off the event loop
+            self._executor.submit(jobs.close)
+
+    async def import_jobs(self, rows, batch_size=1000):
+        """Import rows on a thread of the default pool, so the reading and parsing,
+        which may wait on the request body, hold no admission slot; each insert
+        batch is admitted separately.
+        """
+        loop = asyncio.get_running_loop()
+
+        def create_jobs(jobs):
+            return asyncio.run_coroutine_threadsafe(self.create_jobs(jobs), loop).result()
+        return await loop.run_in_executor(None, partial(self.job_list.import_jobs, rows, batch_size, create_jobs=create_jobs))
+
+    async def update_jobs(self, updates):
+        return await self._run(self.job_list.update_jobs, updates)
+
+    async def delete_jobs(self, job_ids):
+        return await self._run(self.job_list.delete_jobs, job_ids)
+
+    async def total_application(self):
+        return await self._run(self.job_list.total_application)
+
+    async def get_status_counts(self):
+        return await self._run(self.job_list.get_status_counts)
+
+    async def get_changes(self, since, limit=1000):
+        return await self._run(self.job_list.get_changes, since, limit)
+
+    async def data_version(self):
+        return await self._run(self.job_list.data_version)
+
+    async def search_jobs(self, q, limit=20, offset=0, include_archived=False):
+        return await self._run(self.job_list.search_jobs, q, limit, offset, include_archived)
+
+    async def archive_jobs(self, batch_size=None, max_jobs=None):
+        return await self._run(self.job_list.archive_jobs, batch_size, max_jobs)
+
+    async def get_stats(self):
+        return await self._run(self.job_list.get_stats)
+
+    async def ping(self):
+        # Readiness must not fail just because the worker is busy
+        return await self._execute(self.job_list.ping)
+
+    async def warm_up(self):
+        return await self._run(self.job_list.warm_up)
+
+    def close_connection(self):
+        """Stop the worker threads and close the database connection."""
+        self._executor.shutdown(wait=True)
+        self.job_list.close_connection()
+
 def display_menu():
     print("Job List Management")
     print("1. Create Job")
@@ -271,16 +1360,18 @@ def display_menu():
     print("3. Update Job")
     print("4. Delete Job")
     print("5. Number of applications")
-    print("6. Exit")
+    print("6. Archive closed and old jobs")
+    print("7. Exit")
 
 def main():
     """Main interactive CLI Function"""
+    config = JobConfig.from_env()
     try:
-        db = JobList()
-        print("Connected to MongoDB successfully.")
+        db = open_store(config)
+        print(f"Connected to {config.storage} storage successfully.")
     except Exception as e:
-        print(f"Failed to connect to MongoDB: {e}")
-        print("Make sure MongoDB is runningg on localhost:27017 or check your connection string.")
+        print(f"Failed to connect to {config.storage} storage: {e}")
+        print("Make sure MongoDB is runningg on localhost:27017 or check your connection string, or set JOB_STORAGE=sqlite.")
         return
     
     while True:
@@ -298,9 +1389,9 @@ def main():
             remarks = input("Remarks: ")
 
             try:
-                job_id = db.create_job(company, position, status, date_applied, salary, job_url, remarks)
-                if job_id:
-                    print(f"Job created with ID: {job_id}")
+                job = db.create_job(company, position, status, date_applied, salary, job_url, remarks)
+                if job:
+                    print(f"Job created with ID: {job['_id']}")
                 else:
                     print("Failed to create job.")
             except Exception as e:
@@ -355,6 +1446,14 @@ def main():
             print(f"Total number of job applications: {total}")
 
         elif choice == '6':
+            print("--- Archive Jobs ---")
+            try:
+                moved = db.archive_jobs()
+                print(f"Moved {moved} jobs to the archive.")
+            except NotImplementedError:
+                print("This storage backend has no archive.")
+
+        elif choice == '7':
             print("Exiting...")
             db.close_connection()
             break
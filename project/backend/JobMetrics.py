@@ -0,0 +1,209 @@
+from bisect import bisect_left
+from bson import json_util
+from pymongo import monitoring
+import logging
+import threading
+import time
+
+slow_query_log = logging.getLogger("joblist.slow_query")
+
+# Seconds; covers a cached read (sub-millisecond) up to a timed-out request
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Prometheus-style histogram with fixed buckets and labels"""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                # One slot per bucket, plus +Inf, sum and count
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: list(values) for labels, values in self._series.items()}
+        for labels, values in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), values):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.label_names, labels)} {values[-2]}")
+            lines.append(f"{self.name}_count{_label_text(self.label_names, labels)} {values[-1]}")
+        return lines
+
+
+class CounterMetric:
+    """Monotonic counter with labels"""
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, *label_values):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{_label_text(self.label_names, labels)} {value}")
+        return lines
+
+
+class Metrics:
+    """All metrics of one API process, rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self.requests = Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status")
+        )
+        self.mongo_commands = Histogram(
+            "mongodb_command_duration_seconds", "MongoDB command latency", ("command",)
+        )
+        self.mongo_documents = CounterMetric(
+            "mongodb_documents_returned_total", "Documents returned by MongoDB commands", ("command",)
+        )
+        self.mongo_failures = CounterMetric(
+            "mongodb_command_failures_total", "Failed MongoDB commands", ("command",)
+        )
+        self.slow_queries = CounterMetric(
+            "mongodb_slow_commands_total", "MongoDB commands slower than the slow query threshold", ("command",)
+        )
+        self._collectors = []
+
+    def add_collector(self, collect):
+        """Register a callable returning (name, type, help, value) tuples read at scrape time"""
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in (self.requests, self.mongo_commands, self.mongo_documents, self.mongo_failures, self.slow_queries):
+            lines += metric.render()
+        for collect in self._collectors:
+            for name, metric_type, help_text, value in collect():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _documents_returned(reply):
+    """Number of documents in a command reply"""
+    cursor = reply.get("cursor")
+    if cursor:
+        return len(cursor.get("firstBatch", cursor.get("nextBatch", ())))
+    if "value" in reply:
+        return 1 if reply["value"] is not None else 0
+    return 0
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """pymongo listener feeding Mongo command latencies into Metrics.
+
+    Commands slower than slow_query_ms are logged with their (truncated)
+    command document; slow_query_ms=0 disables the log.
+    """
+
+    # Driver housekeeping, not application queries
+    IGNORED = {"hello", "isMaster", "ismaster", "ping", "saslStart", "saslContinue", "endSessions", "killCursors"}
+
+    def __init__(self, metrics, slow_query_ms=100):
+        self.metrics = metrics
+        self.slow_query_ms = slow_query_ms
+        self._pending = {}
+
+    def _key(self, event):
+        return (event.request_id, event.connection_id)
+
+    def started(self, event):
+        if self.slow_query_ms and event.command_name not in self.IGNORED:
+            self._pending[self._key(event)] = event.command
+
+    def succeeded(self, event):
+        command = self._pending.pop(self._key(event), None)
+        if event.command_name in self.IGNORED:
+            return
+        seconds = event.duration_micros / 1e6
+        self.metrics.mongo_commands.observe(seconds, event.command_name)
+        documents = _documents_returned(event.reply)
+        if documents:
+            self.metrics.mongo_documents.inc(documents, event.command_name)
+        self._log_if_slow(event, command, seconds, documents)
+
+    def failed(self, event):
+        command = self._pending.pop(self._key(event), None)
+        if event.command_name in self.IGNORED:
+            return
+        seconds = event.duration_micros / 1e6
+        self.metrics.mongo_commands.observe(seconds, event.command_name)
+        self.metrics.mongo_failures.inc(1, event.command_name)
+        self._log_if_slow(event, command, seconds, 0)
+
+    def _log_if_slow(self, event, command, seconds, documents):
+        if not self.slow_query_ms or seconds * 1000 < self.slow_query_ms:
+            return
+        self.metrics.slow_queries.inc(1, event.command_name)
+        text = json_util.dumps(command)[:500] if command is not None else ""
+        slow_query_log.warning(
+            "slow %s on %s: %.1f ms, %d documents: %s",
+            event.command_name, event.database_name, seconds * 1000, documents, text
+        )
+
+
+class RequestTimingMiddleware:
+    """ASGI middleware recording request latency per route template"""
+
+    def __init__(self, app, metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # Label by route template, not raw path, to keep series bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            self.metrics.requests.observe(time.perf_counter() - start, scope["method"], path, status_code)
@@ -0,0 +1,709 @@
+from pymongo import ASCENDING
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from collections import Counter
+from statistics import median
+from JobCache import JobCache
+from JobConfig import JobConfig
+from JobStore import (
+    JobStore, ALLOWED_STATUSES, SEARCH_FIELDS, FINGERPRINT_FIELDS, DuplicateJobError, IdempotencyKeyReused,
+    job_fingerprint, parse_fields, parse_sort, encode_cursor, decode_cursor, encode_changes_token, parse_since,
+    MIN_OBJECT_ID, _utc_naive, _now, _tokenize, _as_datetime,
+)
+import json
+import sqlite3
+import threading
+
+# Same access paths as JOB_INDEXES in JobList; SQLite scans them in either direction
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    owner_id TEXT NOT NULL,
+    company TEXT NOT NULL,
+    position TEXT NOT NULL,
+    status TEXT NOT NULL,
+    date_applied TEXT NOT NULL,
+    salary REAL,
+    job_url TEXT,
+    remarks TEXT,
+    updated_at TEXT NOT NULL,
+    search TEXT NOT NULL,
+    fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS owner_date_applied_id ON jobs (owner_id, date_applied, id);
+CREATE INDEX IF NOT EXISTS owner_status_date_applied_id ON jobs (owner_id, status, date_applied, id);
+CREATE INDEX IF NOT EXISTS owner_company_date_applied_id ON jobs (owner_id, company, date_applied, id);
+CREATE INDEX IF NOT EXISTS owner_company_id ON jobs (owner_id, company, id);
+CREATE INDEX IF NOT EXISTS owner_position_id ON jobs (owner_id, position, id);
+CREATE INDEX IF NOT EXISTS owner_updated_at_id ON jobs (owner_id, updated_at, id);
+CREATE TABLE IF NOT EXISTS job_tokens (
+    owner_id TEXT NOT NULL,
+    token TEXT NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (owner_id, token, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS job_tokens_id ON job_tokens (id);
+CREATE TRIGGER IF NOT EXISTS jobs_delete_tokens AFTER DELETE ON jobs BEGIN
+    DELETE FROM job_tokens WHERE id = old.id;
+END;
+CREATE TABLE IF NOT EXISTS job_tombstones (
+    id TEXT PRIMARY KEY,
+    owner_id TEXT NOT NULL,
+    deleted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS owner_deleted_at_id ON job_tombstones (owner_id, deleted_at, id);
+CREATE TABLE IF NOT EXISTS job_versions (
+    owner_id TEXT PRIMARY KEY,
+    v INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    owner_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    request_hash TEXT NOT NULL,
+    job TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (owner_id, key)
+);
+CREATE INDEX IF NOT EXISTS idempotency_created_at ON idempotency_keys (created_at);
+"""
+
+# Stored as PRAGMA user_version; _migrate brings older files up to it
+#   1: search recomputed with Unicode tokens
+#   2: dates written with a UTC offset rewritten as naive UTC
+#   3: job_tokens filled in for search
+SCHEMA_VERSION = 3
+
+# Jobs with a NULL fingerprint are older duplicates kept as they are
+FINGERPRINT_INDEX = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS owner_fingerprint ON jobs (owner_id, fingerprint) WHERE fingerprint IS NOT NULL"
+)
+
+COLUMNS = "id, owner_id, company, position, status, date_applied, salary, job_url, remarks, updated_at"
+
+INSERT_JOB = (
+    "INSERT INTO jobs (id, owner_id, company, position, status, date_applied, salary, job_url, remarks, updated_at, search, "
+    "fingerprint) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+
+UPDATE_JOB = (
+    "UPDATE jobs SET company = ?, position = ?, status = ?, date_applied = ?, salary = ?, job_url = ?, remarks = ?, "
+    "updated_at = ?, search = ?, fingerprint = ? WHERE id = ? AND owner_id = ?"
+)
+
+
+def _encode(value):
+    """Datetimes are stored as fixed-width naive UTC ISO text, so they sort as text"""
+    if isinstance(value, datetime):
+        return _utc_naive(value).isoformat(timespec="microseconds")
+    return value
+
+
+def _decode(text):
+    # Files written before dates were normalised may hold a UTC offset
+    return _utc_naive(datetime.fromisoformat(text))
+
+
+def _search_text(job):
+    # Space-delimited tokens; job_tokens holds the same tokens one per row, indexed
+    tokens = [token for field in SEARCH_FIELDS for token in _tokenize(job.get(field))]
+    return " " + " ".join(tokens) + " "
+
+
+class SQLiteJobList(JobStore):
+    """The embedded store: one SQLite file, or memory with path ":memory:".
+
+    Meant for single-node deployments, development and tests; nothing goes
+    over the network. Calls are serialised on one connection, which SQLite
+    answers in microseconds, so AsyncJobList can still share it between
+    threads. There is no archive tier.
+    """
+
+    def __init__(self, path=None, config=None):
+        super().__init__(config or JobConfig.from_env())
+        self.path = path or self.config.sqlite_path
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        # Reads are local; nothing is cached, the API still reports the cache stats
+        self.cache = JobCache(max_entries=0)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+            self._migrate()
+
+    def _migrate(self):
+        """Bring files created by earlier versions up to SCHEMA; the caller holds the lock in a transaction"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "fingerprint" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN fingerprint TEXT")
+            # The oldest job of each posting gets the fingerprint, later duplicates keep NULL
+            seen, fingerprints = set(), []
+            for row in self._conn.execute("SELECT id, owner_id, company, position, job_url FROM jobs ORDER BY id"):
+                fingerprint = job_fingerprint(row["company"], row["position"], row["job_url"])
+                if (row["owner_id"], fingerprint) not in seen:
+                    seen.add((row["owner_id"], fingerprint))
+                    fingerprints.append((fingerprint, row["id"]))
+            self._conn.executemany("UPDATE jobs SET fingerprint = ? WHERE id = ?", fingerprints)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            rows = self._conn.execute(f"SELECT id, {', '.join(SEARCH_FIELDS)} FROM jobs").fetchall()
+            self._conn.executemany("UPDATE jobs SET search = ? WHERE id = ?", [(_search_text(dict(row)), row["id"]) for row in rows])
+        if version < 2:
+            # Naive UTC text is 26 characters; anything longer carries an offset
+            rows = self._conn.execute(
+                "SELECT id, date_applied, updated_at FROM jobs WHERE length(date_applied) > 26 OR length(updated_at) > 26"
+            ).fetchall()
+            self._conn.executemany("UPDATE jobs SET date_applied = ?, updated_at = ? WHERE id = ?", [
+                (_encode(_decode(row["date_applied"])), _encode(_decode(row["updated_at"])), row["id"]) for row in rows
+            ])
+        if version < 3:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO job_tokens (owner_id, token, id) VALUES (?, ?, ?)",
+                (
+                    (row["owner_id"], token, row["id"])
+                    for row in self._conn.execute("SELECT id, owner_id, search FROM jobs").fetchall()
+                    for token in row["search"].split()
+                ),
+            )
+        if version < SCHEMA_VERSION:
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        if self.config.detect_duplicates:
+            self._conn.execute(FINGERPRINT_INDEX)
+        else:
+            self._conn.execute("DROP INDEX IF EXISTS owner_fingerprint")
+
+    def _job(self, row):
+        job = dict(row)
+        job["_id"] = job.pop("id")
+        for name in ("date_applied", "updated_at", "deleted_at"):
+            if name in job:
+                job[name] = _decode(job[name])
+        return job
+
+    def _values(self, job):
+        """Column values of a job, in UPDATE_JOB order up to fingerprint"""
+        return (
+            job["company"], job["position"], job["status"], _encode(job["date_applied"]), job["salary"],
+            job["job_url"], job["remarks"], _encode(job["updated_at"]), _search_text(job), job.get("fingerprint"),
+        )
+
+    def _duplicate_of(self, fingerprint):
+        """DuplicateJobError naming the tenant's job with this fingerprint; the caller holds the lock"""
+        row = self._conn.execute(
+            "SELECT id FROM jobs WHERE owner_id = ? AND fingerprint = ?", (self.tenant_id, fingerprint)
+        ).fetchone()
+        return DuplicateJobError(row[0] if row else None)
+
+    def _insert(self, job_doc):
+        """Insert a built job; the caller holds the lock in a transaction"""
+        try:
+            self._conn.execute(INSERT_JOB, (job_doc["_id"], self.tenant_id) + self._values(job_doc))
+        except sqlite3.IntegrityError as e:
+            if "fingerprint" not in str(e):
+                raise
+            raise self._duplicate_of(job_doc["fingerprint"])
+        self._index_tokens(job_doc)
+
+    def _index_tokens(self, job):
+        """Replace the job_tokens rows of a written job; the caller holds the lock in a transaction.
+
+        Rows of deleted jobs are removed by the jobs_delete_tokens trigger.
+        """
+        self._conn.execute("DELETE FROM job_tokens WHERE id = ?", (job["_id"],))
+        tokens = {token for field in SEARCH_FIELDS for token in _tokenize(job.get(field))}
+        self._conn.executemany(
+            "INSERT INTO job_tokens (owner_id, token, id) VALUES (?, ?, ?)",
+            [(self.tenant_id, token, job["_id"]) for token in tokens],
+        )
+
+    def _where(self, status=None, company=None, date_from=None, date_to=None):
+        """SQL condition and parameters for the listing filters"""
+        conditions, params = ["owner_id = ?"], [self.tenant_id]
+        if status:
+            statuses = [s.strip().lower() for s in status.split(",") if s.strip()]
+            conditions.append(f"status IN ({', '.join('?' * len(statuses))})")
+            params += statuses
+        if company:
+            conditions.append("company = ?")
+            params.append(company.strip())
+        if date_from:
+            conditions.append("date_applied >= ?")
+            params.append(_encode(_as_datetime(date_from)))
+        if date_to:
+            # date_to is inclusive, so stop at the start of the next day
+            conditions.append("date_applied < ?")
+            params.append(_encode(_as_datetime(date_to) + timedelta(days=1)))
+        return " AND ".join(conditions), params
+
+    def _select(self, where, params, sort=None, after=None, limit=None, fields=None):
+        field, direction = parse_sort(sort)
+        # Only the requested columns, plus the sort key for cursors; names are
+        # validated again because they end up in the SQL text
+        fields = parse_fields(fields)
+        columns = ", ".join(dict.fromkeys(("id", "owner_id") + fields + (field,))) if fields else COLUMNS
+        order = "ASC" if direction == ASCENDING else "DESC"
+        if after:
+            after_value, after_id = decode_cursor(after)
+            where += f" AND ({field}, id) {'>' if direction == ASCENDING else '<'} (?, ?)"
+            params = params + [_encode(after_value), str(after_id)]
+        sql = f"SELECT {columns} FROM jobs WHERE {where} ORDER BY {field} {order}, id {order}"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._job(row) for row in rows]
+
+    def _bump_version(self):
+        # Caller holds the lock inside a transaction
+        self._conn.execute(
+            "INSERT INTO job_versions (owner_id, v) VALUES (?, 1) ON CONFLICT(owner_id) DO UPDATE SET v = v + 1",
+            (self.tenant_id,)
+        )
+
+    def create_job(self, company, position, status, date_applied, salary, job_url, remarks, idempotency_key=None):
+        """Create job from user input and return the stored document.
+
+        The idempotency key is checked and stored in the same transaction as
+        the job, so a retry with the key returns the first call's job.
+        """
+        try:
+            job_doc = self._build_job_doc(company, position, status, date_applied, salary, job_url, remarks)
+            job_doc["_id"] = str(job_doc["_id"])
+            created_job = self._public(job_doc)
+            with self._lock, self._conn:
+                if idempotency_key is not None:
+                    replayed = self._replay(idempotency_key, job_doc)
+                    if replayed is not None:
+                        return replayed
+                self._insert(job_doc)
+                if idempotency_key is not None:
+                    snapshot = {("id" if name == "_id" else name): _encode(value) for name, value in created_job.items()}
+                    self._conn.execute(
+                        "INSERT INTO idempotency_keys (owner_id, key, request_hash, job, created_at) VALUES (?, ?, ?, ?, ?)",
+                        (self.tenant_id, idempotency_key, self._request_hash(job_doc), json.dumps(snapshot), _encode(_now()))
+                    )
+                self._bump_version()
+            self._emit("created", created_job)
+            return created_job
+        except (DuplicateJobError, IdempotencyKeyReused):
+            raise
+        except ValueError as ve:
+            print(f"Validation error: {ve}")
+            return None
+        except Exception as e:
+            print(f"Error creating jobs: {e}")
+            return None
+
+    def _replay(self, key, job_doc):
+        """The job created by an earlier call with this idempotency key, or None; the caller holds the lock"""
+        expired = _now() - timedelta(hours=self.config.idempotency_ttl_hours)
+        self._conn.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (_encode(expired),))
+        row = self._conn.execute(
+            "SELECT request_hash, job FROM idempotency_keys WHERE owner_id = ? AND key = ?", (self.tenant_id, key)
+        ).fetchone()
+        if row is None:
+            return None
+        if row["request_hash"] != self._request_hash(job_doc):
+            raise IdempotencyKeyReused(key)
+        return self._job(json.loads(row["job"]))
+
+    def get_job(self, job_id):
+        """Retrieve a single job by ID"""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    f"SELECT {COLUMNS} FROM jobs WHERE id = ? AND owner_id = ?", (str(job_id), self.tenant_id)
+                ).fetchone()
+            return self._job(row) if row else None
+        except Exception as e:
+            print(f"Error retrieving job: {e}")
+            return None
+
+    def get_all_jobs(self, status=None, company=None, date_from=None, date_to=None, sort=None, include_archived=False,
+                     fields=None, data_version=None):
+        """Retrieve all jobs matching the filters; there is no archive, so include_archived changes nothing"""
+        try:
+            where, params = self._where(status, company, date_from, date_to)
+            return self._select(where, params, sort, fields=fields)
+        except Exception as e:
+            print(f"Error retrieving jobs: {e}")
+            return []
+
+    def get_jobs_page(self, limit=100, after=None, status=None, company=None, date_from=None, date_to=None, sort=None,
+                      include_archived=False, fields=None, data_version=None):
+        """Retrieve one page of jobs matching the filters.
+
+        Returns (jobs, next_cursor); next_cursor is None on the last page.
+        """
+        try:
+            where, params = self._where(status, company, date_from, date_to)
+            # Fetch one extra row to know whether another page exists
+            jobs = self._select(where, params, sort, after, limit + 1, fields)
+            next_cursor = encode_cursor(jobs[limit - 1], sort) if len(jobs) > limit else None
+            return jobs[:limit], next_cursor
+        except Exception as e:
+            print(f"Error retrieving jobs: {e}")
+            return None
+
+    def iter_jobs(self, status=None, company=None, date_from=None, date_to=None, sort=None, batch_size=500,
+                  include_archived=False, fields=None):
+        """Yield every matching job, reading batch_size rows at a time"""
+        where, params = self._where(status, company, date_from, date_to)
+        after = None
+        while True:
+            jobs = self._select(where, params, sort, after, batch_size, fields)
+            yield from jobs
+            if len(jobs) < batch_size:
+                return
+            after = encode_cursor(jobs[-1], sort)
+
+    def _update_row(self, job_id, update_fields):
+        """Apply validated update fields to one job; the caller holds the lock in a transaction"""
+        row = self._conn.execute(
+            f"SELECT {COLUMNS}, fingerprint FROM jobs WHERE id = ? AND owner_id = ?", (str(job_id), self.tenant_id)
+        ).fetchone()
+        if row is None:
+            return None
+        job = {**self._job(row), **update_fields}
+        if any(field in update_fields for field in FINGERPRINT_FIELDS):
+            job["fingerprint"] = job_fingerprint(*(job[field] for field in FINGERPRINT_FIELDS))
+        try:
+            self._conn.execute(UPDATE_JOB, self._values(job) + (job["_id"], self.tenant_id))
+        except sqlite3.IntegrityError as e:
+            if "fingerprint" not in str(e):
+                raise
+            raise self._duplicate_of(job["fingerprint"])
+        if any(field in update_fields for field in SEARCH_FIELDS):
+            self._index_tokens(job)
+        return self._public(job)
+
+    def update_job(self, job_id, company=None, position=None, status=None, date_applied=None, salary=None, job_url=None, remarks=None):
+        """Update job listed.
+
+        Returns the updated document, False if the job does not exist and
+        None on validation or database errors.
+        """
+        try:
+            update_fields = self._build_update_fields(company, position, status, date_applied, salary, job_url, remarks)
+            if not update_fields:
+                # Nothing to change, return the job as it is
+                return self.get_job(job_id) or False
+            update_fields["updated_at"] = _now()
+            with self._lock, self._conn:
+                updated_job = self._update_row(job_id, update_fields)
+                if updated_job:
+                    self._bump_version()
+            if not updated_job:
+                return False
+            self._emit("updated", updated_job)
+            return updated_job
+        except DuplicateJobError:
+            raise
+        except ValueError as ve:
+            print(f"Validation error: {ve}")
+            return None
+        except Exception as e:
+            print(f"Error updating job: {e}")
+            return None
+
+    def delete_job(self, job_id):
+        """Delete specific jobs.
+
+        Returns True if deleted, False if the job does not exist and None on
+        database errors.
+        """
+        try:
+            with self._lock, self._conn:
+                deleted = self._conn.execute(
+                    "DELETE FROM jobs WHERE id = ? AND owner_id = ?", (str(job_id), self.tenant_id)
+                ).rowcount
+                if deleted:
+                    self._tombstone([str(job_id)])
+                    self._bump_version()
+            if deleted:
+                self._emit("deleted", {"_id": str(job_id), "owner_id": self.tenant_id})
+            return deleted > 0
+        except Exception as e:
+            print(f"Delete failed: {e}")
+            return None
+
+    def _tombstone(self, job_ids):
+        """Remember deleted jobs so get_changes can report them; the caller holds the lock in a transaction"""
+        now = _now()
+        expired = now - timedelta(days=self.config.tombstone_days)
+        self._conn.execute(
+            "DELETE FROM job_tombstones WHERE owner_id = ? AND deleted_at < ?", (self.tenant_id, _encode(expired))
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO job_tombstones (id, owner_id, deleted_at) VALUES (?, ?, ?)",
+            [(job_id, self.tenant_id, _encode(now)) for job_id in job_ids]
+        )
+
+    def create_jobs(self, jobs):
+        """Validate a batch of jobs and insert the valid ones in one transaction.
+
+        Returns one result per item, in input order.
+        """
+        results = [None] * len(jobs)
+        docs, positions = [], []
+        for index, job in enumerate(jobs):
+            try:
+                doc = self._build_job_doc(
+                    job.get("company"), job.get("position"), job.get("status"), job.get("date_applied"),
+                    job.get("salary"), job.get("job_url"), job.get("remarks")
+                )
+                doc["_id"] = str(doc["_id"])
+                docs.append(doc)
+                positions.append(index)
+            except Exception as e:
+                results[index] = self._bulk_result(index, error=str(e))
+
+        errors = {}
+        if docs:
+            try:
+                with self._lock, self._conn:
+                    for n, doc in enumerate(docs):
+                        # A failed INSERT only rolls back itself, not the transaction
+                        try:
+                            self._insert(doc)
+                        except DuplicateJobError as e:
+                            errors[n] = str(e)
+                    if len(errors) < len(docs):
+                        self._bump_version()
+            except Exception as e:
+                print(f"Error creating jobs: {e}")
+                errors = {n: str(e) for n in range(len(docs))}
+            for n, doc in enumerate(docs):
+                if n not in errors:
+                    self._emit("created", self._public(doc))
+
+        for n, (doc, index) in enumerate(zip(docs, positions)):
+            results[index] = self._bulk_result(index, None if n in errors else doc["_id"], errors.get(n))
+        return results
+
+    def update_jobs(self, updates):
+        """Validate a batch of updates and apply them in one transaction.
+
+        updates is a list of dicts holding an "id" plus the update_job fields.
+        Returns one result per item, in input order.
+        """
+        results = [None] * len(updates)
+        pending = []
+        for index, update in enumerate(updates):
+            job_id = update.get("id")
+            try:
+                if not ObjectId.is_valid(job_id):
+                    raise ValueError("Invalid job ID format")
+                fields = {k: v for k, v in update.items() if k != "id"}
+                update_fields = self._build_update_fields(**fields)
+                if not update_fields:
+                    raise ValueError("No fields to update")
+                pending.append((index, job_id, update_fields))
+            except Exception as e:
+                results[index] = self._bulk_result(index, job_id, str(e))
+
+        if pending:
+            updated_at = _now()
+            updated = []
+            try:
+                with self._lock, self._conn:
+                    for index, job_id, update_fields in pending:
+                        try:
+                            job = self._update_row(job_id, {**update_fields, "updated_at": updated_at})
+                        except DuplicateJobError as e:
+                            results[index] = self._bulk_result(index, job_id, str(e))
+                            continue
+                        results[index] = self._bulk_result(index, job_id, None if job else "Job not found")
+                        if job:
+                            updated.append(job)
+                    if updated:
+                        self._bump_version()
+            except Exception as e:
+                print(f"Error updating jobs: {e}")
+                for index, job_id, _ in pending:
+                    results[index] = self._bulk_result(index, job_id, str(e))
+                updated = []
+            for job in updated:
+                self._emit("updated", job)
+        return results
+
+    def delete_jobs(self, job_ids):
+        """Delete a batch of jobs in one transaction.
+
+        Returns one result per ID, in input order.
+        """
+        results = [None] * len(job_ids)
+        pending = []
+        for index, job_id in enumerate(job_ids):
+            if ObjectId.is_valid(job_id):
+                pending.append((index, job_id))
+            else:
+                results[index] = self._bulk_result(index, job_id, "Invalid job ID format")
+
+        if pending:
+            deleted = []
+            try:
+                with self._lock, self._conn:
+                    for index, job_id in pending:
+                        found = self._conn.execute(
+                            "DELETE FROM jobs WHERE id = ? AND owner_id = ?", (str(job_id), self.tenant_id)
+                        ).rowcount
+                        results[index] = self._bulk_result(index, job_id, None if found else "Job not found")
+                        if found:
+                            deleted.append(str(job_id))
+                    if deleted:
+                        self._tombstone(deleted)
+                        self._bump_version()
+            except Exception as e:
+                print(f"Error deleting jobs: {e}")
+                for index, job_id in pending:
+                    results[index] = self._bulk_result(index, job_id, str(e))
+                deleted = []
+            for job_id in deleted:
+                self._emit("deleted", {"_id": job_id, "owner_id": self.tenant_id})
+        return results
+
+    def get_status_counts(self):
+        """Return {"total", "by_status"}; served from the (owner_id, status, ...) index"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE owner_id = ? GROUP BY status", (self.tenant_id,)
+            ).fetchall()
+        by_status = {status: count for status, count in rows}
+        return {
+            "total": sum(by_status.values()),
+            "by_status": {status: by_status.get(status, 0) for status in ALLOWED_STATUSES},
+        }
+
+    def data_version(self):
+        """Counter bumped by every write to this tenant, shared by processes using the same file"""
+        with self._lock:
+            row = self._conn.execute("SELECT v FROM job_versions WHERE owner_id = ?", (self.tenant_id,)).fetchone()
+        return row[0] if row else 0
+
+    def get_changes(self, since, limit=1000):
+        """Jobs created or updated, and IDs of jobs deleted, after since.
+
+        Same arguments, tokens and results as JobList.get_changes; both
+        streams are read in (time, id) order from their indexes.
+        """
+        if isinstance(since, datetime):
+            since = _utc_naive(since)
+            position = {"jobs": (since, MIN_OBJECT_ID), "deleted": (since, MIN_OBJECT_ID)}
+        else:
+            position = parse_since(since)
+        now = _now()
+        if position["deleted"][0] < now - timedelta(days=self.config.tombstone_days):
+            return False
+        horizon = (now - timedelta(seconds=self.config.changes_overlap_seconds), MIN_OBJECT_ID)
+        streams = {"jobs": ("jobs", "updated_at", COLUMNS), "deleted": ("job_tombstones", "deleted_at", "id, deleted_at")}
+        try:
+            changes = {"has_more": False}
+            next_position = {}
+            with self._lock:
+                for name, (table, field, columns) in streams.items():
+                    after_time, after_id = position[name]
+                    rows = self._conn.execute(
+                        f"SELECT {columns} FROM {table} WHERE owner_id = ? AND ({field}, id) > (?, ?) "
+                        f"ORDER BY {field}, id LIMIT ?",
+                        (self.tenant_id, _encode(after_time), str(after_id), limit + 1)
+                    ).fetchall()
+                    docs = [self._job(row) for row in rows]
+                    if len(docs) > limit:
+                        docs = docs[:limit]
+                        changes["has_more"] = True
+                        next_position[name] = (docs[-1][field], ObjectId(docs[-1]["_id"]))
+                    else:
+                        next_position[name] = max(position[name], horizon)
+                    changes[name] = docs
+            changes["deleted"] = [doc["_id"] for doc in changes["deleted"]]
+            # There is no archive tier
+            changes["archived"] = []
+            changes["next"] = encode_changes_token(next_position)
+            return changes
+        except Exception as e:
+            print(f"Error retrieving changes: {e}")
+            return None
+
+    def search_jobs(self, q, limit=20, offset=0, include_archived=False):
+        """Ranked prefix search with the same matching and ranking as JobList.search_jobs.
+
+        Rows are narrowed down with range scans of job_tokens, one per term,
+        and scored in Python.
+        """
+        try:
+            terms = _tokenize(q)[:8]
+            if not terms:
+                return [], None
+            # A token starts with term when it sorts between term and term + the last code point
+            prefix = "SELECT id FROM job_tokens WHERE owner_id = ? AND token >= ? AND token < ?"
+            # The token rows are scoped to the tenant; the jobs are then read by primary key
+            where = f"id IN ({' INTERSECT '.join([prefix] * len(terms))})"
+            params = []
+            for term in terms:
+                params += [self.tenant_id, term, term + "\U0010ffff"]
+            with self._lock:
+                rows = self._conn.execute(f"SELECT {COLUMNS} FROM jobs WHERE {where}", params).fetchall()
+            jobs = []
+            for row in rows:
+                job = self._job(row)
+                score = 0
+                for field, weight in SEARCH_FIELDS.items():
+                    tokens = _tokenize(job[field])
+                    for term in terms:
+                        if any(token.startswith(term) for token in tokens):
+                            score += weight
+                        if term in tokens:
+                            score += weight
+                job["score"] = score
+                jobs.append(job)
+            jobs.sort(key=lambda job: (job["score"], job["date_applied"], job["_id"]), reverse=True)
+            jobs = jobs[offset:offset + limit + 1]
+            next_offset = offset + limit if len(jobs) > limit else None
+            return jobs[:limit], next_offset
+        except Exception as e:
+            print(f"Error searching jobs: {e}")
+            return None
+
+    def get_stats(self):
+        """Application statistics, aggregated in Python over one indexed scan"""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT status, date_applied, salary FROM jobs WHERE owner_id = ?", (self.tenant_id,)
+                ).fetchall()
+            by_status, by_month, by_week = Counter(), Counter(), Counter()
+            salaries = []
+            for status, date_applied, salary in rows:
+                date_applied = _decode(date_applied)
+                by_status[status] += 1
+                by_month[date_applied.strftime("%Y-%m")] += 1
+                by_week[date_applied.strftime("%G-W%V")] += 1
+                if salary is not None:
+                    salaries.append(salary)
+            total = len(rows)
+            return {
+                "total": total,
+                "by_status": {status: by_status.get(status, 0) for status in ALLOWED_STATUSES},
+                "by_month": [{"period": period, "count": count} for period, count in sorted(by_month.items())],
+                "by_week": [{"period": period, "count": count} for period, count in sorted(by_week.items())],
+                "salary": {
+                    "count": len(salaries),
+                    "min": min(salaries) if salaries else None,
+                    "median": median(salaries) if salaries else None,
+                    "max": max(salaries) if salaries else None,
+                },
+                "funnel": self._funnel(by_status, total),
+            }
+        except Exception as e:
+            print(f"Error computing stats: {e}")
+            return None
+
+    def ping(self):
+        with self._lock:
+            self._conn.execute("SELECT 1")
+
+    def close_connection(self):
+        """Close the database file."""
+        self._conn.close()
@@ -0,0 +1,546 @@
+from pymongo import ASCENDING, DESCENDING
+from datetime import datetime, date, timezone
+from bson import json_util
+from bson.objectid import ObjectId
+from urllib.parse import urlsplit
+import abc
+import base64
+import copy
+import hashlib
+import re
+
+ALLOWED_STATUSES = ["applied", "interviewing", "offered", "rejected"]
+
+# Fields GET /jobs/ can sort on; every store indexes (field, _id) for each
+SORT_FIELDS = ["date_applied", "company", "position"]
+DEFAULT_SORT = "-date_applied"
+
+# Text fields covered by /jobs/search, with their ranking weights
+SEARCH_FIELDS = {"company": 3, "position": 2, "remarks": 1}
+
+# Internal fields that are never returned to callers
+INTERNAL_FIELDS = ("search", "fingerprint")
+
+# Fields identifying a posting; two jobs of a tenant with the same normalized
+# values are duplicates
+FINGERPRINT_FIELDS = ("company", "position", "job_url")
+
+# Fields of a create_job request, compared when an Idempotency-Key is reused
+REQUEST_FIELDS = ("company", "position", "status", "date_applied", "salary", "job_url", "remarks")
+
+# Fields a listing can be narrowed to with fields=; _id is always returned
+JOB_FIELDS = ["company", "position", "status", "date_applied", "salary", "job_url", "remarks", "updated_at"]
+
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.@-]{1,64}$")
+
+def validate_tenant_id(tenant_id):
+    if not isinstance(tenant_id, str) or not TENANT_ID_PATTERN.match(tenant_id):
+        raise ValueError(f"Invalid tenant ID: {tenant_id!r}. Use 1-64 letters, digits, '_', '.', '@' or '-'")
+    return tenant_id
+
+def parse_sort(sort):
+    """Turn "field" / "-field" into (field, direction)"""
+    sort = (sort or DEFAULT_SORT).strip()
+    field = sort.lstrip("+-")
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Invalid sort field: {field}. Allowed: {', '.join(SORT_FIELDS)}")
+    return field, DESCENDING if sort.startswith("-") else ASCENDING
+
+def parse_fields(fields):
+    """Turn "company,status" into a tuple of job fields; None or "" means every field"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()] if isinstance(fields, str) else list(fields)
+    invalid = [name for name in names if name not in JOB_FIELDS and name != "id"]
+    if invalid:
+        raise ValueError(f"Invalid field: {', '.join(invalid)}. Allowed: id, {', '.join(JOB_FIELDS)}")
+    return tuple(dict.fromkeys(name for name in names if name != "id"))
+
+def _normalize_url(url):
+    """Host, path and query of a posting URL, ignoring scheme, www., fragment and utm_* parameters"""
+    url = (url or "").strip()
+    if not url:
+        return ""
+    parts = urlsplit(url if "://" in url else "//" + url)
+    host = parts.netloc.lower().removeprefix("www.")
+    query = "&".join(param for param in parts.query.split("&") if param and not param.lower().startswith("utm_"))
+    return host + parts.path.rstrip("/") + ("?" + query if query else "")
+
+def job_fingerprint(company, position, job_url):
+    """Hash of the normalized company, position and job_url, unique per tenant"""
+    parts = [" ".join((value or "").lower().split()) for value in (company, position)]
+    parts.append(_normalize_url(job_url))
+    return hashlib.sha1("\x1f".join(parts).encode()).hexdigest()
+
+def encode_cursor(job, sort=None):
+    """Build an opaque pagination cursor from the last job of a page"""
+    field, _ = parse_sort(sort)
+    raw = json_util.dumps({"v": job[field], "id": ObjectId(job["_id"])})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Turn a pagination cursor back into (sort value, ObjectId)"""
+    try:
+        raw = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return raw["v"], ObjectId(raw["id"])
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+# Lowest ObjectId, for positions that start at a point in time
+MIN_OBJECT_ID = ObjectId("0" * 24)
+
+def encode_changes_token(position):
+    """Opaque /jobs/changes token from {stream: (time, ObjectId)}"""
+    raw = json_util.dumps({name: {"t": t, "id": oid} for name, (t, oid) in position.items()})
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def parse_since(since):
+    """Turn an ISO datetime or a token from get_changes into {stream: (time, ObjectId)}"""
+    try:
+        t = _utc_naive(datetime.fromisoformat(since.strip()))
+        return {"jobs": (t, MIN_OBJECT_ID), "deleted": (t, MIN_OBJECT_ID)}
+    except ValueError:
+        pass
+    try:
+        raw = json_util.loads(base64.urlsafe_b64decode(since.encode()).decode())
+        return {name: (_utc_naive(raw[name]["t"]), ObjectId(raw[name]["id"])) for name in ("jobs", "deleted")}
+    except Exception:
+        raise ValueError(f"Invalid since: {since}")
+
+def _utc_naive(value):
+    """Datetimes are stored and compared as naive UTC, like pymongo returns them"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _now():
+    """Current UTC time at the millisecond precision MongoDB stores"""
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+def _tokenize(text):
+    """Casefolded word tokens of a text in any script, without duplicates"""
+    if not text:
+        return []
+    return list(dict.fromkeys(re.findall(r"\w+", text.casefold())))
+
+def _as_datetime(value):
+    """Accept a date, datetime or YYYY-MM-DD string and return a datetime"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, datetime.min.time())
+    return datetime.strptime(value.strip(), "%Y-%m-%d")
+
+class DuplicateJobError(Exception):
+    """The tenant already has a job with the same company, position and job_url"""
+
+    def __init__(self, job_id):
+        super().__init__(f"Duplicate of job {job_id}")
+        self.job_id = job_id
+
+
+class IdempotencyKeyReused(Exception):
+    """An Idempotency-Key was sent again with a different request"""
+
+    def __init__(self, key):
+        super().__init__(f"Idempotency key {key!r} was already used for a different request")
+        self.key = key
+
+
+class JobStore(abc.ABC):
+    """Storage interface shared by the MongoDB and the embedded SQLite stores.
+
+    Subclasses implement the abstract methods below;
+    validation, tenant views, write listeners and the operations built on
+    top of the others (import_jobs, total_application, warm_up) live here,
+    so every store accepts and returns exactly the same documents.
+
+    Jobs are dicts with a string _id; methods print errors and return None
+    on failure, and False where a job does not exist, like JobList always did.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.tenant_id = validate_tenant_id(config.default_tenant)
+        self._listeners = []
+
+    def for_tenant(self, tenant_id):
+        """A store whose reads and writes only see the given tenant's jobs.
+
+        Views share the connection, cache and listeners, so creating one per
+        request is cheap.
+        """
+        view = copy.copy(self)
+        view.tenant_id = validate_tenant_id(tenant_id)
+        return view
+
+    def _validate_status(self, status):
+        """Validate job status against allowed values"""
+        return status.lower() in ALLOWED_STATUSES
+
+    def _validate_url(self, url):
+        """Basic URL validation"""
+        if not url:
+            return True
+        url = url.strip()
+        return url.startswith(('http://', 'https://')) or '.' in url
+
+    def _build_job_doc(self, company, position, status, date_applied, salary, job_url, remarks):
+        """Validate user input and build a new job document"""
+        # Validate required fields
+        if not company or not company.strip():
+            raise ValueError("Company name is required")
+        if not position or not position.strip():
+            raise ValueError("Position is required")
+        if not status or not status.strip():
+            raise ValueError("Status is required")
+        if not self._validate_status(status):
+            raise ValueError(f"Invalid status: {status}. Allowed: applied, interviewing, offer, rejected")
+
+        # Validate job_url format
+        if job_url and job_url.strip() and not self._validate_url(job_url):
+            raise ValueError("Invalid URL format. Must start with http:// or https://")
+
+        # Validate and convert date_applied
+        if isinstance(date_applied, str):
+            date_str = date_applied.strip()
+            if not date_str:
+                raise ValueError("date_applied cannot be empty")
+            try:
+                # Parse YYYY-MM-DD format only and convert to datetime
+                date_applied = datetime.strptime(date_str, "%Y-%m-%d")
+            except ValueError:
+                raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD format only")
+        elif isinstance(date_applied, date) and not isinstance(date_applied, datetime):
+            # Convert date to datetime (set time to midnight)
+            date_applied = datetime.combine(date_applied, datetime.min.time())
+        elif isinstance(date_applied, datetime):
+            # Stored as naive UTC, so the job returned matches what is read back later
+            date_applied = _utc_naive(date_applied)
+        else:
+            raise ValueError("date_applied must be a date object or valid date string (YYYY-MM-DD)")
+
+        # Validate salary (if provided)
+        if salary is not None:
+            if isinstance(salary, str):
+                try:
+                    salary = float(salary)
+                except ValueError:
+                    raise ValueError(f"Invalid salary: {salary}. Must be a number")
+            elif not isinstance(salary, (int, float)):
+                raise ValueError("Salary must be a number")
+
+            if salary < 0:
+                raise ValueError("Salary cannot be negative")
+
+        # Create dictionary; the _id is assigned here so callers can return
+        # the document without reading it back
+        job_doc = {
+            "_id": ObjectId(),
+            "owner_id": self.tenant_id,
+            "updated_at": _now(),
+            "company": company.strip(),
+            "position": position.strip(),
+            "status": status.strip().lower(),
+            "date_applied": date_applied,
+            "salary": salary if salary is not None else None,
+            "job_url": job_url.strip() if job_url else None,
+            "remarks": remarks.strip() if remarks else None
+        }
+        job_doc["search"] = {field: _tokenize(job_doc[field]) for field in SEARCH_FIELDS}
+        job_doc["fingerprint"] = job_fingerprint(*(job_doc[field] for field in FINGERPRINT_FIELDS))
+        return job_doc
+
+    def _request_hash(self, job_doc):
+        """Digest of the validated create_job arguments, stored with an Idempotency-Key"""
+        request = {field: job_doc[field] for field in REQUEST_FIELDS}
+        return hashlib.sha1(json_util.dumps(request, sort_keys=True).encode()).hexdigest()
+
+    def _public(self, job):
+        """Strip internal fields from a document built in memory"""
+        return {k: v for k, v in job.items() if k not in INTERNAL_FIELDS}
+
+    def _build_update_fields(self, company=None, position=None, status=None, date_applied=None, salary=None, job_url=None, remarks=None):
+        """Validate user input and build the $set fields for an update"""
+        update_fields = {}
+
+        # Validate and add company
+        if company is not None:
+            company = company.strip() if isinstance(company, str) else company
+            if not company:
+                raise ValueError("Company name cannot be empty")
+            update_fields["company"] = company
+
+        # Validate and add position
+        if position is not None:
+            position = position.strip() if isinstance(position, str) else position
+            if not position:
+                raise ValueError("Position cannot be empty")
+            update_fields["position"] = position
+
+        # Validate and add status
+        if status is not None:
+            status = status.strip() if isinstance(status, str) else status
+            if not status:
+                raise ValueError("Status cannot be empty")
+            if not self._validate_status(status):
+                raise ValueError(f"Invalid status: {status}. Allowed: applied, interviewing, offer, rejected")
+            update_fields["status"] = status.lower()
+
+        # Validate and convert date_applied
+        if date_applied is not None:
+            if isinstance(date_applied, str):
+                date_str = date_applied.strip()
+                if not date_str:
+                    raise ValueError("date_applied cannot be empty")
+                try:
+                    # Parse YYYY-MM-DD format and convert to datetime
+                    date_applied = datetime.strptime(date_str, "%Y-%m-%d")
+                except ValueError:
+                    raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD format only")
+            elif isinstance(date_applied, date) and not isinstance(date_applied, datetime):
+                # Convert date to datetime (set time to midnight)
+                date_applied = datetime.combine(date_applied, datetime.min.time())
+            elif isinstance(date_applied, datetime):
+                # Stored as naive UTC, so the job returned matches what is read back later
+                date_applied = _utc_naive(date_applied)
+            else:
+                raise ValueError("date_applied must be a date/datetime object or valid date string (YYYY-MM-DD)")
+            update_fields["date_applied"] = date_applied
+
+        # Validate salary
+        if salary is not None:
+            if isinstance(salary, str):
+                salary = salary.strip()
+                if not salary:  # Empty string, set to None
+                    update_fields["salary"] = None
+                else:
+                    try:
+                        salary = float(salary)
+                        if salary < 0:
+                            raise ValueError("Salary cannot be negative")
+                        update_fields["salary"] = salary
+                    except ValueError:
+                        raise ValueError(f"Invalid salary: {salary}. Must be a number")
+            elif isinstance(salary, (int, float)):
+                if salary < 0:
+                    raise ValueError("Salary cannot be negative")
+                update_fields["salary"] = salary
+            else:
+                raise ValueError("Salary must be a number or numeric string")
+
+        # Validate and add job_url
+        if job_url is not None:
+            job_url = job_url.strip() if isinstance(job_url, str) else job_url
+            if job_url and not self._validate_url(job_url):
+                raise ValueError("Invalid URL format. Must start with http:// or https://")
+            update_fields["job_url"] = job_url if job_url else None
+
+        # Add remarks
+        if remarks is not None:
+            remarks = remarks.strip() if isinstance(remarks, str) else remarks
+            update_fields["remarks"] = remarks if remarks else None
+        return update_fields
+
+    def _status_change(self, old_status, new_status):
+        """Counter delta for a job moving from one status to another"""
+        if old_status == new_status:
+            return {}
+        return {old_status: -1, new_status: 1}
+
+    def _bulk_result(self, index, job_id=None, error=None):
+        """Per-item outcome reported by the bulk methods"""
+        result = {"index": index, "id": job_id, "ok": error is None}
+        if error is not None:
+            result["error"] = error
+        return result
+
+    def add_listener(self, listener):
+        """Call listener(event_type, job) after every successful write.
+
+        event_type is "created", "updated", "deleted" or "archived"; deleted
+        and archived jobs only carry their _id and owner_id. Listeners run
+        on the thread that did the write.
+        """
+        self._listeners.append(listener)
+
+    def _emit(self, event_type, job):
+        for listener in self._listeners:
+            try:
+                listener(event_type, job)
+            except Exception as e:
+                print(f"Error in write listener: {e}")
+
+    def import_jobs(self, rows, batch_size=1000, max_errors=1000, create_jobs=None):
+        """Insert jobs from an iterator of (row number, job dict or error) in batches.
+
+        Each batch goes through create_jobs, so rows are validated exactly like
+        create_job, and only one batch is held in memory. Returns a report with
+        the imported and failed counts and the first max_errors failures.
+        create_jobs replaces self.create_jobs for the inserts, e.g. to admit
+        each batch separately.
+        """
+        create_jobs = create_jobs or self.create_jobs
+        report = {"imported": 0, "failed": 0, "errors": []}
+
+        def fail(row, error):
+            report["failed"] += 1
+            if len(report["errors"]) < max_errors:
+                report["errors"].append({"row": row, "error": error})
+
+        def flush(batch):
+            results = create_jobs([job for _, job in batch])
+            for (row, _), result in zip(batch, results):
+                if result["ok"]:
+                    report["imported"] += 1
+                else:
+                    fail(row, result["error"])
+
+        batch = []
+        for row, job in rows:
+            if isinstance(job, Exception):
+                fail(row, str(job))
+                continue
+            batch.append((row, job))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+        report["errors_truncated"] = report["failed"] > len(report["errors"])
+        return report
+
+    def total_application(self):
+        """Return total number of jobs in the database."""
+        try:
+            return self.get_status_counts()["total"]
+        except Exception as e:
+            print(f"Error counting jobs: {e}")
+            return 0
+
+    def _funnel(self, by_status, total):
+        """applied -> interviewing -> offered; offers count as having interviewed"""
+        interviewing = by_status.get("interviewing", 0) + by_status.get("offered", 0)
+        offered = by_status.get("offered", 0)
+        return {
+            "applied": total,
+            "interviewing": interviewing,
+            "offered": offered,
+            "interview_rate": interviewing / total if total else 0.0,
+            "offer_rate": offered / interviewing if interviewing else 0.0,
+        }
+
+    def warm_up(self):
+        """Open a connection and prime the cache with the counts and the first page"""
+        self.ping()
+        self.get_status_counts()
+        self.get_jobs_page()
+
+    # Implemented by each store
+
+    @abc.abstractmethod
+    def create_job(self, company, position, status, date_applied, salary, job_url, remarks, idempotency_key=None):
+        """Create job from user input and return the stored document.
+
+        A create_job repeated with the same idempotency_key returns the job of
+        the first call. Raises DuplicateJobError for a duplicate posting and
+        IdempotencyKeyReused when the key came with different arguments.
+        """
+
+    @abc.abstractmethod
+    def get_job(self, job_id):
+        """Retrieve a single job by ID"""
+
+    @abc.abstractmethod
+    def get_all_jobs(self, status=None, company=None, date_from=None, date_to=None, sort=None, include_archived=False,
+                     fields=None, data_version=None):
+        """Retrieve all jobs matching the filters; fields (see parse_fields) limits what is read.
+
+        data_version is the caller's fresh data_version(), if it has one, so
+        a caching store need not read it again.
+        """
+
+    @abc.abstractmethod
+    def get_jobs_page(self, limit=100, after=None, status=None, company=None, date_from=None, date_to=None, sort=None,
+                      include_archived=False, fields=None, data_version=None):
+        """Retrieve one page of jobs matching the filters; returns (jobs, next_cursor)"""
+
+    @abc.abstractmethod
+    def iter_jobs(self, status=None, company=None, date_from=None, date_to=None, sort=None, batch_size=500,
+                  include_archived=False, fields=None):
+        """Yield every matching job without holding them all in memory"""
+
+    @abc.abstractmethod
+    def update_job(self, job_id, company=None, position=None, status=None, date_applied=None, salary=None, job_url=None, remarks=None):
+        """Update a job; returns the updated document, False if it does not exist.
+
+        Raises DuplicateJobError when the change makes it a duplicate posting.
+        """
+
+    @abc.abstractmethod
+    def delete_job(self, job_id):
+        """Delete a job; returns True if deleted, False if it does not exist"""
+
+    @abc.abstractmethod
+    def create_jobs(self, jobs):
+        """Insert a batch of jobs; returns one _bulk_result per item"""
+
+    @abc.abstractmethod
+    def update_jobs(self, updates):
+        """Apply a batch of {"id", **fields} updates; returns one _bulk_result per item"""
+
+    @abc.abstractmethod
+    def delete_jobs(self, job_ids):
+        """Delete a batch of jobs; returns one _bulk_result per ID"""
+
+    @abc.abstractmethod
+    def get_status_counts(self):
+        """Return {"total", "by_status"}"""
+
+    @abc.abstractmethod
+    def data_version(self):
+        """Counter bumped by every write to this tenant, shared by all processes"""
+
+    @abc.abstractmethod
+    def ping(self):
+        """Check the store can be reached; raises if not"""
+
+    @abc.abstractmethod
+    def close_connection(self):
+        """Release the connection"""
+
+    @abc.abstractmethod
+    def search_jobs(self, q, limit=20, offset=0, include_archived=False):
+        """Ranked prefix search; returns (jobs, next_offset)"""
+
+    @abc.abstractmethod
+    def get_stats(self):
+        """Counts by status, month and week, salary summary and funnel"""
+
+    @abc.abstractmethod
+    def get_changes(self, since, limit=1000):
+        """Jobs changed and IDs deleted after since; False when since is older than the tombstones"""
+
+    # Optional; the API answers 501 for stores without them
+
+    def archive_jobs(self, batch_size=None, max_jobs=None):
+        raise NotImplementedError
+
+    def is_replica_set(self):
+        """Whether change streams are available"""
+        return False
+
+
+def open_store(config, event_listeners=None):
+    """The store selected by config.storage: "mongo", "sqlite" or "memory".
+
+    event_listeners are pymongo command listeners and only apply to MongoDB.
+    """
+    if config.storage == "mongo":
+        from JobList import JobList
+        return JobList(event_listeners=event_listeners, config=config)
+    if config.storage in ("sqlite", "memory"):
+        from JobSQLite import SQLiteJobList
+        return SQLiteJobList(":memory:" if config.storage == "memory" else config.sqlite_path, config=config)
+    raise ValueError(f"Invalid storage: {config.storage}. Use mongo, sqlite or memory")
@@ -0,0 +1,131 @@
+"""AdmissionController: the in-flight limit, its queue and how slots are handed back.
+
+Runs without MongoDB or network: python -m pytest -q (from project/backend).
+"""
+from JobAdmission import AdmissionController, Overloaded
+import asyncio
+import pytest
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_admits_up_to_the_limit_then_queues_in_order():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=2, queue_timeout=1.0)
+        await admission.acquire()
+        order = []
+
+        async def waiter(name):
+            await admission.acquire()
+            order.append(name)
+
+        tasks = [asyncio.create_task(waiter(name)) for name in ("first", "second")]
+        await asyncio.sleep(0)
+        assert admission.stats()["queue_depth"] == 2
+        admission.release()
+        await asyncio.sleep(0)
+        admission.release()
+        await asyncio.gather(*tasks)
+        assert order == ["first", "second"]
+        admission.release()
+        return admission.stats()
+
+    stats = run(scenario())
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+    assert stats["admitted"] == 3 and stats["queued"] == 2
+
+
+def test_full_queue_is_rejected_at_once():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=1, queue_timeout=1.0)
+        await admission.acquire()
+        queued = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as error:
+            await admission.acquire()
+        queued.cancel()
+        return admission, error.value
+
+    admission, error = run(scenario())
+    assert error.reason == "queue full" and error.retry_after == 1
+    assert admission.rejected == 1
+
+
+def test_queue_timeout_gives_up_and_keeps_the_slot_count():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=0.01)
+        await admission.acquire()
+        with pytest.raises(Overloaded) as error:
+            await admission.acquire()
+        assert error.value.reason == "queue timeout"
+        admission.release()
+        return admission.stats()
+
+    stats = run(scenario())
+    assert stats["timed_out"] == 1
+    assert stats["in_flight"] == 0 and stats["queue_depth"] == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=1.0)
+        await admission.acquire()
+        cancelled = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        assert admission.stats()["queue_depth"] == 0
+        admission.release()
+        # The slot went back to the pool, not to the cancelled waiter
+        await admission.acquire()
+        return admission.stats()
+
+    assert run(scenario())["in_flight"] == 1
+
+
+def test_slot_handed_over_as_the_wait_is_cancelled_is_not_lost():
+    async def scenario():
+        admission = AdmissionController(max_in_flight=1, max_queue=4, queue_timeout=1.0)
+        await admission.acquire()
+        waiter = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        # The waiter is granted the slot, then cancelled before it runs
+        admission.release()
+        waiter.cancel()
+        try:
+            await waiter
+            holders = 1
+        except asyncio.CancelledError:
+            holders = 0
+        return admission.stats(), holders
+
+    stats, holders = run(scenario())
+    # Either the waiter kept the slot or it was passed on; it is never leaked
+    assert stats["in_flight"] == holders and stats["queue_depth"] == 0
+
+
+def test_async_job_list_admits_each_call_and_each_batch():
+    from JobConfig import JobConfig
+    from JobList import AsyncJobList
+    from JobStore import open_store
+
+    async def scenario():
+        admission = AdmissionController(max_in_flight=2, max_queue=4, queue_timeout=1.0)
+        db = AsyncJobList(open_store(JobConfig(storage="memory")), max_workers=2, admission=admission)
+        try:
+            await db.create_jobs([
+                {"company": f"Company {i}", "position": "Dev", "status": "applied", "date_applied": "2024-01-01"}
+                for i in range(5)
+            ])
+            batches = [len(jobs) async for jobs in db.iter_job_batches(batch_size=2)]
+            await asyncio.sleep(0)
+            return batches, admission.stats()
+        finally:
+            db.close_connection()
+
+    batches, stats = run(scenario())
+    assert batches == [2, 2, 1]
+    assert stats["admitted"] == 4 and stats["in_flight"] == 0
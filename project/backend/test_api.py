@@ -0,0 +1,91 @@
+"""HTTP behaviour of JobApi against the in-memory store.
+
+Runs without MongoDB or network: python -m pytest -q (from project/backend).
+"""
+from fastapi.testclient import TestClient
+import JobApi
+import pytest
+
+JOB = {"company": "Acme", "position": "Backend Engineer", "status": "applied", "date_applied": "2024-03-01",
+       "job_url": "https://jobs.example/1"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("JOB_STORAGE", "memory")
+    monkeypatch.setenv("JOB_TRUST_TENANT_HEADER", "true")
+    monkeypatch.setenv("JOB_DB_MAX_IN_FLIGHT", "4")
+    monkeypatch.setenv("JOB_ARCHIVE_INTERVAL_MINUTES", "0")
+    with TestClient(JobApi.app) as client:
+        yield client
+
+
+def test_listing_etag_answers_304_until_a_write(client):
+    client.post("/jobs/", json=JOB)
+    first = client.get("/jobs/")
+    etag = first.headers["etag"]
+    assert first.status_code == 200 and len(first.json()) == 1
+
+    unchanged = client.get("/jobs/", headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304 and unchanged.headers["etag"] == etag
+
+    client.post("/jobs/", json={**JOB, "job_url": "https://jobs.example/2"})
+    changed = client.get("/jobs/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    assert len(changed.json()) == 2
+
+
+def test_duplicate_posting_is_409_with_the_existing_job(client):
+    created = client.post("/jobs/", json=JOB).json()
+    duplicate = client.post("/jobs/", json={**JOB, "company": " acme ", "job_url": "http://jobs.example/1/"})
+    assert duplicate.status_code == 409
+    assert duplicate.headers["location"] == f"/jobs/{created['id']}"
+
+
+def test_idempotency_key_replays_and_rejects_a_different_body(client):
+    headers = {"Idempotency-Key": "retry-1"}
+    first = client.post("/jobs/", json=JOB, headers=headers)
+    again = client.post("/jobs/", json=JOB, headers=headers)
+    assert first.status_code == again.status_code == 201
+    assert again.json()["id"] == first.json()["id"]
+
+    reused = client.post("/jobs/", json={**JOB, "position": "Manager"}, headers=headers)
+    assert reused.status_code == 422
+
+
+def test_overload_is_503_with_retry_after(client):
+    admission = JobApi.db.admission
+    admission.max_in_flight = admission.max_queue = 0
+    for path in ("/jobs/", "/jobs/stream", "/jobs/export"):
+        response = client.get(path)
+        assert response.status_code == 503, path
+        assert response.headers["retry-after"] == str(admission.retry_after)
+    assert client.get("/health").status_code == 200
+
+
+def test_tenant_header_is_validated_and_isolates_jobs(client):
+    client.post("/jobs/", json=JOB, headers={"X-Tenant-ID": "acme"})
+    assert len(client.get("/jobs/", headers={"X-Tenant-ID": "acme"}).json()) == 1
+    assert client.get("/jobs/", headers={"X-Tenant-ID": "globex"}).json() == []
+    assert client.get("/jobs/").json() == []
+    assert client.get("/jobs/", headers={"X-Tenant-ID": "no spaces/or slashes"}).status_code == 400
+
+
+def test_tenant_header_is_refused_unless_trusted(client):
+    JobApi.db.job_list.config.trust_tenant_header = False
+    assert client.get("/jobs/", headers={"X-Tenant-ID": "acme"}).status_code == 400
+    assert client.get("/jobs/").status_code == 200
+
+
+@pytest.mark.parametrize("fields, status_code", [
+    ("company,status", 200),
+    ("company,unknown", 400),
+    ("company,,salary", 200),
+    ("search", 400),
+])
+def test_fields_parameter(client, fields, status_code):
+    client.post("/jobs/", json={**JOB, "salary": 1000})
+    response = client.get("/jobs/", params={"fields": fields})
+    assert response.status_code == status_code
+    if status_code == 200:
+        assert set(response.json()[0]) == {"id", *filter(None, fields.split(","))}
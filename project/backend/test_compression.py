@@ -0,0 +1,108 @@
+"""CompressionMiddleware: encoding negotiation, the size threshold and streamed bodies.
+
+Runs without MongoDB or network: python -m pytest -q (from project/backend).
+"""
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from JobCompression import Compression, CompressionMiddleware, brotli
+import gzip
+import pytest
+
+BIG = "x" * 4096
+
+
+@pytest.fixture
+def compression():
+    compression = Compression()
+    compression.configure(encodings=("gzip",), minimum_size=1024)
+    return compression
+
+
+@pytest.fixture
+def client(compression):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, compression=compression)
+
+    @app.get("/big")
+    def big():
+        return PlainTextResponse(BIG)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("small")
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"line {i}\n".encode() for i in range(1000)), media_type="application/x-ndjson")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter([b"data: {}\n\n"]), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def get(client, path, accept_encoding):
+    # Raw bytes, so the test sees what went over the wire
+    with client.stream("GET", path, headers={"Accept-Encoding": accept_encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("br;q=1.0, gzip;q=0.5", "gzip"),
+    ("*", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip; q=0.0, deflate", None),
+    ("identity", None),
+    ("", None),
+])
+def test_negotiation_honours_q_zero(compression, header, expected):
+    assert compression.negotiate(header) == expected
+
+
+@pytest.mark.skipif(brotli is None, reason="brotli is not installed")
+def test_brotli_is_preferred_when_configured():
+    compression = Compression()
+    assert compression.negotiate("gzip, br") == "br"
+    assert compression.negotiate("gzip, br;q=0") == "gzip"
+
+
+def test_unknown_encoding_is_rejected_by_configure():
+    with pytest.raises(ValueError):
+        Compression().configure(encodings=("zstd",))
+
+
+def test_large_body_is_compressed(client):
+    response, body = get(client, "/big", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) == len(body)
+    assert gzip.decompress(body).decode() == BIG
+
+
+def test_small_body_and_refused_encoding_are_sent_as_is(client):
+    response, body = get(client, "/small", "gzip")
+    assert "content-encoding" not in response.headers and body == b"small"
+    response, body = get(client, "/big", "gzip;q=0")
+    assert "content-encoding" not in response.headers and body.decode() == BIG
+
+
+def test_streamed_body_is_compressed_chunk_by_chunk(client):
+    response, body = get(client, "/stream", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert gzip.decompress(body) == b"".join(f"line {i}\n".encode() for i in range(1000))
+
+
+def test_event_streams_are_not_compressed(client):
+    response, body = get(client, "/events", "gzip")
+    assert "content-encoding" not in response.headers and body == b"data: {}\n\n"
+
+
+def test_malformed_accept_encoding_gets_an_uncompressed_response(compression, client):
+    with pytest.raises(ValueError):
+        compression.negotiate("gzip;q=high")
+    response, body = get(client, "/big", "gzip;q=high")
+    assert response.status_code == 200 and body.decode() == BIG
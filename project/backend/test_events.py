@@ -0,0 +1,79 @@
+"""JobEvents: per-tenant fan-out, bounded queues and the reset after an overflow.
+
+Runs without MongoDB or network: python -m pytest -q (from project/backend).
+"""
+from JobEvents import JobEvents, RESET_EVENT, Subscription
+import asyncio
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_subscription_overflow_drops_the_backlog_and_flags_a_reset():
+    async def scenario():
+        subscription = Subscription(max_queue=2)
+        for n in range(5):
+            subscription.push(b"%d" % n)
+        first = subscription.drain()
+        subscription.push(b"after")
+        return first, subscription.drain()
+
+    (messages, overflowed), (later, overflowed_again) = run(scenario())
+    assert messages == [] and overflowed is True
+    # Once drained the subscriber is back to normal
+    assert later == [b"after"] and overflowed_again is False
+
+
+def test_events_reach_only_their_tenant_and_overflow_sends_a_reset():
+    async def scenario():
+        events = JobEvents(asyncio.get_running_loop(), max_queue=2, heartbeat=5.0)
+        acme, globex = events.stream("acme"), events.stream("globex")
+        # The first message is the retry hint; the subscription exists from then on
+        assert await acme.__anext__() == b"retry: 3000\n\n"
+        await globex.__anext__()
+
+        events.publish_threadsafe("acme", "created", b'{"_id": "1"}')
+        await asyncio.sleep(0)
+        first = await acme.__anext__()
+
+        for n in range(5):
+            events.publish_threadsafe("acme", "updated", b'{"_id": "%d"}' % n)
+        await asyncio.sleep(0)
+        after_overflow = await acme.__anext__()
+
+        stats = events.stats()
+        await acme.aclose()
+        await globex.aclose()
+        return first, after_overflow, stats, events.stats()
+
+    first, after_overflow, stats, closed = run(scenario())
+    assert first.startswith(b"id: 1\nevent: created\n") and first.endswith(b'data: {"_id": "1"}\n\n')
+    assert after_overflow == b"event: %s\ndata: {}\n\n" % RESET_EVENT.encode()
+    assert stats == {"subscribers": 2, "tenants": 2, "published": 6, "resets": 1}
+    assert closed["subscribers"] == 0 and closed["tenants"] == 0
+
+
+def test_idle_stream_sends_keep_alives():
+    async def scenario():
+        events = JobEvents(asyncio.get_running_loop(), heartbeat=0.01)
+        stream = events.stream("acme")
+        await stream.__anext__()
+        message = await stream.__anext__()
+        await stream.aclose()
+        return message
+
+    assert run(scenario()) == b": keep-alive\n\n"
+
+
+def test_full_reports_the_subscriber_limit():
+    async def scenario():
+        events = JobEvents(asyncio.get_running_loop(), max_subscribers=1)
+        stream = events.stream("acme")
+        assert not events.full
+        await stream.__anext__()
+        full = events.full
+        await stream.aclose()
+        return full, events.full
+
+    assert run(scenario()) == (True, False)
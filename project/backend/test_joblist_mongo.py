@@ -0,0 +1,140 @@
+"""The MongoDB store against mongomock: archive and restore, tenant scoping and counters.
+
+mongomock has no $unionWith, so the store is opened with create_indexes=False
+(no counters rebuild) and the whole-tenant aggregations are left to a real
+server. Runs without MongoDB or network: python -m pytest -q (from project/backend).
+"""
+from datetime import datetime, timedelta
+from JobConfig import JobConfig
+from JobStore import SORT_FIELDS
+import JobList
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+
+@pytest.fixture
+def store(monkeypatch):
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(JobList, "MongoClient", lambda *args, **kwargs: client)
+    store = JobList.JobList(config=JobConfig(mongo_uri="mongodb://localhost", create_indexes=False))
+    yield store
+    store.close_connection()
+
+
+def create(store, n, status="applied", prefix="Company"):
+    results = store.create_jobs([
+        {"company": f"{prefix} {i}", "position": "Dev", "status": status, "date_applied": "2024-01-01",
+         "job_url": f"https://jobs.example/{prefix}/{i}"}
+        for i in range(n)
+    ])
+    return [result["id"] for result in results]
+
+
+def idle(store, days=90):
+    store.jobs_collection.update_many({}, {"$set": {"updated_at": datetime.utcnow() - timedelta(days=days)}})
+
+
+def stored_counts(store):
+    """Status counts of the tenant counted directly in both tiers"""
+    counts = {}
+    for collection in (store.jobs_collection, store.archive_collection):
+        for job in collection.find({"owner_id": store.tenant_id}, {"status": 1}):
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+    return counts
+
+
+def test_archive_moves_idle_closed_jobs_and_an_edit_restores_them(store):
+    since = datetime.utcnow() - timedelta(seconds=1)
+    closed = create(store, 2, status="rejected", prefix="Closed")
+    idle(store)
+    active = create(store, 1, prefix="Active")
+
+    assert store.archive_jobs() == 2
+    assert [job["_id"] for job in store.get_jobs_page()[0]] == active
+    assert len(store.get_jobs_page(include_archived=True)[0]) == 3
+    assert store.get_job(closed[0])["status"] == "rejected"
+    assert set(store.get_changes(since)["archived"]) == set(closed)
+
+    restored = store.update_job(closed[0], status="interviewing")
+    assert restored["status"] == "interviewing"
+    assert store.archive_collection.count_documents({}) == 1
+    assert closed[0] not in store.get_changes(since)["archived"]
+    # Edited just now, so it stays hot
+    assert store.archive_jobs() == 0
+
+
+def test_deleting_archived_and_hot_jobs(store):
+    since = datetime.utcnow() - timedelta(seconds=1)
+    archived = create(store, 2, status="rejected", prefix="Closed")
+    idle(store)
+    store.archive_jobs()
+    hot = create(store, 1)
+
+    assert store.delete_job(archived[0]) is True
+    results = store.delete_jobs([archived[1], hot[0], hot[0]])
+    assert [result["ok"] for result in results] == [True, True, False]
+    assert store.archive_collection.count_documents({}) == store.jobs_collection.count_documents({}) == 0
+    assert set(store.get_changes(since)["deleted"]) == set(archived + hot)
+
+
+def test_tenants_only_see_their_own_jobs(store):
+    other = store.for_tenant("other")
+    mine = create(store, 2)
+    create(other, 1, prefix="Other")
+
+    assert {job["_id"] for job in store.get_jobs_page()[0]} == set(mine)
+    assert other.get_job(mine[0]) is None
+    assert other.update_job(mine[0], status="offered") is False
+    assert other.delete_jobs(mine)[0]["ok"] is False
+    assert store.get_status_counts()["total"] == 2
+    assert other.get_status_counts()["total"] == 1
+
+
+def test_every_listing_filters_on_the_tenant_and_sorts_along_an_index(store, monkeypatch):
+    filters = []
+    find = store.jobs_collection.find
+
+    def recording_find(query=None, *args, **kwargs):
+        filters.append(query)
+        return find(query, *args, **kwargs)
+    monkeypatch.setattr(store.jobs_collection, "find", recording_find)
+
+    create(store, 3)
+    for sort in ("date_applied", "-company", "position"):
+        page, after = store.get_jobs_page(limit=2, sort=sort, status="applied")
+        store.get_jobs_page(limit=2, after=after, sort=sort)
+        store.get_all_jobs(sort=sort, company="Company 1")
+        list(store.iter_jobs(sort=sort))
+    assert filters and all("owner_id" in str(query) for query in filters)
+
+    indexes = [[key for key, _ in index.document["key"].items()] for index in JobList.JOB_INDEXES]
+    assert all(keys[0] == "owner_id" for keys in indexes)
+    for field in SORT_FIELDS:
+        assert ["owner_id", field, "_id"] in indexes
+
+
+def test_counters_follow_every_kind_of_write(store):
+    created = create(store, 4)
+    store.update_job(created[0], status="offered")
+    store.update_jobs([{"id": created[1], "status": "rejected"}, {"id": created[1], "status": "rejected"}])
+    store.delete_job(created[2])
+    store.delete_jobs([created[3], created[3]])
+    rejected = create(store, 2, status="rejected", prefix="Closed")
+    idle(store)
+    store.archive_jobs()
+    store.update_job(rejected[0], status="interviewing")
+    store.delete_job(rejected[1])
+
+    counts = store.get_status_counts()
+    expected = stored_counts(store)
+    assert counts["total"] == sum(expected.values()) == 3
+    assert counts["by_status"] == {status: expected.get(status, 0) for status in counts["by_status"]}
+
+
+def test_counters_are_dropped_when_disabled(store):
+    create(store, 1)
+    assert store.meta_collection.count_documents({"_id": {"$regex": "^counters:"}}) == 1
+    store.use_counters = False
+    store.init_database()
+    assert store.meta_collection.count_documents({"_id": {"$regex": "^counters:"}}) == 0
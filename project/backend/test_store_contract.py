@@ -0,0 +1,170 @@
+"""Behaviour every JobStore must share, checked against the embedded stores.
+
+Runs without MongoDB or network: python -m pytest -q (from project/backend).
+"""
+from datetime import datetime, timedelta, timezone
+from JobConfig import JobConfig
+from JobStore import JobStore, DuplicateJobError, IdempotencyKeyReused, SORT_FIELDS, open_store
+import pytest
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    config = JobConfig(storage=request.param, sqlite_path=str(tmp_path / "jobs.db"), changes_overlap_seconds=0)
+    store = open_store(config)
+    yield store
+    store.close_connection()
+
+
+def create(store, company="Acme", position="Backend Engineer", date_applied="2024-03-01", job_url=None, **fields):
+    return store.create_job(company, position, fields.pop("status", "applied"), date_applied,
+                            fields.pop("salary", None), job_url, fields.pop("remarks", None))
+
+
+def all_pages(store, limit, **filters):
+    ids, after = [], None
+    while True:
+        jobs, after = store.get_jobs_page(limit=limit, after=after, **filters)
+        ids += [job["_id"] for job in jobs]
+        if after is None:
+            return ids
+
+
+def test_stores_implement_the_whole_interface():
+    class Partial(JobStore):
+        def get_job(self, job_id):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial(JobConfig())
+
+
+def test_create_get_update_delete(store):
+    job = create(store, salary="1200.5", remarks="Referral")
+    assert store.get_job(job["_id"])["salary"] == 1200.5
+    assert "search" not in job and "fingerprint" not in job
+
+    updated = store.update_job(job["_id"], status="Interviewing")
+    assert updated["status"] == "interviewing"
+    assert updated["updated_at"] >= job["updated_at"]
+    assert store.get_status_counts()["by_status"]["interviewing"] == 1
+
+    assert store.delete_job(job["_id"]) is True
+    assert store.delete_job(job["_id"]) is False
+    assert store.update_job(job["_id"], status="offered") is False
+    assert store.get_job(job["_id"]) is None
+
+
+def test_invalid_input_returns_none(store):
+    assert create(store, status="ghosted") is None
+    assert create(store, date_applied="01/03/2024") is None
+
+
+@pytest.mark.parametrize("sort", SORT_FIELDS + [f"-{field}" for field in SORT_FIELDS])
+def test_paging_over_equal_timezone_aware_dates_returns_every_job_once(store, sort):
+    same_instant = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    created = [create(store, position=f"Engineer {i}", date_applied=same_instant, job_url=f"https://jobs.example/{i}")
+               for i in range(7)]
+    ids = all_pages(store, limit=2, sort=sort)
+    assert sorted(ids) == sorted(job["_id"] for job in created)
+
+
+def test_naive_and_aware_dates_mean_utc(store):
+    naive = create(store, date_applied=datetime(2024, 3, 1, 12), job_url="https://jobs.example/naive")
+    aware = create(store, date_applied=datetime(2024, 3, 1, 14, tzinfo=timezone(timedelta(hours=2))),
+                   job_url="https://jobs.example/aware")
+    assert aware["date_applied"] == store.get_job(aware["_id"])["date_applied"] == datetime(2024, 3, 1, 12)
+    updated = store.update_job(naive["_id"], date_applied=datetime(2024, 3, 2, tzinfo=timezone(timedelta(hours=-5))))
+    assert updated["date_applied"] == store.get_job(naive["_id"])["date_applied"] == datetime(2024, 3, 2, 5)
+    jobs, _ = store.search_jobs("acme")
+    assert {job["_id"] for job in jobs} == {naive["_id"], aware["_id"]}
+    assert len(store.get_jobs_page(date_from="2024-03-01", date_to="2024-03-02")[0]) == 2
+
+
+def test_filters_and_search(store):
+    create(store, company="Acme", position="Backend Engineer", status="rejected")
+    create(store, company="Globex", position="Data Engineer", remarks="Remote friendly")
+    create(store, company="Müller GmbH", position="Entwickler", date_applied="2023-01-15")
+
+    assert len(store.get_jobs_page(status="applied,rejected")[0]) == 3
+    assert [job["company"] for job in store.get_jobs_page(company="Globex")[0]] == ["Globex"]
+    assert len(store.get_jobs_page(date_from="2024-01-01")[0]) == 2
+
+    jobs, _ = store.search_jobs("eng")
+    assert [job["company"] for job in jobs][:2] in (["Acme", "Globex"], ["Globex", "Acme"])
+    assert [job["company"] for job in store.search_jobs("MÜLL")[0]] == ["Müller GmbH"]
+    assert store.search_jobs("remote backend")[0] == []
+
+
+def test_tenants_are_isolated(store):
+    other = store.for_tenant("other")
+    job = create(store)
+    create(other, company="Initech")
+    assert [j["company"] for j in other.get_jobs_page()[0]] == ["Initech"]
+    assert other.get_job(job["_id"]) is None
+    assert other.delete_job(job["_id"]) is False
+    assert store.get_status_counts()["total"] == 1
+
+
+def test_duplicates_and_idempotency_keys(store):
+    job = create(store, job_url="https://www.jobs.example/1?utm_source=x")
+    with pytest.raises(DuplicateJobError) as error:
+        create(store, company=" acme ", job_url="http://jobs.example/1/")
+    assert error.value.job_id == job["_id"]
+
+    first = store.create_job("Globex", "Dev", "applied", "2024-01-01", None, None, None, idempotency_key="k1")
+    again = store.create_job("Globex", "Dev", "applied", "2024-01-01", None, None, None, idempotency_key="k1")
+    assert again["_id"] == first["_id"]
+    with pytest.raises(IdempotencyKeyReused):
+        store.create_job("Globex", "Ops", "applied", "2024-01-01", None, None, None, idempotency_key="k1")
+
+
+def test_bulk_results_keep_input_order(store):
+    results = store.create_jobs([
+        {"company": "Acme", "position": "Dev", "status": "applied", "date_applied": "2024-01-01"},
+        {"company": "", "position": "Dev", "status": "applied", "date_applied": "2024-01-01"},
+        {"company": "Globex", "position": "Dev", "status": "applied", "date_applied": "2024-01-02"},
+    ])
+    assert [result["ok"] for result in results] == [True, False, True]
+    ids = [result["id"] for result in results if result["ok"]]
+    assert [r["ok"] for r in store.update_jobs([{"id": ids[0], "status": "offered"}, {"id": "bad"}])] == [True, False]
+    assert [r["ok"] for r in store.delete_jobs([ids[1], ids[1]])] == [True, False]
+    assert store.get_status_counts() == {
+        "total": 1, "by_status": {"applied": 0, "interviewing": 0, "offered": 1, "rejected": 0},
+    }
+
+
+def test_changes_report_writes_and_deletes(store):
+    start = datetime.now(timezone.utc) - timedelta(seconds=1)
+    kept = create(store, job_url="https://jobs.example/kept")
+    gone = create(store, job_url="https://jobs.example/gone")
+    store.delete_job(gone["_id"])
+
+    changes = store.get_changes(start)
+    assert [job["_id"] for job in changes["jobs"]] == [kept["_id"]]
+    assert changes["deleted"] == [gone["_id"]]
+    assert changes["has_more"] is False
+
+    store.update_job(kept["_id"], status="interviewing")
+    later = store.get_changes(changes["next"])
+    assert [job["status"] for job in later["jobs"]] == ["interviewing"]
+    assert store.for_tenant("other").get_changes(start)["jobs"] == []
+
+
+def test_changes_page_through_a_backlog(store):
+    start = datetime.now(timezone.utc) - timedelta(seconds=1)
+    created = [create(store, job_url=f"https://jobs.example/{i}") for i in range(5)]
+    seen, since = [], start
+    while True:
+        changes = store.get_changes(since, limit=2)
+        seen += [job["_id"] for job in changes["jobs"]]
+        since = changes["next"]
+        if not changes["has_more"]:
+            break
+    assert seen == [job["_id"] for job in created]
+
+
+def test_changes_older_than_the_tombstones_need_a_reload(store):
+    assert store.get_changes(datetime.now(timezone.utc) - timedelta(days=365)) is False
+    with pytest.raises(ValueError):
+        store.get_changes("not a token")